@@ -1,5 +1,7 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 import json
+from app.ai.json_repair import PARSE_FAILED, extract_json, list_keys_in_schema, schema_errors
+from app.ai.transcript import Transcript, format_message
 
 class BaseAgent:
     """
@@ -10,25 +12,112 @@ class BaseAgent:
         self.name = name
         self.system_prompt = system_prompt
         self.temperature = temperature
+        # Subclasses describe their JSON output so it can be reused
+        # (e.g. by the consolidated single-call analysis).
+        self.json_schema: str = ""
+        self.output_keys: List[str] = []
 
-    def build_prompt(self, messages: List[Dict[str, Any]], metadata: Dict[str, Any] | None = None) -> str:
+    def build_prompt(
+        self,
+        messages: List[Dict[str, Any]],
+        metadata: Dict[str, Any] | None = None,
+        transcript: Transcript | None = None,
+    ) -> str:
         """
         Override this to build a specific prompt for the agent.
+        `transcript`, when given, is the already rendered form of `messages`.
         """
         raise NotImplementedError
 
-    def format_chat_for_prompt(self, messages: List[Dict[str, Any]]) -> str:
+    def format_chat_for_prompt(self, messages: List[Dict[str, Any]], transcript: Transcript | None = None) -> str:
         """
-        Convert structured message list into a readable string for prompts.
+        Convert structured message list into a readable string for prompts
+        (compacted, see app/ai/transcript.py). A pre-rendered transcript is used as is.
         """
-        formatted_chat = []
-        for msg in messages:
-            role = msg.get("role", "unknown")
-            user_id = msg.get("user_id", "anonymous")
-            content = msg.get("content", "")
-            formatted_chat.append(f"[{role}] {user_id}: {content}")
-        
-        return "\n".join(formatted_chat)
+        if transcript is None:
+            transcript = Transcript(messages)
+        return transcript.text
+
+    def format_message(self, msg: Dict[str, Any]) -> str:
+        """
+        Render a single message as one transcript line.
+        """
+        return format_message(msg)
+
+    def build_update_prompt(self, previous: Dict[str, Any], delta: Transcript) -> str:
+        """
+        Prompt for an incremental update: the agent's previous result for
+        this session plus only the messages that arrived since.
+        """
+        structure = self.json_schema or "a single JSON object"
+        return f"""
+You already analysed the earlier part of this study session. Your result was:
+{json.dumps(previous, ensure_ascii=False)}
+
+New messages since then:
+{delta.text}
+
+Return the updated result for the WHOLE session: keep what is still correct,
+add what the new messages introduce and revise anything they contradict.
+Use exactly this JSON structure:
+{structure}
+
+{self.safe_json_hint()}
+"""
+
+    # -----------------------------
+    # Map-reduce for long transcripts
+    # -----------------------------
+
+    def chunk_messages(
+        self,
+        messages: List[Dict[str, Any]],
+        token_budget: int
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Split a transcript into consecutive windows whose estimated
+        token count fits within token_budget.
+        A single oversized message still gets a window of its own.
+        """
+        return [chunk.messages for chunk in Transcript(messages, compact=False).chunks(token_budget)]
+
+    def merge_results(self, partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Reduce step: combine per-chunk results into one result.
+        List fields are concatenated with duplicates removed; the first
+        non-list value wins. Override for schema-specific merging.
+        Failed partials are skipped unless every chunk failed.
+        """
+        usable = [p for p in partials if not self.is_failed_result(p)]
+        if not usable:
+            return partials[0] if partials else {}
+
+        merged: Dict[str, Any] = {}
+        for partial in usable:
+            for key, value in partial.items():
+                if isinstance(value, list):
+                    merged[key] = self._dedupe(merged.get(key, []) + value)
+                else:
+                    merged.setdefault(key, value)
+        return merged
+
+    def is_failed_result(self, result: Dict[str, Any]) -> bool:
+        """
+        True when parse_response fell back to its error structure.
+        """
+        return not isinstance(result, dict) or "raw_response" in result or "raw" in result
+
+    @staticmethod
+    def _dedupe(items: List[Any]) -> List[Any]:
+        seen = set()
+        unique = []
+        for item in items:
+            marker = json.dumps(item, sort_keys=True, ensure_ascii=False) if not isinstance(item, str) else item.strip().lower()
+            if marker in seen:
+                continue
+            seen.add(marker)
+            unique.append(item)
+        return unique
 
     def safe_json_hint(self) -> str:
         """
@@ -40,16 +129,40 @@ class BaseAgent:
         """
         Utility to safely parse JSON responses from LLM.
         """
-        try:
-            # Try to strip markdown code blocks if present
-            clean_response = response.strip()
-            if clean_response.startswith("```"):
-                lines = clean_response.split("\n")
-                if lines[0].startswith("```json"):
-                    clean_response = "\n".join(lines[1:-1])
-                elif lines[0].startswith("```"):
-                    clean_response = "\n".join(lines[1:-1])
-
-            return json.loads(clean_response)
-        except Exception:
-            return {"error": "Failed to parse AI response", "raw": response}
+        return self.parse_response_with_status(response)[0]
+
+    def parse_response_with_status(self, response: str) -> Tuple[Dict[str, Any], str]:
+        """
+        Extract (and if needed repair) the JSON object in `response` and
+        validate it against output_keys. Returns (result, parse status);
+        on failure the result is fallback_result(response).
+        """
+        parsed, status = extract_json(response)
+        if status == PARSE_FAILED or self.validation_errors(parsed):
+            return self.fallback_result(response), PARSE_FAILED
+        return parsed, status
+
+    def validation_errors(self, result: Any) -> List[str]:
+        return schema_errors(result, self.output_keys, list_keys_in_schema(self.json_schema))
+
+    def fallback_result(self, response: str) -> Dict[str, Any]:
+        """
+        Result returned when the response cannot be used.
+        """
+        return {"error": "Failed to parse AI response", "raw": response}
+
+    def build_repair_prompt(self, response: str) -> str:
+        """
+        Cheap last-resort prompt asking the model to fix its own malformed output.
+        """
+        structure = self.json_schema or "a single JSON object"
+        return f"""
+The text below was meant to be JSON with this structure:
+{structure}
+
+Fix it so it is valid JSON with every required key. Do not add new content.
+{self.safe_json_hint()}
+
+Text:
+{response}
+"""
@@ -0,0 +1,82 @@
+from typing import Any, Dict, List
+from app.ai.agents.base_agent import BaseAgent
+from app.ai.transcript import Transcript
+
+CONSOLIDATED_SYSTEM_PROMPT = """
+You are an AI Study Session Analyst for an educational collaboration platform.
+In a single pass over a group discussion you perform several analyses at once:
+a study summary, decision extraction, learning gap detection, skill detection and quiz generation.
+
+Only use what was actually discussed. Do not invent content.
+Follow each section's instructions and JSON structure exactly.
+"""
+
+class ConsolidatedAgent(BaseAgent):
+    """
+    Runs several agents' analyses in one LLM call.
+    The transcript is sent once and the response is split back
+    into per-agent sections keyed by agent name.
+    """
+    def __init__(self, agents: Dict[str, BaseAgent]):
+        super().__init__(
+            name="consolidated_agent",
+            system_prompt=CONSOLIDATED_SYSTEM_PROMPT,
+            temperature=0.3,
+        )
+        self.agents = agents
+        self.output_keys = list(agents.keys())
+
+    def build_prompt(
+        self,
+        messages: List[Dict[str, Any]],
+        metadata: Dict[str, Any] | None = None,
+        transcript: Transcript | None = None,
+    ) -> str:
+        chat_text = self.format_chat_for_prompt(messages, transcript)
+
+        sections = []
+        for agent_name, agent in self.agents.items():
+            role = agent.system_prompt.strip()
+            sections.append(
+                f'Section "{agent_name}":\n{role}\n\nJSON structure for "{agent_name}":\n{agent.json_schema}'
+            )
+        section_text = "\n\n".join(sections)
+        keys = ", ".join(f'"{name}"' for name in self.agents)
+
+        return f"""
+Analyze the following group discussion and produce every section below in ONE JSON object.
+
+{self.safe_json_hint()}
+
+The top-level object must have exactly these keys: {keys}.
+Each key maps to an object that follows that section's JSON structure.
+
+{section_text}
+
+Discussion:
+----------------
+{chat_text}
+----------------
+"""
+
+    def validation_errors(self, result: Any) -> List[str]:
+        # Sections are validated one by one in split_response
+        return [] if isinstance(result, dict) else ["response is not a JSON object"]
+
+    def split_response(self, response: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Parse the combined response and return the sections that are complete.
+        Sections that are missing or do not match their agent's schema are left out,
+        so the caller can fall back to running those agents individually.
+        """
+        parsed = self.parse_response(response)
+        if self.is_failed_result(parsed):
+            return {}
+
+        sections = {}
+        for agent_name, agent in self.agents.items():
+            section = parsed.get(agent_name)
+            if agent.validation_errors(section):
+                continue
+            sections[agent_name] = section
+        return sections
@@ -1,6 +1,7 @@
 from typing import Any, Dict, List
 
 from app.ai.agents.base_agent import BaseAgent
+from app.ai.transcript import Transcript
 
 
 DECISION_SYSTEM_PROMPT = """
@@ -17,6 +18,13 @@ Do not assume or invent decisions.
 Be precise and concise.
 """
 
+DECISION_JSON_SCHEMA = """{
+  "final_decisions": [string],
+  "agreements": [string],
+  "disagreements": [string],
+  "open_questions": [string]
+}"""
+
 
 class DecisionAgent(BaseAgent):
     def __init__(self):
@@ -25,13 +33,16 @@ class DecisionAgent(BaseAgent):
             system_prompt=DECISION_SYSTEM_PROMPT,
             temperature=0.2,
         )
+        self.json_schema = DECISION_JSON_SCHEMA
+        self.output_keys = ["final_decisions", "agreements", "disagreements", "open_questions"]
 
     def build_prompt(
         self,
         messages: List[Dict[str, Any]],
         metadata: Dict[str, Any] | None = None,
+        transcript: Transcript | None = None,
     ) -> str:
-        chat_text = self.format_chat_for_prompt(messages)
+        chat_text = self.format_chat_for_prompt(messages, transcript)
 
         return f"""
 Analyze the following group discussion and extract structured decisions.
@@ -39,12 +50,7 @@ Analyze the following group discussion and extract structured decisions.
 {self.safe_json_hint()}
 
 Required JSON structure:
-{{
-  "final_decisions": [string],
-  "agreements": [string],
-  "disagreements": [string],
-  "open_questions": [string]
-}}
+{DECISION_JSON_SCHEMA}
 
 Discussion:
 ----------------
@@ -52,20 +58,14 @@ Discussion:
 ----------------
 """
 
-    def parse_response(self, response: str) -> Dict[str, List[str]]:
+    def fallback_result(self, response: str) -> Dict[str, Any]:
         """
-        The response is expected to already be valid JSON.
-        In future, this can include strict validation.
+        Empty lists keep the combined analysis well-formed.
         """
-        try:
-            import json
-            return json.loads(response)
-        except Exception:
-            # Safe fallback to avoid system crash
-            return {
-                "final_decisions": [],
-                "agreements": [],
-                "disagreements": [],
-                "open_questions": [],
-                "raw_response": response,
-            }
+        return {
+            "final_decisions": [],
+            "agreements": [],
+            "disagreements": [],
+            "open_questions": [],
+            "raw_response": response,
+        }
@@ -1,6 +1,7 @@
 from typing import Any, Dict, List
 
 from app.ai.agents.base_agent import BaseAgent
+from app.ai.transcript import Transcript
 
 
 GAP_SYSTEM_PROMPT = """
@@ -17,6 +18,13 @@ Do not invent gaps.
 Be educational, neutral, and concise.
 """
 
+GAP_JSON_SCHEMA = """{
+  "conceptual_gaps": [string],
+  "misunderstandings": [string],
+  "missing_prerequisites": [string],
+  "uncertain_topics": [string]
+}"""
+
 
 class GapAgent(BaseAgent):
     def __init__(self):
@@ -25,13 +33,16 @@ class GapAgent(BaseAgent):
             system_prompt=GAP_SYSTEM_PROMPT,
             temperature=0.3,
         )
+        self.json_schema = GAP_JSON_SCHEMA
+        self.output_keys = ["conceptual_gaps", "misunderstandings", "missing_prerequisites", "uncertain_topics"]
 
     def build_prompt(
         self,
         messages: List[Dict[str, Any]],
         metadata: Dict[str, Any] | None = None,
+        transcript: Transcript | None = None,
     ) -> str:
-        chat_text = self.format_chat_for_prompt(messages)
+        chat_text = self.format_chat_for_prompt(messages, transcript)
 
         return f"""
 Analyze the following discussion to identify learning gaps.
@@ -39,12 +50,7 @@ Analyze the following discussion to identify learning gaps.
 {self.safe_json_hint()}
 
 Return the output strictly in this JSON format:
-{{
-  "conceptual_gaps": [string],
-  "misunderstandings": [string],
-  "missing_prerequisites": [string],
-  "uncertain_topics": [string]
-}}
+{GAP_JSON_SCHEMA}
 
 Discussion:
 ----------------
@@ -52,15 +58,14 @@ Discussion:
 ----------------
 """
 
-    def parse_response(self, response: str) -> Dict[str, List[str]]:
-        try:
-            import json
-            return json.loads(response)
-        except Exception:
-            return {
-                "conceptual_gaps": [],
-                "misunderstandings": [],
-                "missing_prerequisites": [],
-                "uncertain_topics": [],
-                "raw_response": response,
-            }
+    def fallback_result(self, response: str) -> Dict[str, Any]:
+        """
+        Safe fallback to avoid system crash.
+        """
+        return {
+            "conceptual_gaps": [],
+            "misunderstandings": [],
+            "missing_prerequisites": [],
+            "uncertain_topics": [],
+            "raw_response": response,
+        }
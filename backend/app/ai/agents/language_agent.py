@@ -1,4 +1,5 @@
 from typing import Any, Dict, List
+import json
 from app.ai.agents.base_agent import BaseAgent
 
 LANGUAGE_SYSTEM_PROMPT = """
@@ -32,3 +33,33 @@ Maintain the JSON structure. Only translate the string values.
 Content to translate:
 {content}
 """
+
+    def build_batch_prompt(self, texts: List[str], target_language: str) -> str:
+        """
+        Prompt for translating a batch of independent strings.
+        Strings are keyed by position so a partial answer is still usable.
+        """
+        numbered = {str(i): text for i, text in enumerate(texts)}
+        return f"""
+Translate each string value of the following JSON object into {target_language}.
+Keep every key unchanged and return a JSON object with exactly the same keys.
+
+{self.safe_json_hint()}
+
+Strings to translate:
+{json.dumps(numbered, ensure_ascii=False, indent=1)}
+"""
+
+    def parse_batch_response(self, response: str, texts: List[str]) -> Dict[str, str]:
+        """
+        Map source text -> translation for every string the model returned.
+        """
+        parsed = self.parse_response(response)
+        if self.is_failed_result(parsed):
+            return {}
+        translations = {}
+        for i, text in enumerate(texts):
+            translated = parsed.get(str(i))
+            if isinstance(translated, str) and translated.strip():
+                translations[text] = translated
+        return translations
@@ -1,5 +1,6 @@
 from typing import Any, Dict, List
 from app.ai.agents.base_agent import BaseAgent
+from app.ai.transcript import Transcript
 
 QUIZ_SYSTEM_PROMPT = """
 You are an AI Quiz Generator Agent.
@@ -8,6 +9,29 @@ Your task is to create educational assessment materials (MCQs, Flashcards, Short
 Focus on clarity and accuracy. Ensure the level of difficulty matches the discussion.
 """
 
+QUIZ_JSON_SCHEMA = """{
+  "mcqs": [
+    {
+      "question": "string",
+      "options": ["A", "B", "C", "D"],
+      "correct_answer": "string",
+      "explanation": "string"
+    }
+  ],
+  "flashcards": [
+    {
+      "front": "Question/Term",
+      "back": "Answer/Definition"
+    }
+  ],
+  "short_questions": [
+     {
+       "question": "string",
+       "ideal_answer": "string"
+     }
+  ]
+}"""
+
 class QuizAgent(BaseAgent):
     def __init__(self):
         super().__init__(
@@ -15,13 +39,16 @@ class QuizAgent(BaseAgent):
             system_prompt=QUIZ_SYSTEM_PROMPT,
             temperature=0.4,
         )
+        self.json_schema = QUIZ_JSON_SCHEMA
+        self.output_keys = ["mcqs", "flashcards", "short_questions"]
 
     def build_prompt(
         self,
         messages: List[Dict[str, Any]],
         metadata: Dict[str, Any] | None = None,
+        transcript: Transcript | None = None,
     ) -> str:
-        chat_text = self.format_chat_for_prompt(messages)
+        chat_text = self.format_chat_for_prompt(messages, transcript)
 
         return f"""
 Based on the following discussion, generate a set of assessment questions.
@@ -29,28 +56,7 @@ Based on the following discussion, generate a set of assessment questions.
 {self.safe_json_hint()}
 
 Required JSON structure:
-{{
-  "mcqs": [
-    {{
-      "question": "string",
-      "options": ["A", "B", "C", "D"],
-      "correct_answer": "string",
-      "explanation": "string"
-    }}
-  ],
-  "flashcards": [
-    {{
-      "front": "Question/Term",
-      "back": "Answer/Definition"
-    }}
-  ],
-  "short_questions": [
-     {{
-       "question": "string",
-       "ideal_answer": "string"
-     }}
-  ]
-}}
+{QUIZ_JSON_SCHEMA}
 
 Discussion:
 ----------------
@@ -1,5 +1,6 @@
 from typing import Any, Dict, List
 from app.ai.agents.base_agent import BaseAgent
+from app.ai.transcript import Transcript
 
 SKILL_SYSTEM_PROMPT = """
 You are an AI Skill Detection Agent.
@@ -16,6 +17,15 @@ Skills can include:
 Be objective and only attribute skills based on actual content provided in the chat.
 """
 
+SKILL_JSON_SCHEMA = """{
+  "participant_skills": [
+    {
+      "user_id": "string",
+      "skills": ["string"]
+    }
+  ]
+}"""
+
 class SkillAgent(BaseAgent):
     def __init__(self):
         super().__init__(
@@ -23,13 +33,16 @@ class SkillAgent(BaseAgent):
             system_prompt=SKILL_SYSTEM_PROMPT,
             temperature=0.2,
         )
+        self.json_schema = SKILL_JSON_SCHEMA
+        self.output_keys = ["participant_skills"]
 
     def build_prompt(
         self,
         messages: List[Dict[str, Any]],
         metadata: Dict[str, Any] | None = None,
+        transcript: Transcript | None = None,
     ) -> str:
-        chat_text = self.format_chat_for_prompt(messages)
+        chat_text = self.format_chat_for_prompt(messages, transcript)
 
         return f"""
 Analyze the contribution of each participant in the following discussion and detect their demonstrated skills.
@@ -37,17 +50,31 @@ Analyze the contribution of each participant in the following discussion and det
 {self.safe_json_hint()}
 
 Required JSON structure:
-{{
-  "participant_skills": [
-    {{
-      "user_id": "string",
-      "skills": ["string"]
-    }}
-  ]
-}}
+{SKILL_JSON_SCHEMA}
 
 Discussion:
 ----------------
 {chat_text}
 ----------------
 """
+
+    def merge_results(self, partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Merge per-chunk results so each participant appears once
+        with the union of their skills.
+        """
+        merged = super().merge_results(partials)
+        if self.is_failed_result(merged):
+            return merged
+
+        by_user: Dict[str, List[str]] = {}
+        for entry in merged.get("participant_skills", []):
+            if not isinstance(entry, dict):
+                continue
+            skills = by_user.setdefault(entry.get("user_id", "anonymous"), [])
+            skills.extend(s for s in entry.get("skills", []) if s not in skills)
+
+        merged["participant_skills"] = [
+            {"user_id": user_id, "skills": skills} for user_id, skills in by_user.items()
+        ]
+        return merged
@@ -1,5 +1,6 @@
 from typing import Any, Dict, List
 from app.ai.agents.base_agent import BaseAgent
+from app.ai.transcript import Transcript
 
 SUMMARY_SYSTEM_PROMPT = """
 You are an AI Study Summary Agent.
@@ -14,6 +15,25 @@ Your task is to analyze a group study discussion and generate a structured summa
 Focus on educational value. Be concise but comprehensive.
 """
 
+SUMMARY_JSON_SCHEMA = """{
+  "topics_covered": [string],
+  "key_concepts": [
+    {
+      "concept": "Name",
+      "definition": "Description"
+    }
+  ],
+  "important_explanations": [string],
+  "action_items": [string],
+  "revision_notes": [string],
+  "skills_identified": [
+    {
+      "name": "Skill Name",
+      "level": 1-5
+    }
+  ]
+}"""
+
 class SummaryAgent(BaseAgent):
     def __init__(self):
         super().__init__(
@@ -21,13 +41,16 @@ class SummaryAgent(BaseAgent):
             system_prompt=SUMMARY_SYSTEM_PROMPT,
             temperature=0.3,
         )
+        self.json_schema = SUMMARY_JSON_SCHEMA
+        self.output_keys = ["topics_covered", "key_concepts", "important_explanations", "action_items", "revision_notes", "skills_identified"]
 
     def build_prompt(
         self,
         messages: List[Dict[str, Any]],
         metadata: Dict[str, Any] | None = None,
+        transcript: Transcript | None = None,
     ) -> str:
-        chat_text = self.format_chat_for_prompt(messages)
+        chat_text = self.format_chat_for_prompt(messages, transcript)
 
         return f"""
 Analyze the following group discussion and generate a structured study summary.
@@ -35,27 +58,37 @@ Analyze the following group discussion and generate a structured study summary.
 {self.safe_json_hint()}
 
 Required JSON structure:
-{{
-  "topics_covered": [string],
-  "key_concepts": [
-    {{
-      "concept": "Name",
-      "definition": "Description"
-    }}
-  ],
-  "important_explanations": [string],
-  "action_items": [string],
-  "revision_notes": [string],
-  "skills_identified": [
-    {{
-      "name": "Skill Name",
-      "level": 1-5
-    }}
-  ]
-}}
+{SUMMARY_JSON_SCHEMA}
 
 Discussion:
 ----------------
 {chat_text}
 ----------------
 """
+
+    def merge_results(self, partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Merge per-chunk summaries; a skill seen in several chunks
+        keeps its highest level.
+        """
+        merged = super().merge_results(partials)
+        if self.is_failed_result(merged):
+            return merged
+
+        levels: Dict[str, Any] = {}
+        for skill in merged.get("skills_identified", []):
+            if not isinstance(skill, dict) or "name" not in skill:
+                continue
+            name = skill["name"]
+            level = skill.get("level", 1)
+            current = levels.get(name)
+            if name not in levels or (
+                isinstance(level, (int, float))
+                and (not isinstance(current, (int, float)) or level > current)
+            ):
+                levels[name] = level
+
+        merged["skills_identified"] = [
+            {"name": name, "level": level} for name, level in levels.items()
+        ]
+        return merged
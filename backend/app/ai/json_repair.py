@@ -0,0 +1,189 @@
+import json
+import re
+from typing import Any, Iterable, List, Optional, Tuple
+
+_FENCE_RE = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)(?:```|$)", re.DOTALL)
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+# Parse outcomes, used for per-agent metrics
+PARSE_OK = "ok"              # valid JSON as returned
+PARSE_REPAIRED = "repaired"  # needed extraction / local repair
+PARSE_FAILED = "failed"
+
+
+def extract_json(text: str) -> Tuple[Any, str]:
+    """
+    Find and parse the outermost JSON object in arbitrary model output.
+
+    Tries, cheapest first: the text as is; the contents of a ``` fence;
+    the first {...} span; and finally a repaired copy of that span
+    (single quotes, trailing commas, Python literals, missing closers).
+    Returns (value, PARSE_OK | PARSE_REPAIRED), or (None, PARSE_FAILED).
+    """
+    if not isinstance(text, str):
+        return None, PARSE_FAILED
+
+    stripped = text.strip()
+    try:
+        return json.loads(stripped), PARSE_OK
+    except ValueError:
+        pass
+
+    candidates = []
+    fence = _FENCE_RE.search(stripped)
+    if fence:
+        candidates.append(fence.group(1).strip())
+    span = _outermost_object(stripped)
+    if span is not None:
+        candidates.append(span)
+
+    for candidate in candidates:
+        try:
+            return json.loads(candidate), PARSE_REPAIRED
+        except ValueError:
+            pass
+
+    for candidate in candidates:
+        start = candidate.find("{")
+        if start == -1:
+            continue
+        try:
+            return json.loads(repair_json(candidate[start:])), PARSE_REPAIRED
+        except ValueError:
+            pass
+
+    return None, PARSE_FAILED
+
+
+def _outermost_object(text: str) -> Optional[str]:
+    """
+    Text from the first "{" to its matching "}" (string-aware).
+    An unbalanced object runs to the end of the text.
+    """
+    start = text.find("{")
+    if start == -1:
+        return None
+
+    depth = 0
+    quote = None
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if quote:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == quote:
+                quote = None
+        elif ch in "\"'":
+            quote = ch
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text[start:]
+
+
+def repair_json(text: str) -> str:
+    """
+    Best-effort rewrite of almost-JSON into JSON:
+    - single-quoted strings become double-quoted
+    - True / False / None become true / false / null
+    - trailing commas before } or ] are dropped
+    - an unterminated string and any unclosed brackets are closed
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    quote = None
+    escaped = False
+    i = 0
+
+    while i < len(text):
+        ch = text[i]
+
+        if quote:
+            if escaped:
+                escaped = False
+                # \' is not a valid JSON escape
+                out.append("'" if ch == "'" else "\\" + ch)
+            elif ch == "\\":
+                escaped = True
+            elif ch == quote:
+                quote = None
+                out.append('"')
+            elif ch == '"':
+                out.append('\\"')
+            elif ch == "\n":
+                out.append("\\n")
+            else:
+                out.append(ch)
+            i += 1
+            continue
+
+        if ch in "\"'":
+            quote = ch
+            out.append('"')
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            out.append(ch)
+        elif ch in "}]":
+            _drop_trailing_comma(out)
+            if stack:
+                stack.pop()
+            out.append(ch)
+        elif ch.isalpha():
+            j = i
+            while j < len(text) and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            out.append(_PY_LITERALS.get(word, word))
+            i = j
+            continue
+        else:
+            out.append(ch)
+        i += 1
+
+    # Truncated output: close whatever is still open
+    if quote:
+        out.append('"')
+    _drop_trailing_comma(out)
+    tail = "".join(out).rstrip()
+    if tail.endswith(":"):
+        tail += " null"
+    return tail + "".join(reversed(stack))
+
+
+def _drop_trailing_comma(out: List[str]) -> None:
+    j = len(out) - 1
+    while j >= 0 and out[j].isspace():
+        j -= 1
+    if j >= 0 and out[j] == ",":
+        del out[j]
+
+
+def schema_errors(data: Any, required_keys: Iterable[str], list_keys: Iterable[str] = ()) -> List[str]:
+    """
+    Check a parsed response against an agent's output schema:
+    every required key must be present and list fields must be lists.
+    """
+    if not isinstance(data, dict):
+        return ["response is not a JSON object"]
+
+    list_keys = set(list_keys)
+    errors = []
+    for key in required_keys:
+        if key not in data:
+            errors.append(f"missing key '{key}'")
+        elif key in list_keys and not isinstance(data[key], list):
+            errors.append(f"'{key}' should be a list")
+    return errors
+
+
+def list_keys_in_schema(schema: str) -> List[str]:
+    """
+    Keys shown with a list value ("key": [...]) in a *_JSON_SCHEMA example.
+    """
+    return re.findall(r'"(\w+)"\s*:\s*\[', schema)
@@ -0,0 +1,382 @@
+import ast
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+
+from app.config import settings
+
+
+class LLMBackend:
+    """
+    Interface for a text-generation provider.
+    LLMClient owns caching, rate limiting and retries; a backend only makes the call.
+    """
+    name = "base"
+    # Exceptions LLMClient should retry with backoff
+    retryable_errors: tuple = ()
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    async def generate(
+        self, full_prompt: str, temperature: float, max_tokens: int, model: str | None = None
+    ) -> str:
+        """
+        `model` overrides the backend's default model for this call.
+        """
+        raise NotImplementedError
+
+    async def generate_with_usage(
+        self, full_prompt: str, temperature: float, max_tokens: int, model: str | None = None
+    ) -> Tuple[str, Dict[str, int] | None]:
+        """
+        Like generate, plus the provider-reported token counts
+        ({"prompt_tokens", "completion_tokens"}) or None when unknown.
+        """
+        return await self.generate(full_prompt, temperature, max_tokens, model), None
+
+    async def stream(
+        self, full_prompt: str, temperature: float, max_tokens: int, model: str | None = None
+    ) -> AsyncIterator[str]:
+        raise NotImplementedError
+        yield  # pragma: no cover
+
+
+# -----------------------------
+# Google Gemini
+# -----------------------------
+
+class GeminiBackend(LLMBackend):
+    name = "gemini"
+    retryable_errors = (
+        google_exceptions.TooManyRequests,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.InternalServerError,
+        google_exceptions.DeadlineExceeded,
+    )
+
+    def __init__(self, api_key: str | None, model_name: str):
+        self.model_name = model_name
+        # Other models used by routing, created on first use
+        self._models: Dict[str, Any] = {}
+        if api_key:
+            genai.configure(api_key=api_key)
+            self.model = genai.GenerativeModel(model_name)
+        else:
+            self.model = None
+
+    @property
+    def available(self) -> bool:
+        return self.model is not None
+
+    def _model_for(self, model: str | None) -> Any:
+        if not model or model == self.model_name:
+            return self.model
+        if model not in self._models:
+            self._models[model] = genai.GenerativeModel(model)
+        return self._models[model]
+
+    async def generate(
+        self, full_prompt: str, temperature: float, max_tokens: int, model: str | None = None
+    ) -> str:
+        text, _ = await self.generate_with_usage(full_prompt, temperature, max_tokens, model)
+        return text
+
+    async def generate_with_usage(
+        self, full_prompt: str, temperature: float, max_tokens: int, model: str | None = None
+    ) -> Tuple[str, Dict[str, int] | None]:
+        response = await self._model_for(model).generate_content_async(
+            full_prompt,
+            generation_config=genai.GenerationConfig(
+                temperature=temperature,
+                max_output_tokens=max_tokens,
+            )
+        )
+        return response.text, self._usage(response)
+
+    @staticmethod
+    def _usage(response: Any) -> Dict[str, int] | None:
+        metadata = getattr(response, "usage_metadata", None)
+        if metadata is None:
+            return None
+        prompt_tokens = getattr(metadata, "prompt_token_count", None)
+        completion_tokens = getattr(metadata, "candidates_token_count", None)
+        if prompt_tokens is None and completion_tokens is None:
+            return None
+        return {"prompt_tokens": int(prompt_tokens or 0), "completion_tokens": int(completion_tokens or 0)}
+
+    async def stream(
+        self, full_prompt: str, temperature: float, max_tokens: int, model: str | None = None
+    ) -> AsyncIterator[str]:
+        response = await self._model_for(model).generate_content_async(
+            full_prompt,
+            generation_config=genai.GenerationConfig(
+                temperature=temperature,
+                max_output_tokens=max_tokens,
+            ),
+            stream=True
+        )
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+# -----------------------------
+# Offline fake (load tests / benchmarks)
+# -----------------------------
+
+class FakeLLMError(Exception):
+    """
+    Injected provider failure; retryable like a 429/503.
+    """
+
+
+class FakeLLMBackend(LLMBackend):
+    """
+    Deterministic offline backend.
+
+    Responses are schema-valid JSON for whichever agent built the prompt and
+    are derived only from the prompt text, so the same prompt always gets the
+    same answer. Latency and failures are sampled from a seeded RNG:
+    - "fixed": always latency_ms
+    - "lognormal": median latency_ms, shape sigma
+    - "recorded": samples from a file of millisecond values, one per line
+    """
+    name = "fake"
+    retryable_errors = (FakeLLMError,)
+
+    def __init__(
+        self,
+        latency: str = "fixed",
+        latency_ms: float = 50.0,
+        sigma: float = 0.5,
+        recorded_path: str | None = None,
+        error_rate: float = 0.0,
+        seed: int | None = None,
+    ):
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._recorded: List[float] = []
+        if latency == "recorded":
+            if not recorded_path:
+                raise ValueError("LLM_FAKE_LATENCY=recorded requires LLM_FAKE_LATENCY_FILE")
+            with open(recorded_path, encoding="utf-8") as f:
+                self._recorded = [float(line) for line in f if line.strip()]
+            if not self._recorded:
+                raise ValueError(f"No latency samples in {recorded_path}")
+
+    def sample_latency(self) -> float:
+        """
+        Latency for one call, in seconds.
+        """
+        if self.latency == "lognormal":
+            ms = self._rng.lognormvariate(math.log(max(self.latency_ms, 0.001)), self.sigma)
+        elif self.latency == "recorded":
+            ms = self._rng.choice(self._recorded)
+        else:
+            ms = self.latency_ms
+        return ms / 1000.0
+
+    async def generate(
+        self, full_prompt: str, temperature: float, max_tokens: int, model: str | None = None
+    ) -> str:
+        await asyncio.sleep(self.sample_latency())
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise FakeLLMError("Injected fake LLM failure")
+        return fake_response(full_prompt)
+
+    async def stream(
+        self, full_prompt: str, temperature: float, max_tokens: int, model: str | None = None
+    ) -> AsyncIterator[str]:
+        text = await self.generate(full_prompt, temperature, max_tokens, model)
+        step = 64
+        for i in range(0, len(text), step):
+            await asyncio.sleep(0)
+            yield text[i:i + step]
+
+
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z\-]{3,}")
+_STOPWORDS = {
+    "this", "that", "with", "from", "have", "what", "when", "then", "than", "there", "their",
+    "about", "would", "could", "should", "which", "where", "while", "because", "these", "those",
+    "user", "assistant", "just", "like", "really", "think", "know", "into", "also", "does",
+}
+
+
+def _discussion(prompt: str) -> List[str]:
+    """
+    Transcript lines between the ---------------- markers agents use.
+    """
+    parts = prompt.split("----------------")
+    body = parts[1] if len(parts) >= 3 else prompt
+    return [line for line in body.strip().splitlines() if line.strip()]
+
+
+def _speakers(lines: List[str]) -> List[str]:
+    speakers = []
+    for line in lines:
+        match = re.match(r"\[[^\]]*\]\s*([^:]+):", line)
+        if match and match.group(1).strip() not in speakers:
+            speakers.append(match.group(1).strip())
+    return speakers
+
+
+def _topics(lines: List[str], n: int = 3) -> List[str]:
+    words = Counter(
+        w.lower() for line in lines for w in _WORD_RE.findall(line.split(":", 1)[-1])
+        if w.lower() not in _STOPWORDS
+    )
+    topics = [w.capitalize() for w, _ in sorted(words.items(), key=lambda kv: (-kv[1], kv[0]))[:n]]
+    return topics or ["General Study"]
+
+
+def _section(kind: str, lines: List[str], seed: int) -> Dict[str, Any]:
+    topics = _topics(lines)
+    speakers = _speakers(lines) or ["anonymous"]
+    first = topics[0]
+
+    if kind == "summary":
+        return {
+            "topics_covered": topics,
+            "key_concepts": [{"concept": t, "definition": f"Discussion of {t.lower()}."} for t in topics],
+            "important_explanations": [f"The group explained {first.lower()} step by step."],
+            "action_items": [f"Review {t.lower()}" for t in topics[:2]],
+            "revision_notes": [f"{t}: revisit the examples from the session." for t in topics],
+            "skills_identified": [{"name": "Communication", "level": 1 + seed % 5}],
+        }
+    if kind == "decision":
+        return {
+            "final_decisions": [f"Focus next on {first.lower()}"],
+            "agreements": [f"{first} is a core topic"],
+            "disagreements": [],
+            "open_questions": [f"How does {topics[-1].lower()} apply in practice?"],
+        }
+    if kind == "gap":
+        return {
+            "conceptual_gaps": [f"{topics[-1]} fundamentals"],
+            "misunderstandings": [],
+            "missing_prerequisites": [],
+            "uncertain_topics": topics[1:2],
+        }
+    if kind == "skill":
+        return {
+            "participant_skills": [
+                {"user_id": s, "skills": ["Communication", "Critical thinking"][: 1 + (seed + i) % 2]}
+                for i, s in enumerate(speakers)
+            ]
+        }
+    # quiz
+    return {
+        "mcqs": [
+            {
+                "question": f"Which statement about {t.lower()} is correct?",
+                "options": ["A", "B", "C", "D"],
+                "correct_answer": "ABCD"[(seed + i) % 4],
+                "explanation": f"Covered while discussing {t.lower()}.",
+            }
+            for i, t in enumerate(topics)
+        ],
+        "flashcards": [{"front": t, "back": f"Definition of {t.lower()}."} for t in topics],
+        "short_questions": [{"question": f"Explain {first.lower()}.", "ideal_answer": f"{first} is ..."}],
+    }
+
+
+def _translate_fake(prompt: str) -> str:
+    """
+    Echo the content back with string leaves marked, keeping the structure.
+    """
+    match = re.search(r"into (.+?)\.", prompt)
+    language = match.group(1).strip() if match else "Target"
+    content = prompt.split("Content to translate:", 1)[-1].strip()
+
+    def mark(value: Any) -> Any:
+        if isinstance(value, str):
+            return f"[{language}] {value}"
+        if isinstance(value, list):
+            return [mark(v) for v in value]
+        if isinstance(value, dict):
+            return {k: mark(v) for k, v in value.items()}
+        return value
+
+    for loader in (json.loads, ast.literal_eval):
+        try:
+            return json.dumps(mark(loader(content)), ensure_ascii=False)
+        except Exception:
+            continue
+    return json.dumps({"text": f"[{language}] {content}"}, ensure_ascii=False)
+
+
+def _translate_batch_fake(prompt: str) -> str:
+    """
+    Echo a "Strings to translate:" batch back with each value marked.
+    """
+    match = re.search(r"JSON object into (.+?)\.", prompt)
+    language = match.group(1).strip() if match else "Target"
+    try:
+        strings = json.loads(prompt.split("Strings to translate:", 1)[-1].strip())
+    except Exception:
+        return "{}"
+    return json.dumps({k: f"[{language}] {v}" for k, v in strings.items()}, ensure_ascii=False)
+
+
+def fake_response(full_prompt: str) -> str:
+    """
+    Schema-valid JSON for the agent that produced `full_prompt`.
+    """
+    seed = int(hashlib.sha256(full_prompt.encode("utf-8")).hexdigest()[:8], 16)
+
+    if "Strings to translate:" in full_prompt:
+        return _translate_batch_fake(full_prompt)
+    if "Content to translate:" in full_prompt:
+        return _translate_fake(full_prompt)
+
+    lines = _discussion(full_prompt)
+    if 'Section "summary"' in full_prompt:
+        return json.dumps({
+            kind: _section(kind, lines, seed)
+            for kind in ("summary", "decision", "gap", "skill", "quiz")
+            if f'Section "{kind}"' in full_prompt
+        })
+
+    markers = {
+        "topics_covered": "summary",
+        "final_decisions": "decision",
+        "conceptual_gaps": "gap",
+        "participant_skills": "skill",
+        "mcqs": "quiz",
+    }
+    for marker, kind in markers.items():
+        if f'"{marker}"' in full_prompt:
+            return json.dumps(_section(kind, lines, seed))
+    return json.dumps({"response": "ok"})
+
+
+def create_backend() -> LLMBackend:
+    """
+    Pick the backend from settings: LLM_BACKEND, or an LLM_MODEL starting with "fake".
+    """
+    backend = settings.LLM_BACKEND.lower()
+    if backend == "fake" or settings.LLM_MODEL.lower().startswith("fake"):
+        return FakeLLMBackend(
+            latency=settings.LLM_FAKE_LATENCY,
+            latency_ms=settings.LLM_FAKE_LATENCY_MS,
+            sigma=settings.LLM_FAKE_LATENCY_SIGMA,
+            recorded_path=settings.LLM_FAKE_LATENCY_FILE,
+            error_rate=settings.LLM_FAKE_ERROR_RATE,
+            seed=settings.LLM_FAKE_SEED,
+        )
+    if backend != "gemini":
+        raise ValueError(f"Unknown LLM_BACKEND '{settings.LLM_BACKEND}'")
+    return GeminiBackend(settings.GEMINI_API_KEY, settings.LLM_MODEL)
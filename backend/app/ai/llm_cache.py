@@ -0,0 +1,252 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def make_cache_key(
+    model: str,
+    system_prompt: str,
+    prompt: str,
+    temperature: float,
+    max_tokens: int,
+) -> str:
+    """
+    Content-addressed key for an LLM call.
+    Every input that can change the output goes into the hash.
+    """
+    payload = json.dumps(
+        [model, system_prompt, prompt, round(float(temperature), 4), int(max_tokens)],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Two-tier cache for LLM responses.
+
+    Tier 1 is a bounded in-memory LRU with a TTL.
+    Tier 2 is an optional SQLite file so cached answers survive restarts.
+
+    Async callers use aget()/aset(): the memory tier is answered inline and
+    disk reads and writes run in a worker thread, off the event loop.
+    Expired disk rows are purged at most once per `purge_interval_seconds`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: int = 3600,
+        db_path: str | None = None,
+        purge_interval_seconds: float = 300.0,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self.purge_interval_seconds = purge_interval_seconds
+
+        # key -> (expires_at, response)
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Disk access has its own lock so memory hits never wait on SQLite
+        self._disk_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._next_purge = 0.0
+
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "writes": 0,
+            "evictions": 0,
+        }
+
+        if db_path:
+            self._open_db(db_path)
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response. Returns None on miss or expiry.
+        """
+        response = self._memory_get(key, time.time())
+        if response is not None:
+            return response
+        return self._disk_lookup(key)
+
+    def set(self, key: str, response: str) -> None:
+        """
+        Store a response in both tiers.
+        """
+        now = time.time()
+        self._memory_store(key, response, now)
+        self._disk_put(key, response, now)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """
+        get() for the event loop: only a memory miss goes to a thread.
+        """
+        response = self._memory_get(key, time.time())
+        if response is not None:
+            return response
+        if self._db is None:
+            return self._disk_lookup(key)
+        return await asyncio.to_thread(self._disk_lookup, key)
+
+    async def aset(self, key: str, response: str) -> None:
+        """
+        set() for the event loop: the disk write runs in a thread.
+        """
+        now = time.time()
+        self._memory_store(key, response, now)
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_put, key, response, now)
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self._stats["bypassed"] += 1
+
+    def clear(self) -> None:
+        """
+        Drop every cached response (memory and disk).
+        """
+        with self._lock:
+            self._memory.clear()
+        with self._disk_lock:
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM llm_cache")
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    print(f"Error clearing LLM cache: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters for monitoring.
+        """
+        with self._lock:
+            hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+            lookups = hits + self._stats["misses"]
+            return {
+                **self._stats,
+                "hits": hits,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "persistent": self._db is not None,
+            }
+
+    # -----------------------------
+    # Memory tier
+    # -----------------------------
+
+    def _memory_get(self, key: str, now: float) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires_at, response = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return response
+            del self._memory[key]
+            return None
+
+    def _memory_store(self, key: str, response: str, now: float) -> None:
+        with self._lock:
+            self._memory_put(key, response, now)
+            self._stats["writes"] += 1
+
+    def _memory_put(self, key: str, response: str, now: float) -> None:
+        self._memory[key] = (now + self.ttl_seconds, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    # -----------------------------
+    # Disk tier
+    # -----------------------------
+
+    def _open_db(self, db_path: str) -> None:
+        try:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY,"
+                " response TEXT NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_cache_expires ON llm_cache (expires_at)"
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Error opening LLM cache database: {e}")
+            self._db = None
+
+    def _disk_lookup(self, key: str) -> Optional[str]:
+        """
+        Second-tier lookup after a memory miss; a hit is promoted to memory.
+        """
+        now = time.time()
+        response = self._disk_get(key, now)
+        with self._lock:
+            if response is None:
+                self._stats["misses"] += 1
+                return None
+            self._memory_put(key, response, now)
+            self._stats["disk_hits"] += 1
+            return response
+
+    def _disk_get(self, key: str, now: float) -> Optional[str]:
+        if self._db is None:
+            return None
+        with self._disk_lock:
+            return self._disk_get_locked(key, now)
+
+    def _disk_get_locked(self, key: str, now: float) -> Optional[str]:
+        try:
+            row = self._db.execute(
+                "SELECT response, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            response, expires_at = row
+            if expires_at <= now:
+                self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            return response
+        except sqlite3.Error as e:
+            print(f"Error reading LLM cache: {e}")
+            return None
+
+    def _disk_put(self, key: str, response: str, now: float) -> None:
+        if self._db is None:
+            return
+        with self._disk_lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, response, expires_at) VALUES (?, ?, ?)",
+                    (key, response, now + self.ttl_seconds),
+                )
+                if now >= self._next_purge:
+                    # Expired rows are also skipped on read, so purging is only housekeeping
+                    self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+                    self._next_purge = now + self.purge_interval_seconds
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"Error writing LLM cache: {e}")
@@ -1,52 +1,240 @@
-import google.generativeai as genai
+import asyncio
+import random
+import time
+from google.api_core import exceptions as google_exceptions
+from typing import Any, AsyncIterator, Dict, Tuple
 from app.config import settings
+from app.ai.llm_backends import LLMBackend, create_backend
+from app.ai.llm_cache import LLMResponseCache, make_cache_key
+from app.ai.metrics import Counters, LatencyStats
+from app.ai.rate_limiter import LLMRateLimiter
+from app.ai.tokens import estimate_tokens
+from app.ai.usage import UsageMeter, current_scope
 
 class LLMClient:
     """
     Standardized client for interacting with Large Language Models.
-    Updated for Google Gemini API.
+    The provider call itself is delegated to a pluggable backend
+    (Google Gemini by default, or the offline fake for load testing).
     """
-    def __init__(self):
+    def __init__(self, backend: LLMBackend | None = None):
         self.api_key = settings.GEMINI_API_KEY
         self.model_name = settings.LLM_MODEL
         self.temperature = settings.LLM_TEMPERATURE
-        
-        if self.api_key:
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel(self.model_name)
-        else:
-            self.model = None
+        self.backend = backend or create_backend()
+
+        # Content-addressed response cache (memory LRU + optional SQLite file)
+        self.cache = None
+        if settings.LLM_CACHE_ENABLED:
+            self.cache = LLMResponseCache(
+                max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+                db_path=settings.LLM_CACHE_DB_PATH,
+            )
+
+        # Admission control shared by every caller of this client (one client
+        # per process, see app/dependencies.py); each uvicorn worker takes its
+        # share of the host-wide limits
+        workers = settings.worker_count
+        self.limiter = LLMRateLimiter(
+            max_concurrency=max(1, settings.LLM_MAX_CONCURRENCY // workers),
+            requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE / workers,
+            tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE / workers,
+            weights=settings.LLM_PRIORITY_WEIGHTS,
+            reserved_slots=settings.LLM_INTERACTIVE_RESERVED_SLOTS,
+        )
+        self.queue_wait = LatencyStats()
+        self.call_time = LatencyStats()
+        self.counters = Counters()
+        # Tokens spent, attributed to the caller's usage_scope (app/ai/usage.py)
+        self.usage = UsageMeter(max_keys=settings.USAGE_MAX_KEYS, db_path=settings.USAGE_DB_PATH)
+
+    @property
+    def model(self) -> Any:
+        """
+        The underlying Gemini model, or None when the Gemini backend has no API key.
+        Other backends expose themselves here so `if client.model` checks keep working.
+        """
+        if not self.backend.available:
+            return None
+        return getattr(self.backend, "model", self.backend)
 
     async def generate_response(
-        self, 
-        prompt: str, 
+        self,
+        prompt: str,
         system_prompt: str = "You are a helpful assistant.",
         temperature: float | None = None,
-        max_tokens: int = 2000
+        max_tokens: int = 2000,
+        use_cache: bool = True,
+        model: str | None = None
     ) -> str:
         """
         Generate a text response from the LLM.
+        Pass use_cache=False to force a fresh generation.
+        `model` overrides settings.LLM_MODEL for this call (see app/ai/routing.py).
         """
-        if not self.model:
+        if not self.backend.available:
             return "Error: Gemini API Key not configured."
 
+        temperature = temperature or self.temperature
+
+        cache_key = None
+        if self.cache is not None:
+            if use_cache:
+                cache_key = make_cache_key(
+                    model or self.model_name, system_prompt, prompt, temperature, max_tokens
+                )
+                cached = await self.cache.aget(cache_key)
+                if cached is not None:
+                    return cached
+            else:
+                self.cache.record_bypass()
+
         try:
             # Gemini handles system prompts by prepending to user message
             # or via model configuration
             full_prompt = f"{system_prompt}\n\n{prompt}"
-            
-            # Configure generation parameters
-            generation_config = genai.GenerationConfig(
-                temperature=temperature or self.temperature,
-                max_output_tokens=max_tokens,
-            )
-            
-            # Generate response
-            response = await self.model.generate_content_async(
-                full_prompt,
-                generation_config=generation_config
-            )
-            
-            return response.text
+            text, usage = await self._generate_with_retries(full_prompt, temperature, max_tokens, model)
         except Exception as e:
+            # Errors are never cached
+            self.counters.incr("failures")
             return f"Error communicating with LLM: {str(e)}"
+
+        self._record_usage(full_prompt, text, usage)
+        if cache_key is not None:
+            await self.cache.aset(cache_key, text)
+        return text
+
+    async def stream_response(
+        self,
+        prompt: str,
+        system_prompt: str = "You are a helpful assistant.",
+        temperature: float | None = None,
+        max_tokens: int = 2000,
+        use_cache: bool = True,
+        model: str | None = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a response as text chunks as the provider produces them.
+        A cached response is yielded in one piece. Streams are not retried;
+        a failure is yielded as the usual error string.
+        """
+        if not self.backend.available:
+            yield "Error: Gemini API Key not configured."
+            return
+
+        temperature = temperature or self.temperature
+
+        cache_key = None
+        if self.cache is not None:
+            if use_cache:
+                cache_key = make_cache_key(
+                    model or self.model_name, system_prompt, prompt, temperature, max_tokens
+                )
+                cached = await self.cache.aget(cache_key)
+                if cached is not None:
+                    yield cached
+                    return
+            else:
+                self.cache.record_bypass()
+
+        full_prompt = f"{system_prompt}\n\n{prompt}"
+
+        queued_at = time.monotonic()
+        slot = await self.limiter.acquire(estimate_tokens(full_prompt), flow=current_scope().get("session"))
+        started_at = time.monotonic()
+        self.queue_wait.observe(started_at - queued_at)
+
+        parts = []
+        try:
+            self.counters.incr("calls")
+            async for text in self.backend.stream(full_prompt, temperature, max_tokens, model):
+                parts.append(text)
+                yield text
+        except Exception as e:
+            self.counters.incr("failures")
+            yield f"Error communicating with LLM: {str(e)}"
+            return
+        finally:
+            self.call_time.observe(time.monotonic() - started_at)
+            self.limiter.release(slot)
+
+        self._record_usage(full_prompt, "".join(parts), None)
+        if cache_key is not None:
+            await self.cache.aset(cache_key, "".join(parts))
+
+    async def _generate_with_retries(
+        self,
+        full_prompt: str,
+        temperature: float,
+        max_tokens: int,
+        model: str | None = None
+    ) -> Tuple[str, Dict[str, int] | None]:
+        """
+        Call the backend under the rate limiter (at the caller's priority,
+        fair-shared per session), retrying transient errors with exponential
+        backoff and full jitter until LLM_RETRY_DEADLINE_SECONDS.
+        Returns the text and the provider-reported usage, if any.
+        """
+        retryable = self.backend.retryable_errors + (asyncio.TimeoutError,)
+        estimated_tokens = estimate_tokens(full_prompt)
+        flow = current_scope().get("session")
+        deadline = time.monotonic() + settings.LLM_RETRY_DEADLINE_SECONDS
+        attempt = 0
+
+        while True:
+            queued_at = time.monotonic()
+            slot = await self.limiter.acquire(estimated_tokens, flow=flow)
+            started_at = time.monotonic()
+            self.queue_wait.observe(started_at - queued_at)
+
+            try:
+                self.counters.incr("calls")
+                return await asyncio.wait_for(
+                    self.backend.generate_with_usage(full_prompt, temperature, max_tokens, model),
+                    timeout=max(deadline - started_at, 0.001),
+                )
+            except retryable as e:
+                if isinstance(e, google_exceptions.TooManyRequests):
+                    self.counters.incr("rate_limited")
+                delay = random.uniform(
+                    0,
+                    min(
+                        settings.LLM_RETRY_MAX_DELAY_SECONDS,
+                        settings.LLM_RETRY_BASE_DELAY_SECONDS * (2 ** attempt),
+                    ),
+                )
+                if attempt >= settings.LLM_MAX_RETRIES or time.monotonic() + delay >= deadline:
+                    raise
+            finally:
+                self.call_time.observe(time.monotonic() - started_at)
+                self.limiter.release(slot)
+
+            # Back off without holding a concurrency slot
+            self.counters.incr("retries")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _record_usage(self, full_prompt: str, text: str, usage: Dict[str, int] | None) -> None:
+        """
+        Meter a completed call; estimates the counts when the provider gave none.
+        """
+        if usage is not None:
+            self.usage.record(usage["prompt_tokens"], usage["completion_tokens"])
+        else:
+            self.usage.record(estimate_tokens(full_prompt), estimate_tokens(text), estimated=True)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Runtime counters for the LLM layer.
+        """
+        return {
+            "backend": self.backend.name,
+            "model": self.model_name,
+            "cache": self.cache.stats() if self.cache is not None else {"enabled": False},
+            "limiter": self.limiter.stats(),
+            "queue_wait": self.queue_wait.snapshot(),
+            "call_time": self.call_time.snapshot(),
+            "counters": self.counters.snapshot(),
+            "usage": self.usage.stats(),
+        }
@@ -0,0 +1,63 @@
+import threading
+from collections import deque
+from typing import Any, Dict
+
+
+class LatencyStats:
+    """
+    Running latency summary: count/total/max over all samples and
+    percentiles over a bounded window of the most recent ones.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._recent: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+            self._recent.append(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            recent = sorted(self._recent)
+            count, total, max_seconds = self.count, self.total, self.max
+
+        def percentile(p: float) -> float:
+            if not recent:
+                return 0.0
+            index = min(len(recent) - 1, int(round(p * (len(recent) - 1))))
+            return round(recent[index], 4)
+
+        return {
+            "count": count,
+            "avg_seconds": round(total / count, 4) if count else 0.0,
+            "p50_seconds": percentile(0.50),
+            "p95_seconds": percentile(0.95),
+            "p99_seconds": percentile(0.99),
+            "max_seconds": round(max_seconds, 4),
+        }
+
+
+class Counters:
+    """
+    Thread-safe named counters.
+    """
+
+    def __init__(self):
+        self._values: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._values)
@@ -1,12 +1,28 @@
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, List
 import asyncio
+import time
+from app.config import settings
 from app.ai.llm_client import LLMClient
+from app.ai.metrics import Counters, LatencyStats
+from app.ai.routing import create_routing_policy
+from app.ai.tokens import estimate_tokens
+from app.ai.pipeline import Pipeline
+from app.ai.json_repair import PARSE_FAILED
+from app.ai.agents.base_agent import BaseAgent
+from app.ai.result_cache import AgentResultCache
+from app.ai.translation_memory import TranslationMemory, collect_strings, replace_strings
+from app.ai.transcript import Transcript
+from app.ai.usage import usage_scope
 from app.ai.agents.summary_agent import SummaryAgent
 from app.ai.agents.decision_agent import DecisionAgent
 from app.ai.agents.gap_agent import GapAgent
 from app.ai.agents.skill_agent import SkillAgent
 from app.ai.agents.quiz_agent import QuizAgent
 from app.ai.agents.language_agent import LanguageAgent
+from app.ai.agents.consolidated_agent import ConsolidatedAgent
+
+# Agents that make up a full session analysis
+ANALYSIS_AGENTS = ["summary", "decision", "gap", "skill", "quiz"]
 
 class AIOrchestrator:
     """
@@ -22,57 +38,561 @@ class AIOrchestrator:
             "quiz": QuizAgent(),
             "language": LanguageAgent()
         }
+        self.consolidated_agent = ConsolidatedAgent(
+            {name: self.agents[name] for name in ANALYSIS_AGENTS}
+        )
+        # Finished (and still running) agent results per transcript version
+        self.results = AgentResultCache(
+            max_entries=settings.ANALYSIS_RESULT_CACHE_ENTRIES,
+            ttl_seconds=settings.ANALYSIS_RESULT_CACHE_TTL_SECONDS
+        )
+        self.translations = TranslationMemory(
+            max_entries=settings.TRANSLATION_MEMORY_MAX_ENTRIES,
+            db_path=settings.TRANSLATION_MEMORY_DB_PATH
+        )
+        # "<agent>.<ok|repaired|reasked|failed>" per parsed response
+        self.parse_stats = Counters()
+        # Model / output budget per agent call, and latency + volume per route
+        self.routing = create_routing_policy()
+        self.route_latency: Dict[str, LatencyStats] = {}
+        self.route_stats = Counters()
+        self.route_models: Dict[str, str | None] = {}
+        # Incremental re-analysis: "updates" (delta prompts) and "fallbacks" (full re-runs)
+        self.delta_stats = Counters()
 
     async def analyze_session(
-        self, 
-        messages: List[Dict[str, Any]], 
-        target_language: str = "English"
+        self,
+        messages: List[Dict[str, Any]],
+        target_language: str = "English",
+        consolidated: bool | None = None,
+        transcript: Transcript | None = None,
+        previous: Dict[str, Dict[str, Any]] | None = None,
+        delta: Transcript | None = None
     ) -> Dict[str, Any]:
         """
         Run all analysis agents in parallel and aggregate results.
+        Agents that miss their deadline are listed in "pending_agents" and the
+        result is marked "partial"; a later call for the same transcript picks
+        up their results from self.results.
+        With consolidated=True (default: settings.ANALYSIS_CONSOLIDATED_MODE) a single
+        combined prompt is sent instead, falling back to per-agent calls on parse failure.
+        Pass the session's `transcript` to reuse its rendered text; otherwise
+        `messages` are rendered once here and shared by every agent.
+        With `previous` (per-agent results for an earlier version of the
+        transcript, see split_results) and `delta` (the messages added since,
+        from Transcript.since), agents update their previous result from the
+        new messages instead of re-reading the whole transcript.
         """
-        if not messages:
+        if transcript is None:
+            transcript = Transcript(messages)
+        if not len(transcript):
             return {"error": "No messages to analyze"}
 
-        # Task list for parallel execution
-        tasks = [
-            self._run_agent("summary", messages),
-            self._run_agent("decision", messages),
-            self._run_agent("gap", messages),
-            self._run_agent("skill", messages),
-            self._run_agent("quiz", messages)
-        ]
-
-        results = await asyncio.gather(*tasks)
-        
+        if consolidated is None:
+            consolidated = settings.ANALYSIS_CONSOLIDATED_MODE
+
+        started_at = time.monotonic()
+        fingerprint = transcript.fingerprint
+
+        # Reuse results an earlier request already produced for this transcript
+        results: Dict[str, Dict[str, Any]] = {}
+        for agent_name in ANALYSIS_AGENTS:
+            cached = self.results.get(fingerprint, agent_name)
+            if cached is not None:
+                results[agent_name] = cached
+
+        missing = [name for name in ANALYSIS_AGENTS if name not in results]
+        if consolidated and previous is None and len(missing) == len(ANALYSIS_AGENTS):
+            generation = self._generation(transcript)
+            sections = await self._run_consolidated(transcript)
+            for agent_name, section in sections.items():
+                self.results.set(fingerprint, agent_name, section, transcript.session_id, generation)
+            results.update(sections)
+
+        # Remaining agents run in parallel, each bounded by its own and the overall deadline.
+        # Agents that miss it keep running in the background and land in self.results.
+        # A non-English request translates each agent's output as soon as that agent is done.
+        translate = target_language.lower() != "english"
+        pipeline = self._analysis_pipeline(results, transcript, target_language if translate else None, previous, delta)
+        finished, timed_out = await self._wait_with_deadlines(pipeline.start(), started_at, pipeline)
+
         # Combine results
         analysis = {}
-        for res in results:
-            analysis.update(res)
+        for agent_name in ANALYSIS_AGENTS:
+            analysis.update(finished.get(agent_name, {}))
 
-        # If language is not English, translate the combined results
-        if target_language.lower() != "english":
-            translation = await self._run_translation(analysis, target_language)
-            analysis["translated"] = translation
+        pending = {name: "timed_out" for name in timed_out if name in ANALYSIS_AGENTS}
+        if translate:
+            translated = {}
+            for agent_name in ANALYSIS_AGENTS:
+                translated.update(finished.get(f"{agent_name}.translation", {}))
+            analysis["translated"] = translated
+            if any(name.endswith(".translation") for name in timed_out):
+                pending["translation"] = "timed_out"
+
+        if pending:
+            analysis["pending_agents"] = pending
+            analysis["partial"] = True
 
         return analysis
 
-    async def _run_agent(self, agent_name: str, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _analysis_pipeline(
+        self,
+        cached: Dict[str, Dict[str, Any]],
+        transcript: Transcript,
+        target_language: str | None,
+        previous: Dict[str, Dict[str, Any]] | None = None,
+        delta: Transcript | None = None
+    ) -> Pipeline:
+        """
+        One step per analysis agent (already cached results complete at once)
+        and, with a target_language, an "<agent>.translation" step after each.
+        """
+        pipeline = Pipeline()
+        for agent_name in ANALYSIS_AGENTS:
+            if agent_name in cached:
+                pipeline.add(agent_name, self._constant(cached[agent_name]))
+            else:
+                pipeline.add(agent_name, lambda inputs, name=agent_name: asyncio.shield(
+                    self._agent_task(name, transcript, (previous or {}).get(name), delta)
+                ))
+            if target_language is not None:
+                pipeline.add(
+                    f"{agent_name}.translation",
+                    lambda inputs, name=agent_name: self._translate_result(name, inputs[name], target_language),
+                    after=[agent_name]
+                )
+        return pipeline
+
+    @staticmethod
+    def _constant(value: Any):
+        async def run(inputs: Dict[str, Any]) -> Any:
+            return value
+        return run
+
+    async def _translate_result(self, agent_name: str, result: Dict[str, Any], target_language: str) -> Dict[str, Any]:
+        # Nothing worth translating in a failed result
+        if self.agents[agent_name].is_failed_result(result):
+            return result
+        return await self._run_translation(result, target_language)
+
+    def _agent_task(
+        self,
+        agent_name: str,
+        transcript: Transcript,
+        previous: Dict[str, Any] | None = None,
+        delta: Transcript | None = None
+    ) -> asyncio.Task:
+        """
+        Start an agent run for this transcript, or join the one already running.
+        Successful results are stored in self.results when the run finishes.
+        """
+        fingerprint = transcript.fingerprint
+        task = self.results.inflight(fingerprint, agent_name)
+        if task is not None:
+            return task
+
+        generation = self._generation(transcript)
+
+        async def run() -> Dict[str, Any]:
+            if previous is not None and delta is not None:
+                result = await self._run_agent_delta(agent_name, transcript, previous, delta)
+            else:
+                result = await self._run_agent(agent_name, transcript)
+            if not self.agents[agent_name].is_failed_result(result):
+                self.results.set(fingerprint, agent_name, result, transcript.session_id, generation)
+            return result
+
+        task = asyncio.ensure_future(run())
+        self.results.track(fingerprint, agent_name, task)
+        return task
+
+    def _generation(self, transcript: Transcript) -> int | None:
+        if transcript.session_id is None:
+            return None
+        return self.results.generation(transcript.session_id)
+
+    def _agent_timeout(self, agent_name: str) -> float | None:
+        # Pipeline steps other than agents (translations) only have the overall budget
+        if agent_name not in ANALYSIS_AGENTS:
+            return None
+        timeout = settings.ANALYSIS_AGENT_TIMEOUTS.get(agent_name, settings.ANALYSIS_AGENT_TIMEOUT_SECONDS)
+        return timeout if timeout and timeout > 0 else None
+
+    def _remaining_budget(self, started_at: float) -> float | None:
+        if not settings.ANALYSIS_TOTAL_TIMEOUT_SECONDS or settings.ANALYSIS_TOTAL_TIMEOUT_SECONDS <= 0:
+            return None
+        return max(0.0, started_at + settings.ANALYSIS_TOTAL_TIMEOUT_SECONDS - time.monotonic())
+
+    async def _wait_with_deadlines(
+        self,
+        tasks: Dict[str, asyncio.Task],
+        started_at: float,
+        pipeline: Pipeline | None = None
+    ) -> tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """
+        Wait for agent (and translation) tasks until each one's deadline
+        (per-agent timeout, capped by the overall budget). Returns (results
+        of finished tasks, names of tasks that timed out).
+
+        A task that misses its deadline is cancelled together with the
+        pipeline steps that depend on it (its translation), since nothing
+        reads their results any more. Agent runs are shielded, so the agent
+        itself still finishes in the background and lands in self.results.
+        """
+        total = self._remaining_budget(started_at)
+        deadlines: Dict[str, float | None] = {}
+        for agent_name in tasks:
+            limits = [t for t in (self._agent_timeout(agent_name), total) if t is not None]
+            deadlines[agent_name] = started_at + min(limits) if limits else None
+
+        finished: Dict[str, Dict[str, Any]] = {}
+        timed_out: List[str] = []
+        waiting = dict(tasks)
+
+        while waiting:
+            for agent_name, task in list(waiting.items()):
+                if agent_name not in waiting:
+                    # Cancelled above with the step it depends on
+                    continue
+                if task.done():
+                    finished[agent_name] = task.result()
+                    del waiting[agent_name]
+                elif deadlines[agent_name] is not None and time.monotonic() >= deadlines[agent_name]:
+                    abandoned = [agent_name] + (pipeline.dependents(agent_name) if pipeline else [])
+                    for name in abandoned:
+                        if name in waiting:
+                            waiting.pop(name).cancel()
+                            timed_out.append(name)
+            if not waiting:
+                break
+
+            pending_deadlines = [deadlines[n] for n in waiting if deadlines[n] is not None]
+            timeout = max(0.0, min(pending_deadlines) - time.monotonic()) if pending_deadlines else None
+            await asyncio.wait(set(waiting.values()), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+        return finished, timed_out
+
+    async def stream_session(
+        self,
+        messages: List[Dict[str, Any]],
+        target_language: str = "English",
+        transcript: Transcript | None = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run all analysis agents in parallel and yield events as they complete:
+        - {"event": "summary_delta", "data": {"text": ...}} while the summary streams
+        - {"event": "agent", "data": {"agent": name, "result": {...}}} per finished agent
+        - {"event": "translation", "data": {...}} once everything is done (non-English only);
+          each agent's part is translated as soon as that agent finishes
+        """
+        if transcript is None:
+            transcript = Transcript(messages)
+        if not len(transcript):
+            yield {"event": "error", "data": {"error": "No messages to analyze"}}
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        fingerprint = transcript.fingerprint
+        translate = target_language.lower() != "english"
+        translated: Dict[str, Dict[str, Any]] = {}
+
+        async def run(agent_name: str) -> None:
+            result = None
+            try:
+                result = self.results.get(fingerprint, agent_name)
+                if result is None and agent_name == "summary":
+                    generation = self._generation(transcript)
+                    result = await self._stream_summary(transcript, queue)
+                    if not self.agents["summary"].is_failed_result(result):
+                        self.results.set(fingerprint, "summary", result, transcript.session_id, generation)
+                elif result is None:
+                    # Shielded: a disconnecting client must not cancel shared work
+                    result = await asyncio.shield(self._agent_task(agent_name, transcript))
+            except Exception as e:
+                print(f"Error streaming {agent_name} analysis: {e}")
+                result = self.agents[agent_name].fallback_result(str(e))
+            finally:
+                # Every agent reports exactly once, or the stream would never end
+                if result is None:
+                    result = self.agents[agent_name].fallback_result("cancelled")
+                queue.put_nowait({"event": "agent", "data": {"agent": agent_name, "result": result}})
+            if translate:
+                try:
+                    translated[agent_name] = await self._translate_result(agent_name, result, target_language)
+                except Exception as e:
+                    print(f"Error translating {agent_name} analysis: {e}")
+
+        tasks = [asyncio.ensure_future(run(agent_name)) for agent_name in ANALYSIS_AGENTS]
+        analysis: Dict[str, Any] = {}
+        try:
+            remaining = len(tasks)
+            while remaining:
+                event = await queue.get()
+                if event["event"] == "agent":
+                    remaining -= 1
+                    analysis.update(event["data"]["result"])
+                yield event
+
+            if translate:
+                await asyncio.gather(*tasks)
+                translation: Dict[str, Any] = {}
+                for agent_name in ANALYSIS_AGENTS:
+                    translation.update(translated.get(agent_name, {}))
+                yield {"event": "translation", "data": translation}
+        finally:
+            # Client went away: stop any agents still running
+            for task in tasks:
+                task.cancel()
+
+    async def _stream_summary(self, transcript: Transcript, queue: asyncio.Queue) -> Dict[str, Any]:
+        """
+        Stream the summary agent's raw output into `queue` as it arrives.
+        Long transcripts use the regular map-reduce path instead.
+        """
+        agent = self.agents["summary"]
+        if len(transcript.chunks(settings.LLM_TRANSCRIPT_TOKEN_BUDGET)) > 1:
+            return await self._run_agent("summary", transcript)
+
+        route = self._route(agent, transcript)
+        started_at = time.monotonic()
+        parts = []
+        with usage_scope(agent="summary", session=transcript.session_id):
+            async for text in self.llm.stream_response(
+                prompt=agent.build_prompt(transcript.messages, transcript=transcript),
+                system_prompt=agent.system_prompt,
+                temperature=agent.temperature,
+                max_tokens=route["max_tokens"],
+                model=route["model"]
+            ):
+                parts.append(text)
+                await queue.put({"event": "summary_delta", "data": {"text": text}})
+            self._record_route(route, transcript, time.monotonic() - started_at)
+            result = await self._parse("summary", agent, "".join(parts))
+        return transcript.restore_aliases(result)
+
+    async def run_agent(
+        self,
+        agent_name: str,
+        messages: List[Dict[str, Any]],
+        transcript: Transcript | None = None
+    ) -> Dict[str, Any]:
+        """
+        Run a single analysis agent (e.g. quiz generation on its own).
+        Reuses a cached or in-flight result for the same transcript.
+        """
+        if transcript is None:
+            transcript = Transcript(messages)
+        cached = self.results.get(transcript.fingerprint, agent_name)
+        if cached is not None:
+            return cached
+        return await asyncio.shield(self._agent_task(agent_name, transcript))
+
+    async def _run_agent(self, agent_name: str, transcript: Transcript) -> Dict[str, Any]:
         agent = self.agents[agent_name]
-        prompt = agent.build_prompt(messages)
-        response = await self.llm.generate_response(
-            prompt=prompt, 
-            system_prompt=agent.system_prompt,
-            temperature=agent.temperature
+
+        # Long transcripts: map over token-budgeted windows, then reduce
+        chunks = transcript.chunks(settings.LLM_TRANSCRIPT_TOKEN_BUDGET)
+        if len(chunks) > 1:
+            partials = await asyncio.gather(
+                *[self._run_agent_once(agent_name, chunk) for chunk in chunks]
+            )
+            return agent.merge_results(list(partials))
+
+        return await self._run_agent_once(agent_name, transcript)
+
+    async def _run_agent_once(self, agent_name: str, transcript: Transcript) -> Dict[str, Any]:
+        agent = self.agents[agent_name]
+        prompt = agent.build_prompt(transcript.messages, transcript=transcript)
+        route = self._route(agent, transcript)
+        started_at = time.monotonic()
+        with usage_scope(agent=agent_name, session=transcript.session_id):
+            response = await self.llm.generate_response(
+                prompt=prompt,
+                system_prompt=agent.system_prompt,
+                temperature=agent.temperature,
+                max_tokens=route["max_tokens"],
+                model=route["model"]
+            )
+            self._record_route(route, transcript, time.monotonic() - started_at)
+            result = await self._parse(agent_name, agent, response)
+        # Short speaker handles back to real user ids
+        return transcript.restore_aliases(result)
+
+    async def _run_agent_delta(
+        self,
+        agent_name: str,
+        transcript: Transcript,
+        previous: Dict[str, Any],
+        delta: Transcript
+    ) -> Dict[str, Any]:
+        """
+        Update `previous` from only the new messages in `delta`.
+        Falls back to a full run of `transcript` when the delta does not fit
+        one prompt or the update cannot be parsed.
+        """
+        if not len(delta):
+            return previous
+
+        agent = self.agents[agent_name]
+        if len(delta.chunks(settings.LLM_TRANSCRIPT_TOKEN_BUDGET)) == 1:
+            route = self._route(agent, delta)
+            started_at = time.monotonic()
+            with usage_scope(agent=agent_name, session=transcript.session_id):
+                response = await self.llm.generate_response(
+                    prompt=agent.build_update_prompt(delta.apply_aliases(previous), delta),
+                    system_prompt=agent.system_prompt,
+                    temperature=agent.temperature,
+                    max_tokens=route["max_tokens"],
+                    model=route["model"]
+                )
+                self._record_route(route, delta, time.monotonic() - started_at)
+                result = await self._parse(agent_name, agent, response)
+            if not agent.is_failed_result(result):
+                self.delta_stats.incr("updates")
+                return delta.restore_aliases(result)
+
+        self.delta_stats.incr("fallbacks")
+        return await self._run_agent(agent_name, transcript)
+
+    def split_results(self, analysis: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-agent results in a combined analysis (agents with every output key present).
+        """
+        results = {}
+        for agent_name in ANALYSIS_AGENTS:
+            keys = self.agents[agent_name].output_keys
+            if keys and all(key in analysis for key in keys):
+                results[agent_name] = {key: analysis[key] for key in keys}
+        return results
+
+    def _route(self, agent: BaseAgent, transcript: Transcript) -> Dict[str, Any]:
+        """
+        Model and max_tokens for this agent on this (chunk of) transcript.
+        """
+        return self.routing.choose(
+            transcript_tokens=estimate_tokens(transcript.text),
+            schema_tokens=estimate_tokens(agent.json_schema)
         )
-        return agent.parse_response(response)
+
+    def _record_route(self, route: Dict[str, Any], transcript: Transcript, seconds: float) -> None:
+        name = route["route"]
+        self.route_models[name] = route["model"] or getattr(self.llm, "model_name", settings.LLM_MODEL)
+        self.route_latency.setdefault(name, LatencyStats()).observe(seconds)
+        self.route_stats.incr(f"{name}.calls")
+        self.route_stats.incr(f"{name}.transcript_tokens", estimate_tokens(transcript.text))
+        self.route_stats.incr(f"{name}.max_output_tokens", route["max_tokens"])
+        tokens = transcript.token_stats()
+        self.route_stats.incr("compaction.raw_tokens", tokens["raw_tokens"])
+        self.route_stats.incr("compaction.prompt_tokens", tokens["prompt_tokens"])
+
+    async def _parse(self, agent_name: str, agent: BaseAgent, response: str) -> Dict[str, Any]:
+        """
+        Parse an agent response, repairing it locally where possible.
+        Only when that fails is the model asked (once, cheaply) to fix its JSON.
+        """
+        result, status = agent.parse_response_with_status(response)
+        if status == PARSE_FAILED and settings.LLM_JSON_REPAIR_REASK and not response.startswith("Error"):
+            fixed = await self.llm.generate_response(
+                prompt=agent.build_repair_prompt(response),
+                system_prompt="You repair malformed JSON. Output only the corrected JSON.",
+                temperature=0.0
+            )
+            repaired, repaired_status = agent.parse_response_with_status(fixed)
+            if repaired_status != PARSE_FAILED:
+                result, status = repaired, "reasked"
+        self.parse_stats.incr(f"{agent_name}.{status}")
+        return result
+
+    async def _run_consolidated(self, transcript: Transcript) -> Dict[str, Dict[str, Any]]:
+        """
+        Send the transcript once for all analysis agents.
+        Returns only the sections that parsed cleanly; missing ones are re-run individually.
+        """
+        agent = self.consolidated_agent
+        if len(transcript.chunks(settings.LLM_TRANSCRIPT_TOKEN_BUDGET)) > 1:
+            # Too long for one prompt; let the per-agent map-reduce handle it
+            return {}
+        prompt = agent.build_prompt(transcript.messages, transcript=transcript)
+        with usage_scope(agent="consolidated", session=transcript.session_id):
+            response = await self.llm.generate_response(
+                prompt=prompt,
+                system_prompt=agent.system_prompt,
+                temperature=agent.temperature,
+                max_tokens=settings.ANALYSIS_CONSOLIDATED_MAX_TOKENS
+            )
+        return transcript.restore_aliases(agent.split_response(response))
 
     async def _run_translation(self, content: Dict[str, Any], target_language: str) -> Dict[str, Any]:
+        """
+        Translate the string leaves of `content`, keeping its structure.
+        Strings already in the translation memory are reused; only the misses
+        are sent to the model, in parallel batches. Strings whose batch fails
+        stay in the original language.
+        """
+        texts = collect_strings(content)
+        translations = self.translations.get_many(target_language, texts)
+        missing = [text for text in texts if text not in translations]
+
+        batch_size = max(1, settings.TRANSLATION_BATCH_SIZE)
+        batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+        for translated in await asyncio.gather(
+            *[self._translate_batch(batch, target_language) for batch in batches]
+        ):
+            self.translations.set_many(target_language, translated)
+            translations.update(translated)
+
+        return replace_strings(content, translations)
+
+    async def _translate_batch(self, texts: List[str], target_language: str) -> Dict[str, str]:
         agent = self.agents["language"]
-        prompt = agent.build_prompt(content, target_language=target_language)
-        response = await self.llm.generate_response(
-            prompt=prompt,
-            system_prompt=agent.system_prompt,
-            temperature=agent.temperature
-        )
-        return agent.parse_response(response)
+        with usage_scope(agent="translation"):
+            response = await self.llm.generate_response(
+                prompt=agent.build_batch_prompt(texts, target_language),
+                system_prompt=agent.system_prompt,
+                temperature=agent.temperature
+            )
+        return agent.parse_batch_response(response, texts)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Analysis-layer counters: result cache, translation memory,
+        per-agent response parsing (failure_rate counts responses that
+        could not be used even after the re-ask), per-route latency and
+        the transcript token reduction from compaction.
+        """
+        parsing: Dict[str, Dict[str, Any]] = {}
+        for name, count in self.parse_stats.snapshot().items():
+            agent_name, status = name.rsplit(".", 1)
+            parsing.setdefault(agent_name, {"ok": 0, "repaired": 0, "reasked": 0, "failed": 0})[status] = count
+        for counts in parsing.values():
+            total = counts["ok"] + counts["repaired"] + counts["reasked"] + counts["failed"]
+            counts["failure_rate"] = round(counts["failed"] / total, 4) if total else 0.0
+
+        counters = self.route_stats.snapshot()
+        routes: Dict[str, Dict[str, Any]] = {}
+        for name, latency in self.route_latency.items():
+            calls = counters.get(f"{name}.calls", 0)
+            routes[name] = {
+                "model": self.route_models.get(name),
+                "calls": calls,
+                "avg_transcript_tokens": round(counters.get(f"{name}.transcript_tokens", 0) / calls, 1) if calls else 0.0,
+                "avg_max_output_tokens": round(counters.get(f"{name}.max_output_tokens", 0) / calls, 1) if calls else 0.0,
+                "latency": latency.snapshot(),
+            }
+
+        raw_tokens = counters.get("compaction.raw_tokens", 0)
+        prompt_tokens = counters.get("compaction.prompt_tokens", 0)
+
+        return {
+            "results": self.results.stats(),
+            "translation_memory": self.translations.stats(),
+            "parsing": parsing,
+            "routes": routes,
+            "delta": self.delta_stats.snapshot(),
+            "compaction": {
+                "raw_tokens": raw_tokens,
+                "prompt_tokens": prompt_tokens,
+                "reduction_ratio": round(1 - prompt_tokens / raw_tokens, 4) if raw_tokens else 0.0,
+            },
+        }
@@ -0,0 +1,70 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Tuple
+
+# A step receives the results of the steps it depends on, keyed by name
+StepFn = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class Pipeline:
+    """
+    A small dependency graph of async steps.
+
+    Each step starts as soon as the steps it depends on have finished, so
+    independent branches overlap instead of waiting for a whole stage:
+
+        pipeline = Pipeline()
+        pipeline.add("summary", run_summary)
+        pipeline.add("skill", run_skill)
+        pipeline.add("summary.translation", translate_summary, after=["summary"])
+        pipeline.add("report", build_report, after=["summary", "skill"])
+        tasks = pipeline.start()
+
+    Dependencies must be added before the steps that use them, which keeps
+    the graph acyclic. A step whose dependency fails fails with the same error.
+    """
+
+    def __init__(self):
+        self._steps: Dict[str, Tuple[StepFn, Tuple[str, ...]]] = {}
+
+    def add(self, name: str, run: StepFn, after: Iterable[str] = ()) -> "Pipeline":
+        if name in self._steps:
+            raise ValueError(f"Pipeline step '{name}' already exists")
+        after = tuple(after)
+        for dependency in after:
+            if dependency not in self._steps:
+                raise ValueError(f"Pipeline step '{name}' depends on unknown step '{dependency}'")
+        self._steps[name] = (run, after)
+        return self
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._steps
+
+    def dependents(self, name: str) -> List[str]:
+        """
+        Every step that (directly or transitively) waits on `name`,
+        in declaration order.
+        """
+        found = {name}
+        for step, (_, after) in self._steps.items():
+            if found.intersection(after):
+                found.add(step)
+        return [step for step in self._steps if step in found and step != name]
+
+    def start(self) -> Dict[str, asyncio.Task]:
+        """
+        Schedule every step; returns one task per step, in declaration order.
+        Tasks are never cancelled here. A step wrapped in asyncio.shield()
+        keeps running in the background when the caller cancels its task.
+        """
+        tasks: Dict[str, asyncio.Task] = {}
+        for name, (run, after) in self._steps.items():
+            tasks[name] = asyncio.ensure_future(self._run_step(run, {dep: tasks[dep] for dep in after}))
+        return tasks
+
+    @staticmethod
+    async def _run_step(run: StepFn, dependencies: Dict[str, asyncio.Task]) -> Any:
+        inputs = {}
+        for dependency, task in dependencies.items():
+            # Shielded: one consumer giving up must not cancel a shared step
+            inputs[dependency] = await asyncio.shield(task)
+        return await run(inputs)
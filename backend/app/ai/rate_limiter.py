@@ -0,0 +1,234 @@
+import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+from app.ai.metrics import LatencyStats
+
+# Priority classes for LLM calls, most to least urgent
+PRIORITY_INTERACTIVE = "interactive"  # a user is waiting (summary, quiz)
+PRIORITY_ARCHIVE = "archive"          # end-session analysis job
+PRIORITY_PRECOMPUTE = "precompute"    # speculative analysis of idle rooms
+PRIORITY_BACKFILL = "backfill"        # batch / offline work
+
+DEFAULT_PRIORITY_WEIGHTS = {
+    PRIORITY_INTERACTIVE: 8.0,
+    PRIORITY_ARCHIVE: 4.0,
+    PRIORITY_PRECOMPUTE: 2.0,
+    PRIORITY_BACKFILL: 1.0,
+}
+
+_priority: contextvars.ContextVar[str] = contextvars.ContextVar("llm_priority", default=PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def priority_scope(priority: str) -> Iterator[None]:
+    """
+    Run the LLM calls made inside the block (and tasks started there) at `priority`.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+class TokenBucket:
+    """
+    Async token bucket refilled continuously at `rate_per_minute`.
+    A rate of 0 (or less) disables the bucket.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float | None = None):
+        self.rate_per_second = max(rate_per_minute, 0) / 60.0
+        self.capacity = capacity if capacity is not None else max(rate_per_minute, 0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate_per_second > 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        """
+        Wait until `amount` tokens are available and take them.
+        Requests larger than the bucket are clamped to its capacity
+        so they can still proceed once the bucket is full.
+        """
+        if not self.enabled:
+            return
+        amount = min(amount, self.capacity)
+
+        # The lock makes waiters queue in FIFO order
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.rate_per_second)
+
+
+class LLMRateLimiter:
+    """
+    Admission control for LLM calls: a bound on in-flight requests plus
+    requests-per-minute and tokens-per-minute buckets.
+
+    Free slots are handed out by weighted fair queueing. Every waiting call
+    belongs to a priority class and a flow (its session); each flow gets a
+    share of the slots proportional to its class weight, so one busy room
+    cannot starve another and background work yields to interactive calls.
+    `reserved_slots` slots are only ever given to interactive calls, which
+    keeps their latency steady while long background calls hold the rest.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        weights: Dict[str, float] | None = None,
+        reserved_slots: int = 0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.weights = dict(DEFAULT_PRIORITY_WEIGHTS)
+        self.weights.update(weights or {})
+        # At least one slot always stays open to background classes
+        self.reserved_slots = max(0, min(reserved_slots, max_concurrency - 1))
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.in_flight = 0
+
+        # Waiting calls: [finish tag, arrival order, priority, future]
+        self._queue: List[list] = []
+        self._arrivals = 0
+        # Virtual time and each flow's last finish tag (WFQ bookkeeping)
+        self._virtual_time = 0.0
+        self._flow_finish: Dict[Tuple[str, str], float] = {}
+        self._class_in_flight: Dict[str, int] = {}
+        self._class_dispatched: Dict[str, int] = {}
+        self._class_wait: Dict[str, LatencyStats] = {}
+
+    @property
+    def waiting(self) -> int:
+        return len(self._queue)
+
+    def queued(self, priority: str) -> int:
+        return sum(1 for entry in self._queue if entry[2] == priority)
+
+    async def acquire(
+        self,
+        estimated_tokens: int,
+        priority: str | None = None,
+        flow: str | None = None
+    ) -> str:
+        """
+        Wait for a slot (in fair-queue order), then for the rate buckets.
+        `priority` defaults to the caller's priority_scope, `flow` groups
+        calls that share a fair share (normally the session id).
+        Returns the priority class to pass back to release().
+        """
+        priority = priority or current_priority()
+        if priority not in self.weights:
+            priority = PRIORITY_INTERACTIVE
+        queued_at = time.monotonic()
+
+        future = asyncio.get_running_loop().create_future()
+        flow_key = (priority, flow or "")
+        start = max(self._virtual_time, self._flow_finish.get(flow_key, 0.0))
+        finish = start + 1.0 / self.weights[priority]
+        self._flow_finish[flow_key] = finish
+        self._arrivals += 1
+        entry = [finish, self._arrivals, priority, future]
+        self._queue.append(entry)
+        self._dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if entry in self._queue:
+                self._queue.remove(entry)
+            elif future.done() and not future.cancelled():
+                # Granted just as we were cancelled: hand the slot back
+                self._release_slot(priority)
+            raise
+        self._class_wait.setdefault(priority, LatencyStats()).observe(time.monotonic() - queued_at)
+
+        try:
+            await self.requests.acquire(1)
+            await self.tokens.acquire(estimated_tokens)
+        except BaseException:
+            self._release_slot(priority)
+            raise
+        return priority
+
+    def release(self, priority: str = PRIORITY_INTERACTIVE) -> None:
+        self._release_slot(priority)
+
+    def _release_slot(self, priority: str) -> None:
+        self.in_flight -= 1
+        self._class_in_flight[priority] = self._class_in_flight.get(priority, 1) - 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """
+        Grant free slots to waiting calls, smallest finish tag first.
+        Background classes may not take the reserved slots.
+        """
+        while self._queue and self.in_flight < self.max_concurrency:
+            background_ok = self.in_flight < self.max_concurrency - self.reserved_slots
+            eligible = [
+                entry for entry in self._queue
+                if (background_ok or entry[2] == PRIORITY_INTERACTIVE) and not entry[3].done()
+            ]
+            if not eligible:
+                # Drop futures cancelled while queued, then wait for a release
+                self._queue = [entry for entry in self._queue if not entry[3].done()]
+                return
+            entry = min(eligible, key=lambda e: (e[0], e[1]))
+            self._queue.remove(entry)
+            finish, _, priority, future = entry
+            self._virtual_time = max(self._virtual_time, finish - 1.0 / self.weights[priority])
+            self.in_flight += 1
+            self._class_in_flight[priority] = self._class_in_flight.get(priority, 0) + 1
+            self._class_dispatched[priority] = self._class_dispatched.get(priority, 0) + 1
+            future.set_result(None)
+
+        self._forget_idle_flows()
+
+    def _forget_idle_flows(self) -> None:
+        # Flows whose tags are behind virtual time start fresh anyway
+        if len(self._flow_finish) > 1024:
+            self._flow_finish = {
+                key: finish for key, finish in self._flow_finish.items() if finish > self._virtual_time
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        classes = {}
+        for priority, weight in self.weights.items():
+            wait = self._class_wait.get(priority)
+            classes[priority] = {
+                "weight": weight,
+                "queued": self.queued(priority),
+                "in_flight": self._class_in_flight.get(priority, 0),
+                "dispatched": self._class_dispatched.get(priority, 0),
+                "wait": wait.snapshot() if wait is not None else LatencyStats().snapshot(),
+            }
+        return {
+            "max_concurrency": self.max_concurrency,
+            "reserved_interactive_slots": self.reserved_slots,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "classes": classes,
+        }
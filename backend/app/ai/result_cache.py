@@ -0,0 +1,138 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+ResultKey = Tuple[str, str]  # (transcript fingerprint, agent name)
+# (expires_at, result, session_id, session generation when stored)
+Entry = Tuple[float, Dict[str, Any], Optional[str], Optional[int]]
+
+
+class AgentResultCache:
+    """
+    Parsed agent results keyed by (transcript fingerprint, agent name),
+    plus the registry of agent runs still in flight for those keys.
+
+    Lets an agent that missed its deadline finish in the background and
+    be picked up by the next request for the same transcript, and lets
+    services share results (e.g. the quiz from the last session analysis).
+    Entries can be tagged with a session so they are dropped as soon as
+    that session changes.
+
+    Session generations come from a local counter bumped by
+    invalidate_session, or from `generation_source` when the chat store is
+    shared between processes (SQLiteTempMemory.session_generation): other
+    workers' changes never reach this process's listeners, so a tagged
+    entry is then checked against the stored generation on every read.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_seconds: int = 3600,
+        generation_source: Optional[Callable[[str], int]] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.generation_source = generation_source
+        self._results: "OrderedDict[ResultKey, Entry]" = OrderedDict()
+        self._inflight: Dict[ResultKey, asyncio.Task] = {}
+        # session_id -> keys stored for it, and a counter bumped on every change
+        self._session_keys: Dict[str, Set[ResultKey]] = {}
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, fingerprint: str, agent_name: str) -> Optional[Dict[str, Any]]:
+        key = (fingerprint, agent_name)
+        entry = self._results.get(key)
+        if entry is not None:
+            expires_at, result, session_id, generation = entry
+            if expires_at > time.time() and not self._outdated(session_id, generation):
+                self._results.move_to_end(key)
+                self.hits += 1
+                return result
+            del self._results[key]
+        self.misses += 1
+        return None
+
+    def set(
+        self,
+        fingerprint: str,
+        agent_name: str,
+        result: Dict[str, Any],
+        session_id: str | None = None,
+        generation: int | None = None
+    ) -> None:
+        """
+        Store a result. With a session_id, `generation` is the value of
+        generation(session_id) when the run started; results from runs that
+        started before the session last changed are dropped.
+        """
+        if session_id is not None:
+            current = self.generation(session_id)
+            if generation is not None and generation != current:
+                return
+            generation = current
+        key = (fingerprint, agent_name)
+        self._results[key] = (time.time() + self.ttl_seconds, result, session_id, generation)
+        self._results.move_to_end(key)
+        if session_id is not None:
+            self._session_keys.setdefault(session_id, set()).add(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    def generation(self, session_id: str) -> int:
+        if self.generation_source is not None:
+            return self.generation_source(session_id)
+        return self._generations.get(session_id, 0)
+
+    def _outdated(self, session_id: str | None, generation: int | None) -> bool:
+        # Local invalidations already removed the entry; only a shared store can move on unseen
+        if session_id is None or self.generation_source is None:
+            return False
+        return generation != self.generation_source(session_id)
+
+    def invalidate_session(self, session_id: str | None) -> None:
+        """
+        Drop every result stored for a session (None: all sessions).
+        Wired to the chat storage so a new or cleared message invalidates it.
+        """
+        if session_id is None:
+            self._results.clear()
+            self._session_keys.clear()
+            self._generations.clear()
+            self.invalidations += 1
+            return
+        self._generations[session_id] = self.generation(session_id) + 1
+        keys = self._session_keys.pop(session_id, set())
+        for key in keys:
+            self._results.pop(key, None)
+        if keys:
+            self.invalidations += 1
+
+    def inflight(self, fingerprint: str, agent_name: str) -> Optional[asyncio.Task]:
+        return self._inflight.get((fingerprint, agent_name))
+
+    def track(self, fingerprint: str, agent_name: str, task: asyncio.Task) -> None:
+        """
+        Register a running agent task; it is forgotten once it finishes.
+        """
+        key = (fingerprint, agent_name)
+        self._inflight[key] = task
+
+        def forget(t: asyncio.Task) -> None:
+            if self._inflight.get(key) is t:
+                del self._inflight[key]
+
+        task.add_done_callback(forget)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._results),
+            "in_flight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,54 @@
+from typing import Any, Dict, List
+
+from app.config import settings
+
+DEFAULT_MAX_TOKENS = 2000
+
+
+class RoutingPolicy:
+    """
+    Picks the model and output budget for one agent call.
+
+    Routes are checked in order; the first whose max_transcript_tokens
+    covers the (estimated) transcript size wins, the last one catches the
+    rest. The output budget scales with the size of the agent's JSON schema:
+
+        max_tokens = clamp(schema_tokens * output_multiplier,
+                           min_output_tokens, max_output_tokens)
+
+    A route entry (see settings.LLM_ROUTES):
+        {"name": "small", "max_transcript_tokens": 2000, "model": "gemini-1.5-flash-8b",
+         "output_multiplier": 6, "min_output_tokens": 512, "max_output_tokens": 1536}
+    A missing/empty "model" means settings.LLM_MODEL.
+    """
+
+    def __init__(self, routes: List[Dict[str, Any]], enabled: bool = True):
+        self.routes = routes
+        self.enabled = enabled and bool(routes)
+
+    def choose(self, transcript_tokens: int, schema_tokens: int) -> Dict[str, Any]:
+        """
+        Returns {"route", "model", "max_tokens"}; model None = client default.
+        """
+        if not self.enabled:
+            return {"route": "default", "model": None, "max_tokens": DEFAULT_MAX_TOKENS}
+
+        route = self.routes[-1]
+        for candidate in self.routes:
+            limit = candidate.get("max_transcript_tokens")
+            if limit is None or transcript_tokens <= limit:
+                route = candidate
+                break
+
+        max_tokens = int(schema_tokens * route.get("output_multiplier", 8))
+        max_tokens = max(route.get("min_output_tokens", 256), max_tokens)
+        max_tokens = min(route.get("max_output_tokens", DEFAULT_MAX_TOKENS), max_tokens)
+        return {
+            "route": route.get("name", "default"),
+            "model": route.get("model") or None,
+            "max_tokens": max_tokens,
+        }
+
+
+def create_routing_policy() -> RoutingPolicy:
+    return RoutingPolicy(settings.LLM_ROUTES, enabled=settings.LLM_ROUTING_ENABLED)
@@ -0,0 +1,16 @@
+"""
+Cheap token estimation for prompt budgeting.
+Gemini averages roughly four characters per token for English text;
+this errs slightly high so budgets stay on the safe side.
+"""
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate the number of tokens in a string.
+    """
+    if not text:
+        return 0
+    return len(text) // CHARS_PER_TOKEN + 1
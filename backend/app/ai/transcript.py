@@ -0,0 +1,319 @@
+import re
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.ai.tokens import estimate_tokens
+from app.config import settings
+from app.utils.hashing import messages_fingerprint
+
+# Roles that take part in AI analysis (system notices are left out)
+ANALYSIS_ROLES = ("user", "assistant")
+
+# Ids longer than this (e.g. Supabase auth UUIDs) are shown as short handles
+ALIAS_MIN_LENGTH = 13
+ALIAS_PREFIX = "u"
+# Consecutive messages from one speaker share a line up to about this size,
+# so chunks() can still split a monologue
+MAX_RUN_TOKENS = 1000
+
+_REPEATED_CHAR_RE = re.compile(r"(.)\1{3,}")
+# A real id shaped like a handle is aliased too, so it can never be mistaken for one
+_HANDLE_RE = re.compile(re.escape(ALIAS_PREFIX) + r"\d+")
+_JOIN_LEAVE_RE = re.compile(
+    r"^\s*(?:\S+\s+)?(?:has\s+)?(?:joined|left)(?:\s+the\s+(?:room|chat|session))?\s*[.!]*\s*$",
+    re.IGNORECASE,
+)
+
+# (speaker key, messages in the run, rendered line); replaced, never mutated
+Group = Tuple[Tuple[str, str], Tuple[Dict[str, Any], ...], str]
+
+
+def format_message(msg: Dict[str, Any]) -> str:
+    """
+    Render a single message as one transcript line.
+    """
+    role = msg.get("role", "unknown")
+    user_id = msg.get("user_id", "anonymous")
+    content = msg.get("content", "")
+    return f"[{role}] {user_id}: {content}"
+
+
+def normalize_content(content: Any) -> str:
+    """
+    Collapse whitespace and long runs of one character (emoji spam, "!!!!!!").
+    """
+    text = " ".join(str(content or "").split())
+    return _REPEATED_CHAR_RE.sub(r"\1\1\1", text)
+
+
+def is_noise(content: str) -> bool:
+    """
+    Empty messages and join/leave notices carry nothing worth analysing.
+    """
+    return not content or bool(_JOIN_LEAVE_RE.match(content))
+
+
+class Transcript:
+    """
+    A message list together with its rendered prompt text.
+
+    Each message is processed once, when it is appended; the joined text
+    and the fingerprint are computed lazily and kept until the transcript
+    changes. Agents read `text` instead of formatting the messages again.
+
+    With compaction (settings.TRANSCRIPT_COMPACTION_ENABLED) the text is
+    rendered for the model rather than verbatim:
+    - long user ids (and ids that look like handles) become short handles
+      (u1, u2, ...); see restore_aliases
+    - whitespace and repeated characters are normalized
+    - empty messages, join/leave notices and back-to-back resends are dropped
+    - consecutive messages from the same speaker share one line, up to
+      MAX_RUN_TOKENS per line
+    The fingerprint always covers the original messages.
+    """
+
+    def __init__(
+        self,
+        messages: Iterable[Dict[str, Any]] = (),
+        roles: Optional[Iterable[str]] = None,
+        session_id: Optional[str] = None,
+        compact: Optional[bool] = None
+    ):
+        self.roles = tuple(roles) if roles is not None else None
+        # Session the messages belong to, when known (used to tag cached results)
+        self.session_id = session_id
+        self.compact = settings.TRANSCRIPT_COMPACTION_ENABLED if compact is None else compact
+        self._messages: deque = deque()
+        self._groups: deque = deque()
+        # user_id -> handle and back; only ever grows
+        self._aliases: Dict[str, str] = {}
+        self._user_ids: Dict[str, str] = {}
+        # Size of the verbatim rendering, for the reduction ratio
+        self._raw_chars = 0
+        self._text: Optional[str] = None
+        self._fingerprint: Optional[str] = None
+        for msg in messages:
+            self.append(msg)
+
+    # -----------------------------
+    # Updates
+    # -----------------------------
+
+    def append(self, msg: Dict[str, Any]) -> bool:
+        """
+        Add a message (if its role is included). Returns True when it was added.
+        """
+        if self.roles is not None and msg.get("role") not in self.roles:
+            return False
+        self._messages.append(msg)
+        self._raw_chars += len(format_message(msg)) + 1
+        self._invalidate()
+
+        key = (str(msg.get("role", "unknown")), str(msg.get("user_id", "anonymous")))
+        if not self.compact:
+            self._groups.append((key, (msg,), format_message(msg)))
+            return True
+
+        content = normalize_content(msg.get("content", ""))
+        if is_noise(content):
+            return True
+
+        last = self._groups[-1] if self._groups else None
+        if last is not None and last[0] == key:
+            if normalize_content(last[1][-1].get("content", "")) == content:
+                # Resent message
+                return True
+            line = f"{last[2]} / {content}"
+            if estimate_tokens(line) <= MAX_RUN_TOKENS:
+                # Extends the rendered line instead of rendering the run again
+                self._groups[-1] = (key, last[1] + (msg,), line)
+                return True
+        self._groups.append((key, (msg,), self._render(key, (msg,))))
+        return True
+
+    def discard_oldest(self, msg: Dict[str, Any]) -> None:
+        """
+        Drop `msg` if it is the oldest message (the source evicted it).
+        """
+        if not self._messages or self._messages[0] is not msg:
+            return
+        self._messages.popleft()
+        self._raw_chars -= len(format_message(msg)) + 1
+        self._invalidate()
+
+        if self._groups and self._groups[0][1][0] is msg:
+            key, run, _ = self._groups[0]
+            if len(run) == 1:
+                self._groups.popleft()
+            else:
+                self._groups[0] = (key, run[1:], self._render(key, run[1:]))
+
+    def _invalidate(self) -> None:
+        self._text = None
+        self._fingerprint = None
+
+    def _render(self, key: Tuple[str, str], run: Tuple[Dict[str, Any], ...]) -> str:
+        role, user_id = key
+        parts = [normalize_content(m.get("content", "")) for m in run]
+        return f"[{role}] {self._handle(user_id)}: {' / '.join(parts)}"
+
+    def _handle(self, user_id: str) -> str:
+        if len(user_id) < ALIAS_MIN_LENGTH and not _HANDLE_RE.fullmatch(user_id):
+            return user_id
+        if user_id not in self._aliases:
+            handle = f"{ALIAS_PREFIX}{len(self._aliases) + 1}"
+            self._aliases[user_id] = handle
+            self._user_ids[handle] = user_id
+        return self._aliases[user_id]
+
+    # -----------------------------
+    # Views
+    # -----------------------------
+
+    @property
+    def messages(self) -> List[Dict[str, Any]]:
+        return list(self._messages)
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            lines = [group[2] for group in self._groups]
+            if self._user_ids:
+                handles = ", ".join(sorted(self._user_ids, key=lambda h: int(h[len(ALIAS_PREFIX):])))
+                lines.insert(0, f"(Speakers {handles} are short handles for participant ids; use them as-is.)")
+            self._text = "\n".join(lines)
+        return self._text
+
+    @property
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint = messages_fingerprint(self._messages)
+        return self._fingerprint
+
+    @property
+    def aliases(self) -> Dict[str, str]:
+        """
+        Handle -> original user_id legend.
+        """
+        return dict(self._user_ids)
+
+    def token_stats(self) -> Dict[str, Any]:
+        """
+        Estimated prompt tokens before and after compaction.
+        """
+        raw = self._raw_chars // 4 + 1 if self._messages else 0
+        compact = estimate_tokens(self.text) if self._messages else 0
+        return {
+            "raw_tokens": raw,
+            "prompt_tokens": compact,
+            "reduction_ratio": round(1 - compact / raw, 4) if raw else 0.0,
+        }
+
+    def restore_aliases(self, value: Any) -> Any:
+        """
+        Map handles in a parsed model response back to the real user ids.
+        Only whole values (and keys) are mapped: a handle inside free text
+        may just as well be the user's own words ("vectors u1 and u2").
+        """
+        return _replace_ids(value, self._user_ids)
+
+    def apply_aliases(self, value: Any) -> Any:
+        """
+        Inverse of restore_aliases: show a stored result with the handles
+        this transcript uses (e.g. a previous analysis put back in a prompt).
+        """
+        return _replace_ids(value, self._aliases)
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def snapshot(self) -> "Transcript":
+        """
+        Immutable-by-convention copy for one analysis run; later appends
+        to this transcript do not affect it. Rendered text is shared.
+        """
+        copy = self._copy(list(self._messages), list(self._groups))
+        copy._raw_chars = self._raw_chars
+        copy._text = self._text
+        copy._fingerprint = self._fingerprint
+        return copy
+
+    def since(self, message_id: Any) -> Optional["Transcript"]:
+        """
+        The messages after the one with id `message_id`, rendered with this
+        transcript's handles. None when that message is no longer here.
+        """
+        if message_id is None:
+            return None
+        messages = list(self._messages)
+        for i in range(len(messages) - 1, -1, -1):
+            if messages[i].get("id") == message_id:
+                break
+        else:
+            return None
+
+        delta = Transcript(roles=self.roles, session_id=self.session_id, compact=self.compact)
+        delta._aliases = dict(self._aliases)
+        delta._user_ids = dict(self._user_ids)
+        for msg in messages[i + 1:]:
+            delta.append(msg)
+        return delta
+
+    def chunks(self, token_budget: int) -> List["Transcript"]:
+        """
+        Split into consecutive windows whose estimated token count fits
+        within token_budget, reusing the already rendered lines.
+        A single oversized line still gets a window of its own.
+        """
+        chunks: List[Transcript] = []
+        groups: List[Group] = []
+        tokens = 0
+
+        for group in self._groups:
+            # +1 for the newline joining transcript lines
+            line_tokens = estimate_tokens(group[2]) + 1
+            if groups and tokens + line_tokens > token_budget:
+                chunks.append(self._chunk(groups))
+                groups, tokens = [], 0
+            groups.append(group)
+            tokens += line_tokens
+
+        if groups:
+            chunks.append(self._chunk(groups))
+        if len(chunks) <= 1:
+            return [self]
+        return chunks
+
+    def _chunk(self, groups: List[Group]) -> "Transcript":
+        messages = [msg for group in groups for msg in group[1]]
+        chunk = self._copy(messages, groups)
+        chunk._raw_chars = sum(len(format_message(msg)) + 1 for msg in messages)
+        return chunk
+
+    def _copy(self, messages: List[Dict[str, Any]], groups: List[Group]) -> "Transcript":
+        transcript = Transcript(roles=self.roles, session_id=self.session_id, compact=self.compact)
+        transcript._messages = deque(messages)
+        transcript._groups = deque(groups)
+        # Chunks keep the parent's handles so merged results agree
+        transcript._aliases = dict(self._aliases)
+        transcript._user_ids = dict(self._user_ids)
+        return transcript
+
+
+def _replace_ids(value: Any, mapping: Dict[str, str]) -> Any:
+    """
+    Swap strings (and dict keys) of a parsed result that exactly equal a mapping key.
+    """
+    if not mapping:
+        return value
+
+    def walk(node: Any) -> Any:
+        if isinstance(node, str):
+            return mapping.get(node, node)
+        if isinstance(node, list):
+            return [walk(item) for item in node]
+        if isinstance(node, dict):
+            return {mapping.get(key, key): walk(item) for key, item in node.items()}
+        return node
+
+    return walk(value)
@@ -0,0 +1,186 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Fields whose values are identifiers or machine-readable, never prose
+UNTRANSLATED_KEYS = {
+    "user_id", "level", "correct_answer", "error", "raw", "raw_response",
+    "pending_agents", "partial",
+}
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _is_translatable(text: str) -> bool:
+    # Skip empty strings, single letters like quiz options, and bare numbers
+    return len(text.strip()) > 1 and any(ch.isalpha() for ch in text)
+
+
+def collect_strings(value: Any, skip_keys: Iterable[str] = UNTRANSLATED_KEYS) -> List[str]:
+    """
+    Unique translatable string leaves of a JSON-like structure, in first-seen order.
+    """
+    skip = set(skip_keys)
+    found: Dict[str, None] = {}
+
+    def walk(node: Any) -> None:
+        if isinstance(node, str):
+            if _is_translatable(node):
+                found.setdefault(node, None)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+        elif isinstance(node, dict):
+            for key, item in node.items():
+                if key not in skip:
+                    walk(item)
+
+    walk(value)
+    return list(found)
+
+
+def replace_strings(value: Any, translations: Dict[str, str], skip_keys: Iterable[str] = UNTRANSLATED_KEYS) -> Any:
+    """
+    Copy of `value` with string leaves swapped for their translation.
+    Strings without a translation are kept as they are.
+    """
+    skip = set(skip_keys)
+
+    def walk(node: Any) -> Any:
+        if isinstance(node, str):
+            return translations.get(node, node)
+        if isinstance(node, list):
+            return [walk(item) for item in node]
+        if isinstance(node, dict):
+            return {key: item if key in skip else walk(item) for key, item in node.items()}
+        return node
+
+    return walk(value)
+
+
+class TranslationMemory:
+    """
+    Translated strings keyed by (target language, hash of source text).
+
+    A bounded in-memory LRU in front of an optional SQLite file, so recurring
+    strings (topic names, canned messages) are only translated once.
+    """
+
+    def __init__(self, max_entries: int = 20000, db_path: str | None = None):
+        self.max_entries = max_entries
+        self.db_path = db_path
+
+        self._memory: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._stats = {"hits": 0, "misses": 0, "writes": 0}
+
+        if db_path:
+            self._open_db(db_path)
+
+    def get_many(self, language: str, texts: List[str]) -> Dict[str, str]:
+        """
+        Known translations for `texts`; missing strings are left out.
+        """
+        language = language.strip().lower()
+        found: Dict[str, str] = {}
+        with self._lock:
+            missing = []
+            for text in texts:
+                key = (language, text_hash(text))
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[text] = self._memory[key]
+                else:
+                    missing.append(text)
+
+            for text, translation in self._disk_get_many(language, missing).items():
+                self._memory_put((language, text_hash(text)), translation)
+                found[text] = translation
+
+            self._stats["hits"] += len(found)
+            self._stats["misses"] += len(texts) - len(found)
+        return found
+
+    def set_many(self, language: str, translations: Dict[str, str]) -> None:
+        if not translations:
+            return
+        language = language.strip().lower()
+        rows = [(language, text_hash(text), translation) for text, translation in translations.items()]
+        with self._lock:
+            for lang, digest, translation in rows:
+                self._memory_put((lang, digest), translation)
+            self._disk_put_many(rows)
+            self._stats["writes"] += len(rows)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "persistent": self._db is not None,
+            }
+
+    def _memory_put(self, key: Tuple[str, str], translation: str) -> None:
+        self._memory[key] = translation
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # -----------------------------
+    # Disk tier
+    # -----------------------------
+
+    def _open_db(self, db_path: str) -> None:
+        try:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translation_memory ("
+                " language TEXT NOT NULL,"
+                " text_hash TEXT NOT NULL,"
+                " translation TEXT NOT NULL,"
+                " PRIMARY KEY (language, text_hash))"
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Error opening translation memory database: {e}")
+            self._db = None
+
+    def _disk_get_many(self, language: str, texts: List[str]) -> Dict[str, str]:
+        if self._db is None or not texts:
+            return {}
+        by_hash = {text_hash(text): text for text in texts}
+        found: Dict[str, str] = {}
+        hashes = list(by_hash)
+        try:
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(hashes), 500):
+                batch = hashes[i:i + 500]
+                rows = self._db.execute(
+                    "SELECT text_hash, translation FROM translation_memory"
+                    f" WHERE language = ? AND text_hash IN ({','.join('?' * len(batch))})",
+                    (language, *batch),
+                ).fetchall()
+                for digest, translation in rows:
+                    found[by_hash[digest]] = translation
+        except sqlite3.Error as e:
+            print(f"Error reading translation memory: {e}")
+        return found
+
+    def _disk_put_many(self, rows: List[Tuple[str, str, str]]) -> None:
+        if self._db is None:
+            return
+        try:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO translation_memory (language, text_hash, translation) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Error writing translation memory: {e}")
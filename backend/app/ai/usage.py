@@ -0,0 +1,254 @@
+import asyncio
+import contextvars
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.config import settings
+
+# Who an LLM call is made for. Set by services / the orchestrator; asyncio
+# tasks inherit it, so LLMClient can attribute usage without extra arguments.
+_usage_scope: contextvars.ContextVar[Dict[str, Optional[str]]] = contextvars.ContextVar("llm_usage_scope", default={})
+
+DIMENSIONS = ("agent", "session", "user")
+
+
+@contextmanager
+def usage_scope(**labels: Optional[str]) -> Iterator[None]:
+    """
+    Attribute LLM calls made inside the block, e.g.
+    `with usage_scope(session="room-1", user="u-42"): ...`.
+    Labels left as None keep the value from the enclosing scope.
+    """
+    current = dict(_usage_scope.get())
+    current.update({k: v for k, v in labels.items() if v is not None})
+    token = _usage_scope.set(current)
+    try:
+        yield
+    finally:
+        _usage_scope.reset(token)
+
+
+def current_scope() -> Dict[str, Optional[str]]:
+    return dict(_usage_scope.get())
+
+
+def _empty() -> Dict[str, int]:
+    return {"prompt_tokens": 0, "completion_tokens": 0, "calls": 0, "estimated_calls": 0}
+
+
+class UsageMeter:
+    """
+    Prompt/completion token counts per agent, per session (room) and per user.
+
+    Counts accumulate in a bounded in-memory table and are periodically
+    flushed into an optional SQLite file, which holds the running totals.
+    Past max_keys per dimension the least recently updated key is written
+    out early (or, without a database, dropped).
+    """
+
+    def __init__(self, max_keys: int = 1000, db_path: str | None = None):
+        self.max_keys = max_keys
+        self.db_path = db_path
+        # dimension -> key -> counts not yet flushed
+        self._pending: Dict[str, "OrderedDict[str, Dict[str, int]]"] = {d: OrderedDict() for d in DIMENSIONS}
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self.dropped_keys = 0
+
+        if db_path:
+            self._open_db(db_path)
+
+    # -----------------------------
+    # Recording
+    # -----------------------------
+
+    def record(self, prompt_tokens: int, completion_tokens: int, estimated: bool = False) -> None:
+        """
+        Add one LLM call's usage under every label of the current usage scope.
+        """
+        scope = _usage_scope.get()
+        keys = {"agent": scope.get("agent") or "other", "session": scope.get("session"), "user": scope.get("user")}
+        with self._lock:
+            for dimension, key in keys.items():
+                if not key:
+                    continue
+                table = self._pending[dimension]
+                counts = table.pop(key, None) or _empty()
+                counts["prompt_tokens"] += int(prompt_tokens)
+                counts["completion_tokens"] += int(completion_tokens)
+                counts["calls"] += 1
+                counts["estimated_calls"] += int(estimated)
+                table[key] = counts
+                while len(table) > self.max_keys:
+                    evicted_key, evicted = table.popitem(last=False)
+                    if self._db is not None:
+                        self._disk_add(dimension, {evicted_key: evicted})
+                    else:
+                        self.dropped_keys += 1
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+
+    def totals(self, dimension: str, key: str) -> Dict[str, int]:
+        """
+        Flushed plus pending counts for one key.
+        """
+        with self._lock:
+            counts = dict(self._pending[dimension].get(key) or _empty())
+            for name, value in self._disk_get(dimension, key).items():
+                counts[name] += value
+        counts["total_tokens"] = counts["prompt_tokens"] + counts["completion_tokens"]
+        return counts
+
+    def top(self, dimension: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Biggest consumers in a dimension by total tokens.
+        """
+        with self._lock:
+            merged: Dict[str, Dict[str, int]] = {
+                key: dict(counts) for key, counts in self._disk_all(dimension).items()
+            }
+            for key, counts in self._pending[dimension].items():
+                target = merged.setdefault(key, _empty())
+                for name, value in counts.items():
+                    target[name] += value
+
+        rows = [
+            {"key": key, **counts, "total_tokens": counts["prompt_tokens"] + counts["completion_tokens"]}
+            for key, counts in merged.items()
+        ]
+        rows.sort(key=lambda row: row["total_tokens"], reverse=True)
+        return rows[:limit]
+
+    def budget_action(self, session_id: str) -> Optional[str]:
+        """
+        settings.USAGE_BUDGET_ACTION ("reject" | "downgrade") once the room has
+        spent its token budget, else None.
+        """
+        budget = settings.USAGE_ROOM_BUDGETS.get(session_id, settings.USAGE_ROOM_TOKEN_BUDGET)
+        if not budget or budget <= 0:
+            return None
+        if self.totals("session", session_id)["total_tokens"] < budget:
+            return None
+        return "downgrade" if settings.USAGE_BUDGET_ACTION == "downgrade" else "reject"
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = {dimension: len(table) for dimension, table in self._pending.items()}
+        return {"persistent": self._db is not None, "pending_keys": pending, "dropped_keys": self.dropped_keys}
+
+    # -----------------------------
+    # Flushing
+    # -----------------------------
+
+    def flush(self) -> None:
+        """
+        Move pending counts into the SQLite totals (no-op without a database).
+        """
+        if self._db is None:
+            return
+        with self._lock:
+            for dimension, table in self._pending.items():
+                self._disk_add(dimension, table)
+                table.clear()
+
+    def start_flusher(self, interval_seconds: float) -> None:
+        if self._db is None or self._flusher is not None or interval_seconds <= 0:
+            return
+
+        async def run() -> None:
+            while True:
+                await asyncio.sleep(interval_seconds)
+                self.flush()
+
+        self._flusher = asyncio.create_task(run())
+
+    async def stop_flusher(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        self.flush()
+
+    # -----------------------------
+    # Disk tier
+    # -----------------------------
+
+    def _open_db(self, db_path: str) -> None:
+        try:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_usage ("
+                " dimension TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " prompt_tokens INTEGER NOT NULL DEFAULT 0,"
+                " completion_tokens INTEGER NOT NULL DEFAULT 0,"
+                " calls INTEGER NOT NULL DEFAULT 0,"
+                " estimated_calls INTEGER NOT NULL DEFAULT 0,"
+                " updated_at REAL NOT NULL,"
+                " PRIMARY KEY (dimension, key))"
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Error opening usage database: {e}")
+            self._db = None
+
+    def _disk_add(self, dimension: str, table: Dict[str, Dict[str, int]]) -> None:
+        if self._db is None or not table:
+            return
+        try:
+            self._db.executemany(
+                "INSERT INTO llm_usage (dimension, key, prompt_tokens, completion_tokens, calls, estimated_calls, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (dimension, key) DO UPDATE SET"
+                " prompt_tokens = prompt_tokens + excluded.prompt_tokens,"
+                " completion_tokens = completion_tokens + excluded.completion_tokens,"
+                " calls = calls + excluded.calls,"
+                " estimated_calls = estimated_calls + excluded.estimated_calls,"
+                " updated_at = excluded.updated_at",
+                [
+                    (dimension, key, c["prompt_tokens"], c["completion_tokens"], c["calls"], c["estimated_calls"], time.time())
+                    for key, c in table.items()
+                ],
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Error writing usage: {e}")
+
+    def _disk_get(self, dimension: str, key: str) -> Dict[str, int]:
+        if self._db is None:
+            return {}
+        try:
+            row = self._db.execute(
+                "SELECT prompt_tokens, completion_tokens, calls, estimated_calls FROM llm_usage"
+                " WHERE dimension = ? AND key = ?",
+                (dimension, key),
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading usage: {e}")
+            return {}
+        if row is None:
+            return {}
+        return dict(zip(("prompt_tokens", "completion_tokens", "calls", "estimated_calls"), row))
+
+    def _disk_all(self, dimension: str) -> Dict[str, Dict[str, int]]:
+        if self._db is None:
+            return {}
+        try:
+            rows = self._db.execute(
+                "SELECT key, prompt_tokens, completion_tokens, calls, estimated_calls FROM llm_usage WHERE dimension = ?",
+                (dimension,),
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Error reading usage: {e}")
+            return {}
+        return {
+            row[0]: dict(zip(("prompt_tokens", "completion_tokens", "calls", "estimated_calls"), row[1:]))
+            for row in rows
+        }
@@ -30,12 +30,16 @@ async def send_message(
 @router.get("/history/{session_id}")
 async def get_chat_history(
     session_id: str, 
+    after: str | None = None,
+    limit: int | None = None,
     service: ChatService = Depends(get_chat_service)
 ):
     """
     Endpoint to retrieve chat history for a session.
+    `after` is the next_cursor of a previous response: only newer messages
+    are returned, so a reconnecting client fetches just what it missed.
     """
-    return service.get_history(session_id)
+    return service.get_history(session_id, after=after, limit=limit)
 
 @router.delete("/clear/{session_id}")
 async def clear_chat(
@@ -1,16 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from typing import Dict, Any, List
 from pydantic import BaseModel
-from app.dependencies import get_supabase_storage, get_summary_service
-from app.storage.supabase_storage import SupabaseStorage
-from app.services.summary_service import SummaryService
+from app.dependencies import get_history_service, get_job_queue
 from app.services.history_service import HistoryService
+from app.services.job_queue import JobQueue, ACTIVE_STATUSES, JOB_DONE
+from app.utils.sse import format_sse
 
 router = APIRouter()
 
-def get_history_service(storage: SupabaseStorage = Depends(get_supabase_storage)) -> HistoryService:
-    return HistoryService(storage)
-
 class EndSessionRequest(BaseModel):
     room_id: str
 
@@ -45,42 +43,80 @@ async def get_user_history(
 async def end_session(
     req: EndSessionRequest,
     request: Request,
-    summary_service: SummaryService = Depends(get_summary_service),
-    history_service: HistoryService = Depends(get_history_service)
+    background: bool = False,
+    job_queue: JobQueue = Depends(get_job_queue)
 ):
     """
     End the current session:
     1. Generate final summary
     2. Archive the session to history
     3. Clear the active room messages
-    """
-    # 1. Generate final analysis
-    analysis = await summary_service.generate_session_analysis(req.room_id)
-    
-    if "error" in analysis:
-        # If generation fails (e.g. no messages), we might still want to clear?
-        # But usually we'd want to warn.
-        # However, for "End Session", if there are no messages, we just clear and return empty.
-        # But let's proceed with archiving whatever we have or just skipping archival if empty.
-        pass
 
-    # 2. Archive
+    The work runs as a persisted background job. By default the request
+    waits for it and returns {"status", "analysis", "archived"} as before.
+    With ?background=true it returns 202 with a job id right away; poll
+    /history/jobs/{job_id} (or stream /history/jobs/{job_id}/events).
+    """
     # Extract user_id from request headers
     user_id = request.headers.get("X-User-ID")
     if not user_id:
         raise HTTPException(status_code=401, detail="User not authenticated")
-    
-    success = await history_service.archive_session(req.room_id, user_id, analysis)
-    
-    if not success:
-        # It might fail if table doesn't exist, but we still return the analysis so frontend can show summary.
-        # We also cleared the session in 'archive_session' only if save was successful.
-        # If save failed, we might NOT want to clear, to prevent data loss.
-        # But if the user really wants to end... 
-        pass
 
-    return {
-        "status": "success",
-        "analysis": analysis,
-        "archived": success
-    }
+    # A double-clicked "End Session" joins the job already queued for the room
+    job = job_queue.enqueue(
+        "end_session",
+        {"room_id": req.room_id, "user_id": user_id},
+        dedupe_key=f"end_session:{req.room_id}"
+    )
+
+    if background:
+        return JSONResponse(status_code=202, content={
+            "status": "accepted",
+            "job_id": job["job_id"],
+            "job_status": job["status"]
+        })
+
+    while job is not None and job["status"] in ACTIVE_STATUSES:
+        job = await job_queue.wait_for_update(job["job_id"], timeout=15, since=job["updated_at"])
+    if job is None or job["status"] != JOB_DONE:
+        raise HTTPException(status_code=500, detail=(job or {}).get("error") or "End session failed")
+    return job["result"]
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(
+    job_id: str,
+    job_queue: JobQueue = Depends(get_job_queue)
+):
+    """
+    Status of a background job; includes the result once it is done.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_status(
+    job_id: str,
+    job_queue: JobQueue = Depends(get_job_queue)
+):
+    """
+    Server-Sent Events stream of a job's status until it finishes.
+    """
+    if job_queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        job = job_queue.get(job_id)
+        while job is not None:
+            yield format_sse("status", job)
+            if job["status"] not in ACTIVE_STATUSES:
+                return
+            # Wake on status change, or every few seconds as a keep-alive
+            job = await job_queue.wait_for_update(job_id, timeout=15, since=job["updated_at"])
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
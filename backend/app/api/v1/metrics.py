@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, HTTPException
+from app.dependencies import get_llm_client, get_orchestrator, get_precompute_scheduler
+from app.ai.llm_client import LLMClient
+from app.ai.orchestrator import AIOrchestrator
+from app.ai.usage import DIMENSIONS
+from app.services.precompute import PrecomputeScheduler
+
+router = APIRouter()
+
+@router.get("/llm")
+async def get_llm_metrics(
+    llm: LLMClient = Depends(get_llm_client)
+):
+    """
+    LLM layer counters (response cache hits/misses, etc.).
+    """
+    return llm.get_metrics()
+
+@router.get("/analysis")
+async def get_analysis_metrics(
+    orchestrator: AIOrchestrator = Depends(get_orchestrator)
+):
+    """
+    Analysis counters (agent result cache, translation memory, per-agent parse failures).
+    """
+    return orchestrator.get_metrics()
+
+@router.get("/usage")
+async def get_usage(
+    dimension: str = "session",
+    limit: int = 10,
+    llm: LLMClient = Depends(get_llm_client)
+):
+    """
+    Top LLM token consumers by agent, session (room) or user.
+    """
+    if dimension not in DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"dimension must be one of {', '.join(DIMENSIONS)}")
+    return {
+        "dimension": dimension,
+        "top": llm.usage.top(dimension, limit=max(1, min(limit, 100))),
+        "meter": llm.usage.stats(),
+    }
+
+@router.get("/precompute")
+async def get_precompute_metrics(
+    scheduler: PrecomputeScheduler = Depends(get_precompute_scheduler)
+):
+    """
+    Speculative idle-room analysis counters.
+    """
+    return scheduler.stats()
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from pydantic import BaseModel
 from app.dependencies import get_quiz_service
 from app.services.quiz_service import QuizService
@@ -11,9 +11,10 @@ class QuizRequest(BaseModel):
 @router.post("/generate")
 async def generate_quiz(
     req: QuizRequest,
+    request: Request,
     service: QuizService = Depends(get_quiz_service)
 ):
     """
     Generate assessment materials (MCQs, Flashcards) from the session.
     """
-    return await service.generate_quiz(req.session_id)
+    return await service.generate_quiz(req.session_id, user_id=request.headers.get("X-User-ID"))
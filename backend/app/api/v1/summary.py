@@ -1,14 +1,17 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
 from typing import Dict, Any, Optional
 from pydantic import BaseModel
 from app.dependencies import get_summary_service
 from app.services.summary_service import SummaryService
+from app.utils.sse import format_sse
 
 router = APIRouter()
 
 class SummaryRequest(BaseModel):
     session_id: str
     target_language: str = "English"
+    consolidated: Optional[bool] = None  # single combined LLM call; None = server default
 
 class SaveSummaryRequest(BaseModel):
     session_id: str
@@ -17,6 +20,7 @@ class SaveSummaryRequest(BaseModel):
 @router.post("/generate")
 async def generate_summary(
     req: SummaryRequest,
+    request: Request,
     service: SummaryService = Depends(get_summary_service)
 ):
     """
@@ -24,7 +28,33 @@ async def generate_summary(
     """
     return await service.generate_session_analysis(
         session_id=req.session_id,
-        target_language=req.target_language
+        target_language=req.target_language,
+        consolidated=req.consolidated,
+        user_id=request.headers.get("X-User-ID")
+    )
+
+@router.get("/stream/{session_id}")
+async def stream_summary(
+    session_id: str,
+    request: Request,
+    target_language: str = "English",
+    service: SummaryService = Depends(get_summary_service)
+):
+    """
+    Stream the AI analysis as Server-Sent Events.
+    Emits summary_delta chunks, one "agent" event per finished agent,
+    an optional "translation" event and a final "complete" event.
+    """
+    async def event_stream():
+        async for event in service.stream_session_analysis(
+            session_id, target_language, user_id=request.headers.get("X-User-ID")
+        ):
+            yield format_sse(event["event"], event["data"])
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 @router.get("/{session_id}")
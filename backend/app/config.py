@@ -1,3 +1,5 @@
+import os
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -14,10 +16,122 @@ class Settings(BaseSettings):
     LLM_MODEL: str = "gemini-1.5-flash"
     LLM_TEMPERATURE: float = 0.3
 
+    # Per-agent routing by transcript size (see app/ai/routing.py). Off by default.
+    # Routes are tried in order; an empty "model" means LLM_MODEL, so the defaults
+    # only size the output budget. Set a route's model (e.g. "gemini-1.5-flash-8b")
+    # to send small rooms to a lighter model.
+    LLM_ROUTING_ENABLED: bool = False
+    LLM_ROUTES: list[dict] = [
+        {"name": "small", "max_transcript_tokens": 2000, "model": "",
+         "output_multiplier": 12, "min_output_tokens": 384, "max_output_tokens": 1536},
+        {"name": "medium", "max_transcript_tokens": 12000, "model": "",
+         "output_multiplier": 20, "min_output_tokens": 768, "max_output_tokens": 2048},
+        {"name": "large", "max_transcript_tokens": None, "model": "",
+         "output_multiplier": 40, "min_output_tokens": 1024, "max_output_tokens": 4096},
+    ]
+    LLM_BACKEND: str = "gemini"  # "gemini" | "fake" (offline, for load tests and benchmarks)
+
+    # Fake backend (LLM_BACKEND=fake or LLM_MODEL=fake*)
+    LLM_FAKE_LATENCY: str = "fixed"  # "fixed" | "lognormal" | "recorded"
+    LLM_FAKE_LATENCY_MS: float = 50.0  # fixed value, or lognormal median
+    LLM_FAKE_LATENCY_SIGMA: float = 0.5  # lognormal shape
+    LLM_FAKE_LATENCY_FILE: str | None = None  # recorded samples, one ms value per line
+    LLM_FAKE_ERROR_RATE: float = 0.0
+    LLM_FAKE_SEED: int | None = None
+
+    # LLM response cache
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 512
+    LLM_CACHE_TTL_SECONDS: int = 3600
+    LLM_CACHE_DB_PATH: str | None = None  # e.g. "llm_cache.sqlite3" to persist across restarts
+
+    # Translation memory: per-string translations reused across sessions
+    TRANSLATION_MEMORY_MAX_ENTRIES: int = 20000
+    TRANSLATION_MEMORY_DB_PATH: str | None = None  # e.g. "translations.sqlite3"
+    TRANSLATION_BATCH_SIZE: int = 40  # strings per LLM call
+
+    # uvicorn worker processes on this host; 0 reads WEB_CONCURRENCY (which
+    # `uvicorn --workers` also defaults to), else 1. The LLM limits below
+    # are for the whole host and split evenly between the workers.
+    APP_WORKERS: int = 0
+
+    # LLM admission control and retries (0 disables a per-minute limit)
+    LLM_MAX_CONCURRENCY: int = 4
+    LLM_REQUESTS_PER_MINUTE: int = 60
+    LLM_TOKENS_PER_MINUTE: int = 1000000
+    # Fair-share weights per priority class (interactive, archive, precompute, backfill)
+    LLM_PRIORITY_WEIGHTS: dict[str, float] = {"interactive": 8.0, "archive": 4.0, "precompute": 2.0, "backfill": 1.0}
+    LLM_INTERACTIVE_RESERVED_SLOTS: int = 1  # of LLM_MAX_CONCURRENCY, never given to background work
+    LLM_MAX_RETRIES: int = 4
+    LLM_RETRY_BASE_DELAY_SECONDS: float = 1.0
+    LLM_RETRY_MAX_DELAY_SECONDS: float = 20.0
+    LLM_RETRY_DEADLINE_SECONDS: float = 60.0
+
+    # Session analysis
+    ANALYSIS_CONSOLIDATED_MODE: bool = False  # one combined prompt instead of one per agent
+    ANALYSIS_CONSOLIDATED_MAX_TOKENS: int = 8000
+    # Transcripts estimated above this many tokens are split into windows,
+    # analysed per window and merged (map-reduce)
+    LLM_TRANSCRIPT_TOKEN_BUDGET: int = 12000
+    # Compact transcripts before prompting (short speaker handles, no resends/noise)
+    TRANSCRIPT_COMPACTION_ENABLED: bool = True
+    # Ask the model to fix its JSON when local repair fails (one extra cheap call)
+    LLM_JSON_REPAIR_REASK: bool = True
+    # Deadlines (seconds, 0 = none). Agents that miss them are reported under
+    # "pending_agents" and finish in the background for the next request.
+    ANALYSIS_TOTAL_TIMEOUT_SECONDS: float = 45.0
+    ANALYSIS_AGENT_TIMEOUT_SECONDS: float = 0.0
+    ANALYSIS_AGENT_TIMEOUTS: dict[str, float] = {}  # per-agent overrides, e.g. {"quiz": 20}
+    ANALYSIS_RESULT_CACHE_ENTRIES: int = 256
+    # Re-analysis after new messages updates the previous result from just
+    # the new messages; a full rebuild is forced past either drift limit
+    ANALYSIS_DELTA_ENABLED: bool = True
+    ANALYSIS_DELTA_MAX_NEW_RATIO: float = 0.5  # new messages / messages already covered
+    ANALYSIS_DELTA_MAX_CHAIN: int = 5  # incremental updates in a row
+    ANALYSIS_RESULT_CACHE_TTL_SECONDS: int = 3600
+
+    # LLM usage metering (tokens per agent / room / user)
+    USAGE_MAX_KEYS: int = 1000  # tracked keys per dimension kept in memory
+    USAGE_DB_PATH: str | None = None  # e.g. "llm_usage.sqlite3" to keep running totals
+    USAGE_FLUSH_INTERVAL_SECONDS: float = 30.0
+    # Per-room token budgets (0 = unlimited); over budget, requests are
+    # rejected or downgraded to a single consolidated call. With several
+    # workers, set USAGE_DB_PATH so they check the shared (flushed) totals.
+    USAGE_ROOM_TOKEN_BUDGET: int = 0
+    USAGE_ROOM_BUDGETS: dict[str, int] = {}  # per-room overrides, e.g. {"room-1": 200000}
+    USAGE_BUDGET_ACTION: str = "reject"  # "reject" | "downgrade"
+
+    # Speculative analysis of rooms that have gone quiet, so "End Session"
+    # finds the results already cached
+    PRECOMPUTE_ENABLED: bool = True
+    PRECOMPUTE_IDLE_SECONDS: float = 120.0
+    PRECOMPUTE_SCAN_INTERVAL_SECONDS: float = 15.0
+    PRECOMPUTE_MAX_CONCURRENT: int = 1
+    PRECOMPUTE_MIN_MESSAGES: int = 4
+
+    # Background jobs (/history/end)
+    JOB_QUEUE_DB_PATH: str = "job_queue.sqlite3"  # ":memory:" disables persistence
+    JOB_QUEUE_WORKERS: int = 2
+    JOB_QUEUE_RETENTION_SECONDS: int = 86400
+    # Running jobs whose worker missed heartbeats this long are run again elsewhere
+    JOB_QUEUE_HEARTBEAT_SECONDS: float = 10.0
+    JOB_QUEUE_STALE_SECONDS: float = 60.0
+    # A job whose worker went stale this many times is failed, not run again
+    JOB_QUEUE_MAX_ATTEMPTS: int = 3
+
+    # Chat message storage when Supabase is not configured: "memory" (one
+    # process) or "sqlite" (a local WAL database shared by every worker)
+    TEMP_MEMORY_BACKEND: str = "memory"
+    TEMP_MEMORY_DB_PATH: str = "temp_memory.sqlite3"
+
     # Privacy / Memory
-    TEMP_MEMORY_TTL_SECONDS: int = 3600  # 1 hour
+    TEMP_MEMORY_TTL_SECONDS: int = 3600  # 1 hour of inactivity
+    TEMP_MEMORY_SWEEP_INTERVAL_SECONDS: float = 60.0
     AUTO_DELETE_UNAPPROVED: bool = True
 
+    # Chat history paging (/chat/history?after=<cursor>&limit=N)
+    CHAT_HISTORY_MAX_PAGE: int = 500
+
     # Supabase
     SUPABASE_URL: str | None = None
     SUPABASE_KEY: str | None = None
@@ -30,6 +144,15 @@ class Settings(BaseSettings):
         "https://voluble-duckanoo-3d70b3.netlify.app"
     ]
 
+    @property
+    def worker_count(self) -> int:
+        if self.APP_WORKERS > 0:
+            return self.APP_WORKERS
+        try:
+            return max(1, int(os.environ.get("WEB_CONCURRENCY", "1")))
+        except ValueError:
+            return 1
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class ExpiryEngine:
+    """
+    Expires keys `ttl_seconds` after their last activity.
+
+    Deadlines live in an OrderedDict kept in last-activity order: touching
+    a key moves it to the end, so expired keys are always at the front.
+    Touch, discard and each expiry are O(1); a sweep stops at the first key
+    that is still live, so its cost is proportional to what it removes.
+
+    Keys are expired lazily (`expired(key)` on access) and by an optional
+    background asyncio sweeper; either way `on_expire(key)` is called once.
+    A ttl of 0 (or less) disables expiry.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        on_expire: Optional[Callable[[Hashable], None]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.on_expire = on_expire
+        self.clock = clock
+        self._deadlines: "OrderedDict[Hashable, float]" = OrderedDict()
+        self._sweeper: Optional[asyncio.Task] = None
+        self.expired_count = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._deadlines
+
+    # -----------------------------
+    # Tracking
+    # -----------------------------
+
+    def touch(self, key: Hashable) -> None:
+        """
+        Record activity on `key`, pushing its deadline out by the ttl.
+        """
+        if not self.enabled:
+            return
+        self._deadlines[key] = self.clock() + self.ttl_seconds
+        self._deadlines.move_to_end(key)
+
+    def discard(self, key: Hashable) -> None:
+        """
+        Stop tracking `key` (it was removed by other means).
+        """
+        self._deadlines.pop(key, None)
+
+    def clear(self) -> None:
+        self._deadlines.clear()
+
+    # -----------------------------
+    # Expiry
+    # -----------------------------
+
+    def expired(self, key: Hashable) -> bool:
+        """
+        Lazy check on access: expire `key` now if its deadline has passed.
+        """
+        deadline = self._deadlines.get(key)
+        if deadline is None or deadline > self.clock():
+            return False
+        del self._deadlines[key]
+        self._expire(key)
+        return True
+
+    def sweep(self) -> int:
+        """
+        Expire every key whose deadline has passed. Returns how many.
+        """
+        now = self.clock()
+        count = 0
+        while self._deadlines:
+            key, deadline = next(iter(self._deadlines.items()))
+            if deadline > now:
+                break
+            self._deadlines.popitem(last=False)
+            self._expire(key)
+            count += 1
+        return count
+
+    def _expire(self, key: Hashable) -> None:
+        self.expired_count += 1
+        if self.on_expire is None:
+            return
+        try:
+            self.on_expire(key)
+        except Exception as e:
+            print(f"Error expiring {key}: {e}")
+
+    # -----------------------------
+    # Background sweeper
+    # -----------------------------
+
+    def start_sweeper(self, interval_seconds: float) -> None:
+        if not self.enabled or self._sweeper is not None or interval_seconds <= 0:
+            return
+
+        async def run() -> None:
+            while True:
+                await asyncio.sleep(interval_seconds)
+                self.sweep()
+
+        self._sweeper = asyncio.create_task(run())
+
+    async def stop_sweeper(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "tracked": len(self._deadlines),
+            "expired": self.expired_count,
+        }
@@ -1,6 +1,8 @@
 from typing import List, Dict
-from datetime import datetime, timedelta
+from datetime import datetime
+from itertools import count
 from app.core.constants import TEMP_MEMORY_RETENTION
+from app.core.expiry import ExpiryEngine
 
 class TempMemory:
     """
@@ -8,15 +10,39 @@ class TempMemory:
     Auto-deletes messages older than TEMP_MEMORY_RETENTION.
     """
 
-    def __init__(self):
-        self.messages: List[Dict] = []
+    def __init__(self, retention_seconds: float = TEMP_MEMORY_RETENTION):
+        self._messages: List[Dict] = []
+        # Expired messages still in _messages, oldest first. They are cut
+        # out in one go (see _compact) instead of one O(n) delete each
+        self._expired: List[Dict] = []
+        # Expiry key -> message, so an expired message can be found again
+        self._entries: Dict[int, Dict] = {}
+        self._ids = count()
+        self.expiry = ExpiryEngine(retention_seconds, on_expire=self._drop)
+
+    @property
+    def messages(self) -> List[Dict]:
+        """
+        The live messages, as a plain list: callers may read and change it
+        directly, as when it was a plain attribute.
+        """
+        self._compact()
+        return self._messages
+
+    @messages.setter
+    def messages(self, messages: List[Dict]):
+        self._messages = messages
+        self._expired = []
 
     def add_message(self, message: Dict):
         """
         Add a new chat message with timestamp.
         """
         message["received_at"] = datetime.utcnow()
-        self.messages.append(message)
+        key = next(self._ids)
+        self._messages.append(message)
+        self._entries[key] = message
+        self.expiry.touch(key)
         self.cleanup()
 
     def get_all_messages(self) -> List[Dict]:
@@ -31,13 +57,36 @@ class TempMemory:
         Clear all temporary messages (e.g., after approval or host cancel).
         """
         self.messages = []
+        self._entries.clear()
+        self.expiry.clear()
 
     def cleanup(self):
         """
         Remove messages older than retention time.
         """
-        now = datetime.utcnow()
-        self.messages = [
-            msg for msg in self.messages
-            if now - msg["received_at"] <= timedelta(seconds=TEMP_MEMORY_RETENTION)
-        ]
+        self.expiry.sweep()
+        # Cut the expired head once it is half the list: amortized O(1) per
+        # message. Every read of .messages cuts it first anyway
+        if len(self._expired) * 2 >= len(self._messages):
+            self._compact()
+
+    def _drop(self, key: int):
+        message = self._entries.pop(key, None)
+        if message is not None:
+            self._expired.append(message)
+
+    def _compact(self):
+        if not self._expired:
+            return
+        expired, self._expired = self._expired, []
+        # Arrival order is also expiry order, so these are normally the
+        # head of the list and one slice removes them all
+        head = 0
+        while head < len(expired) and head < len(self._messages) and self._messages[head] is expired[head]:
+            head += 1
+        if head == len(expired):
+            del self._messages[:head]
+            return
+        # The list was changed from outside; some may be gone already
+        dropped = {id(message) for message in expired}
+        self._messages[:] = [kept for kept in self._messages if id(kept) not in dropped]
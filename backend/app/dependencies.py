@@ -1,12 +1,18 @@
+from typing import List
 from fastapi import Depends
 from app.storage.temp_memory import TempMemory
+from app.storage.sqlite_memory import SQLiteTempMemory
 from app.storage.supabase_storage import SupabaseStorage
 from app.storage.knowledge_store import KnowledgeStore
 from app.ai.llm_client import LLMClient
+from app.ai.orchestrator import AIOrchestrator
 from app.services.chat_service import ChatService
 from app.services.summary_service import SummaryService
 from app.services.analytics_service import AnalyticsService
 from app.services.quiz_service import QuizService
+from app.services.history_service import HistoryService
+from app.services.job_queue import JobQueue
+from app.services.precompute import PrecomputeScheduler
 from app.config import settings
 
 # -----------------------------
@@ -16,7 +22,11 @@ if settings.SUPABASE_URL and settings.SUPABASE_KEY:
     _temp_memory = SupabaseStorage()
     _knowledge_store = _temp_memory # Unified Supabase storage
 else:
-    _temp_memory = TempMemory()
+    if settings.TEMP_MEMORY_BACKEND == "sqlite":
+        # Shared by every uvicorn worker on this host
+        _temp_memory = SQLiteTempMemory(settings.TEMP_MEMORY_DB_PATH)
+    else:
+        _temp_memory = TempMemory()
     _knowledge_store = KnowledgeStore()
 
 
@@ -50,6 +60,24 @@ def get_llm_client():
     """
     return _llm_client
 
+# -----------------------------
+# AI orchestrator singleton
+# -----------------------------
+# One orchestrator for every service, so agent results cached per
+# transcript are shared (e.g. /quiz/generate after /summary/generate).
+_orchestrator = AIOrchestrator(_llm_client)
+# Any change to a session drops its cached results
+_temp_memory.add_listener(_orchestrator.results.invalidate_session)
+# A store shared by several workers also reports the changes made by the others
+if hasattr(_temp_memory, "session_generation"):
+    _orchestrator.results.generation_source = _temp_memory.session_generation
+
+def get_orchestrator():
+    """
+    Dependency: provide the shared AIOrchestrator
+    """
+    return _orchestrator
+
 # -----------------------------
 # Services
 # -----------------------------
@@ -62,11 +90,47 @@ _summary_service = SummaryService(
     temp_memory=_temp_memory,
     knowledge_store=_knowledge_store,
     llm_client=_llm_client,
-    analytics_service=_analytics_service
+    analytics_service=_analytics_service,
+    orchestrator=_orchestrator
 )
 _quiz_service = QuizService(
     temp_memory=_temp_memory,
-    llm_client=_llm_client
+    llm_client=_llm_client,
+    orchestrator=_orchestrator
+)
+_history_service = HistoryService(storage=_temp_memory, history_store=_knowledge_store)
+
+# -----------------------------
+# Background jobs
+# -----------------------------
+_job_queue = JobQueue(
+    db_path=settings.JOB_QUEUE_DB_PATH,
+    workers=settings.JOB_QUEUE_WORKERS,
+    retention_seconds=settings.JOB_QUEUE_RETENTION_SECONDS,
+    heartbeat_seconds=settings.JOB_QUEUE_HEARTBEAT_SECONDS,
+    stale_after_seconds=settings.JOB_QUEUE_STALE_SECONDS,
+    max_attempts=settings.JOB_QUEUE_MAX_ATTEMPTS
+)
+
+async def _run_end_session_job(payload):
+    return await _history_service.end_session(
+        room_id=payload["room_id"],
+        user_id=payload["user_id"],
+        summary_service=_summary_service
+    )
+
+_job_queue.register_handler("end_session", _run_end_session_job)
+
+# -----------------------------
+# Speculative analysis of idle rooms
+# -----------------------------
+_precompute_scheduler = PrecomputeScheduler(
+    temp_memory=_temp_memory,
+    summary_service=_summary_service,
+    idle_seconds=settings.PRECOMPUTE_IDLE_SECONDS,
+    scan_interval_seconds=settings.PRECOMPUTE_SCAN_INTERVAL_SECONDS,
+    max_concurrent=settings.PRECOMPUTE_MAX_CONCURRENT,
+    min_messages=settings.PRECOMPUTE_MIN_MESSAGES
 )
 
 def get_chat_service():
@@ -80,3 +144,49 @@ def get_analytics_service():
 
 def get_quiz_service():
     return _quiz_service
+
+def get_history_service():
+    return _history_service
+
+def get_job_queue():
+    return _job_queue
+
+def get_precompute_scheduler():
+    return _precompute_scheduler
+
+# -----------------------------
+# Several uvicorn workers
+# -----------------------------
+def multi_worker_warnings() -> List[str]:
+    """
+    Settings that do not hold up when settings.worker_count processes
+    share this host; printed at startup. LLM concurrency and per-minute
+    limits are already split between the workers (see LLMClient).
+    """
+    workers = settings.worker_count
+    if workers <= 1:
+        return []
+    warnings = []
+    if isinstance(_temp_memory, TempMemory):
+        warnings.append(
+            f"TEMP_MEMORY_BACKEND=memory keeps rooms per process, so each of the {workers} workers "
+            "sees different rooms; use TEMP_MEMORY_BACKEND=sqlite or Supabase"
+        )
+    elif settings.PRECOMPUTE_ENABLED and not hasattr(_temp_memory, "claim_analysis"):
+        warnings.append(
+            "speculative analysis is not coordinated between workers with Supabase storage, "
+            "so a room may be analysed once per worker; consider PRECOMPUTE_ENABLED=False"
+        )
+    if settings.JOB_QUEUE_DB_PATH == ":memory:":
+        warnings.append("JOB_QUEUE_DB_PATH=:memory: keeps jobs per worker; /history/jobs may not find another worker's job")
+    if (settings.USAGE_ROOM_TOKEN_BUDGET > 0 or settings.USAGE_ROOM_BUDGETS) and not settings.USAGE_DB_PATH:
+        warnings.append(
+            f"room token budgets are counted per worker, so a room can spend up to {workers}x its budget; "
+            "set USAGE_DB_PATH to share the totals"
+        )
+    if settings.LLM_MAX_CONCURRENCY < workers:
+        warnings.append(
+            f"LLM_MAX_CONCURRENCY={settings.LLM_MAX_CONCURRENCY} is below the {workers} workers; "
+            f"each still gets one slot, {workers} in total"
+        )
+    return warnings
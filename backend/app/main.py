@@ -1,6 +1,10 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
+from app.dependencies import (
+    get_job_queue, get_llm_client, get_precompute_scheduler, get_temp_memory, multi_worker_warnings
+)
 
 # API routers
 from app.api.v1.chat import router as chat_router
@@ -8,12 +12,37 @@ from app.api.v1.summary import router as summary_router
 from app.api.v1.analytics import router as analytics_router
 from app.api.v1.quiz import router as quiz_router
 from app.api.v1.history import router as history_router
+from app.api.v1.metrics import router as metrics_router
+
+# Background workers live as long as the app
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    for warning in multi_worker_warnings():
+        print(f"WARNING: {warning}")
+    job_queue = get_job_queue()
+    usage = get_llm_client().usage
+    await job_queue.start()
+    usage.start_flusher(settings.USAGE_FLUSH_INTERVAL_SECONDS)
+    precompute = get_precompute_scheduler()
+    if settings.PRECOMPUTE_ENABLED:
+        precompute.start()
+    # Delete idle in-memory or SQLite sessions (the Supabase store has no expiry engine)
+    expiry = getattr(get_temp_memory(), "expiry", None)
+    if expiry is not None:
+        expiry.start_sweeper(settings.TEMP_MEMORY_SWEEP_INTERVAL_SECONDS)
+    yield
+    if expiry is not None:
+        await expiry.stop_sweeper()
+    await precompute.stop()
+    await job_queue.stop()
+    await usage.stop_flusher()
 
 # App initialization
 app = FastAPI(
     title="AI Smart Study Collaboration Room",
     description="Privacy-first AI-powered collaborative learning platform",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # CORS (for frontend connection)
@@ -39,3 +68,4 @@ app.include_router(summary_router, prefix="/api/v1/summary", tags=["Summary"])
 app.include_router(analytics_router, prefix="/api/v1/analytics", tags=["Analytics"])
 app.include_router(quiz_router, prefix="/api/v1/quiz", tags=["Quiz"])
 app.include_router(history_router, prefix="/api/v1/history", tags=["History"])
+app.include_router(metrics_router, prefix="/api/v1/metrics", tags=["Metrics"])
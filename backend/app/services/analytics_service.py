@@ -5,6 +5,8 @@ from app.storage.knowledge_store import KnowledgeStore
 class AnalyticsService:
     """
     Handles peer learning analytics and participant contribution metrics.
+    Live sessions are read from the storage's running per-session
+    aggregates (see SessionAggregate), never by rescanning the messages.
     """
     def __init__(self, temp_memory: TempMemory, knowledge_store: KnowledgeStore):
         self.temp_memory = temp_memory
@@ -14,26 +16,19 @@ class AnalyticsService:
         """
         Generate engagement and contribution metrics for a session.
         """
-        messages = self.temp_memory.get_session_messages(session_id)
-        if not messages:
+        aggregate = self.temp_memory.get_session_aggregate(session_id)
+        if aggregate is None:
             # Check if we have a saved summary with analytics
             summary = self.knowledge_store.get_summary(session_id)
             if summary and "stats" in summary:
                 return summary.get("analytics", {"info": "Detailed engagement data not persisted in summary, but stats are available."})
             return {"error": "No data"}
 
-        user_counts = {}
-        total_user_msgs = 0
-
-        for msg in messages:
-            if msg.get("role") == "user":
-                uid = msg.get("user_id", "anonymous")
-                user_counts[uid] = user_counts.get(uid, 0) + 1
-                total_user_msgs += 1
+        total_user_msgs = aggregate.user_message_count
 
         # Calculate contribution scores
         contribution_scores = []
-        for uid, count in user_counts.items():
+        for uid, count in aggregate.user_message_counts.items():
             score = (count / total_user_msgs) * 100 if total_user_msgs > 0 else 0
             contribution_scores.append({
                 "user_id": uid,
@@ -42,9 +37,13 @@ class AnalyticsService:
             })
 
         return {
-            "total_messages": len(messages),
+            "total_messages": aggregate.message_count,
             "user_messages": total_user_msgs,
             "participant_contributions": contribution_scores,
+            "response_gaps": {
+                "mean_seconds": round(aggregate.gap_mean, 2),
+                "stdev_seconds": round(aggregate.gap_stdev, 2),
+            },
             "session_id": session_id
         }
     def get_session_stats(self, session_id: str) -> Dict[str, Any]:
@@ -53,31 +52,19 @@ class AnalyticsService:
         """
         try:
             # Try temp memory first
-            messages = self.temp_memory.get_session_messages(session_id)
-            if not messages:
+            aggregate = self.temp_memory.get_session_aggregate(session_id)
+            if aggregate is None:
                 # Fallback to persistent summary
                 summary = self.knowledge_store.get_summary(session_id)
                 if summary and "stats" in summary:
                     return summary["stats"]
                 return {"message_count": 0, "user_message_count": 0, "insight_count": 0, "duration_mins": 0}
 
-            msg_count = len(messages)
-            user_msg_count = len([m for m in messages if m.get("role") == "user"])
-            
-            # Calculate approximate duration based on first and last message
-            duration_mins = 0
-            if len(messages) > 1:
-                try:
-                    from datetime import datetime
-                    t1_str = messages[0].get("timestamp", "")
-                    t2_str = messages[-1].get("timestamp", "")
-                    if t1_str and t2_str:
-                        t1 = datetime.fromisoformat(t1_str.replace('Z', '+00:00'))
-                        t2 = datetime.fromisoformat(t2_str.replace('Z', '+00:00'))
-                        duration_mins = round((t2 - t1).total_seconds() / 60)
-                except Exception as e:
-                    print(f"Error calculating duration: {e}")
-                    pass
+            msg_count = aggregate.message_count
+            user_msg_count = aggregate.user_message_count
+
+            # Approximate duration from the first and last message
+            duration_mins = round(aggregate.duration_seconds / 60)
 
             return {
                 "message_count": msg_count,
@@ -96,15 +83,15 @@ class AnalyticsService:
         """
         try:
             # Try temp memory first
-            messages = self.temp_memory.get_session_messages(session_id)
-            if not messages:
+            aggregate = self.temp_memory.get_session_aggregate(session_id)
+            if aggregate is None:
                 # Fallback to persistent summary
                 summary = self.knowledge_store.get_summary(session_id)
                 if summary and "skills" in summary:
                     return {"signals": summary["skills"]}
                 return {"signals": []}
 
-            user_msgs = len([m for m in messages if m.get("role") == "user"])
+            user_msgs = aggregate.user_message_count
             
             # If we have live messages, we can't easily guess skills without LLM.
             # So we return a placeholder that will be replaced by the SummaryAgent's analysis
@@ -1,5 +1,7 @@
 from typing import Any, Dict, List
+from app.config import settings
 from app.storage.temp_memory import TempMemory
+from app.storage.message_record import message_dict
 
 class ChatService:
     """
@@ -18,18 +20,43 @@ class ChatService:
         """
         Add a new message to the session's temporary memory.
         """
-        return self.temp_memory.add_message(
+        return message_dict(self.temp_memory.add_message(
             session_id=session_id,
             user_id=user_id,
             role=role,
             content=content
-        )
+        ))
 
-    def get_history(self, session_id: str) -> List[Dict[str, Any]]:
+    def get_history(
+        self,
+        session_id: str,
+        after: str | None = None,
+        limit: int | None = None
+    ) -> Dict[str, Any]:
         """
-        Get all messages for a specific session.
+        Get the session's messages after the cursor `after` (a message seq
+        or id; none for the whole history), a page of at most `limit`.
+
+        Returns {"messages", "next_cursor", "has_more"}; passing next_cursor
+        back as `after` fetches only what arrived since.
         """
-        return self.temp_memory.get_session_messages(session_id)
+        limit = max(1, min(limit or settings.CHAT_HISTORY_MAX_PAGE, settings.CHAT_HISTORY_MAX_PAGE))
+        cursor: int | str | None = int(after) if after and after.isdigit() else (after or None)
+
+        # One extra row tells whether another page follows
+        page = self.temp_memory.get_messages_after(session_id, after=cursor, limit=limit + 1)
+        has_more = len(page) > limit
+        messages = [message_dict(m) for m in page[:limit]]
+
+        next_cursor = after or None
+        if messages:
+            last = messages[-1]
+            next_cursor = str(last.get("seq") or last.get("id"))
+        return {
+            "messages": messages,
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+        }
 
     def clear_session(self, session_id: str) -> None:
         """
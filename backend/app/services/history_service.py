@@ -1,32 +1,58 @@
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from app.storage.supabase_storage import SupabaseStorage
+from app.ai.rate_limiter import PRIORITY_ARCHIVE, priority_scope
 
 class HistoryService:
-    def __init__(self, storage: SupabaseStorage):
+    """
+    Archives ended sessions. `storage` holds the live chat messages and
+    `history_store` the archive (SupabaseStorage for both with Supabase,
+    otherwise the chat memory plus the KnowledgeStore).
+    """
+    def __init__(self, storage: SupabaseStorage, history_store: Any = None):
         self.storage = storage
+        self.history_store = history_store if history_store is not None else storage
 
     def get_session_history(self, room_id: str) -> List[Dict[str, Any]]:
         """
         Get list of past sessions for a specific room.
         """
-        return self.storage.get_history(room_id)
+        return self.history_store.get_history(room_id)
 
     def get_user_sessions(self, user_id: str) -> List[Dict[str, Any]]:
         """
         Get all sessions for a specific user across all rooms.
         """
-        return self.storage.get_user_history(user_id)
+        return self.history_store.get_user_history(user_id)
 
     async def archive_session(self, room_id: str, user_id: str, session_data: Dict[str, Any]) -> bool:
         """
         Archive the current session's summary and stats, then clear active messages.
         """
         # 1. Save the comprehensive summary to the history table
-        success = self.storage.save_history_entry(room_id, user_id, session_data)
+        success = self.history_store.save_history_entry(room_id, user_id, session_data)
         
         if success:
             # 2. Clear the active messages for this room to start fresh
             self.storage.clear_session(room_id)
             return True
         return False
+
+    async def end_session(self, room_id: str, user_id: str, summary_service: Any) -> Dict[str, Any]:
+        """
+        Full "End Session" flow: generate the final analysis, archive it
+        and clear the room. Runs as a background job (see JobQueue).
+        """
+        # 1. Generate final analysis (queued behind interactive LLM calls)
+        with priority_scope(PRIORITY_ARCHIVE):
+            analysis = await summary_service.generate_session_analysis(room_id, user_id=user_id)
+
+        # 2. Archive (clears the active messages only if the save succeeded,
+        # so a failed save does not lose the chat)
+        success = await self.archive_session(room_id, user_id, analysis)
+
+        return {
+            "status": "success",
+            "analysis": analysis,
+            "archived": success
+        }
@@ -0,0 +1,384 @@
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Job lifecycle
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+ACTIVE_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class JobQueue:
+    """
+    Small persistent background job queue.
+
+    Jobs are stored in a local SQLite file so queued or interrupted work
+    is picked up again after a restart. A fixed pool of asyncio workers
+    bounds how many jobs run at once.
+
+    Several processes (uvicorn --workers N) may share the file. A job is
+    claimed with one conditional UPDATE, so only one of them runs it.
+    The owner refreshes a heartbeat on its running jobs; a running job
+    whose heartbeat is older than `stale_after_seconds` belongs to a dead
+    process and is queued again, up to `max_attempts` runs in all: a job
+    that keeps killing its worker is then marked failed.
+    """
+
+    def __init__(
+        self,
+        db_path: str = ":memory:",
+        workers: int = 2,
+        retention_seconds: int = 86400,
+        heartbeat_seconds: float = 10.0,
+        stale_after_seconds: float = 60.0,
+        max_attempts: int = 3,
+        busy_timeout_ms: int = 5000
+    ):
+        self.db_path = db_path
+        self.workers = workers
+        self.retention_seconds = retention_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_after_seconds = stale_after_seconds
+        self.max_attempts = max_attempts
+        # Identifies this queue in the jobs it claims
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._handlers: Dict[str, JobHandler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        # Ids waiting in self._queue, so a periodic scan does not add them twice
+        self._waiting: set[str] = set()
+        self._tasks: List[asyncio.Task] = []
+        self._heartbeat: Optional[asyncio.Task] = None
+        # job_id -> event set whenever that job changes status
+        self._updates: Dict[str, asyncio.Event] = {}
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=busy_timeout_ms / 1000)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+        if db_path != ":memory:":
+            # Readers do not block the writer, so other workers can poll meanwhile
+            self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " dedupe_key TEXT,"
+            " status TEXT NOT NULL,"
+            " result TEXT,"
+            " error TEXT,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " owner TEXT,"
+            " heartbeat REAL,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        # Job files written before owner/heartbeat existed
+        columns = {row["name"] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner", "TEXT"), ("heartbeat", "REAL")):
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs (dedupe_key, status)")
+        self._db.commit()
+
+    # -----------------------------
+    # Setup / lifecycle
+    # -----------------------------
+
+    def register_handler(self, kind: str, handler: JobHandler) -> None:
+        """
+        Register the coroutine that processes jobs of a given kind.
+        """
+        self._handlers[kind] = handler
+
+    async def start(self) -> None:
+        """
+        Start the worker pool and pick up queued work, including jobs left
+        running by a process that has since died.
+        """
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._prune()
+        self._requeue_stale()
+
+        with self._lock:
+            pending = self._db.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (JOB_QUEUED,)
+            ).fetchall()
+        for row in pending:
+            self._put(row["id"])
+
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._heartbeat = asyncio.create_task(self._beat())
+
+    async def stop(self) -> None:
+        """
+        Stop the workers. Unfinished jobs stay persisted: the ones this queue
+        was running are queued again for the next start (or another worker).
+        A clean stop does not count against the job's attempts.
+        """
+        tasks = self._tasks + ([self._heartbeat] if self._heartbeat is not None else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._heartbeat = None
+
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, attempts = MAX(attempts - 1, 0), updated_at = ?"
+                " WHERE status = ? AND owner = ?",
+                (JOB_QUEUED, time.time(), JOB_RUNNING, self.owner),
+            )
+            self._db.commit()
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], dedupe_key: str | None = None) -> Dict[str, Any]:
+        """
+        Persist a new job and hand it to the workers.
+        If dedupe_key matches a job that is still queued or running,
+        that job is returned instead of creating a duplicate.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+
+        now = time.time()
+        with self._lock:
+            # The lock only covers this process: take the write lock on the
+            # file before the check, so other workers cannot insert in between
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                if dedupe_key is not None:
+                    row = self._db.execute(
+                        "SELECT * FROM jobs WHERE dedupe_key = ? AND status IN (?, ?) ORDER BY created_at LIMIT 1",
+                        (dedupe_key, *ACTIVE_STATUSES),
+                    ).fetchone()
+                    if row is not None:
+                        self._db.commit()
+                        return self._to_dict(row)
+
+                job_id = str(uuid.uuid4())
+                self._db.execute(
+                    "INSERT INTO jobs (id, kind, payload, dedupe_key, status, created_at, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, kind, json.dumps(payload), dedupe_key, JOB_QUEUED, now, now),
+                )
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+
+        if self._queue is not None:
+            self._put(job_id)
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Current status (and result once finished) of a job.
+        """
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    async def wait_for_update(
+        self,
+        job_id: str,
+        timeout: float,
+        since: float | None = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Block until the job changes or `timeout` seconds pass, then return it.
+        `since` is the updated_at the caller last saw: a change made before
+        this call returns at once instead of being missed.
+        Used by the SSE status stream and the blocking /history/end.
+        """
+        event = self._updates.setdefault(job_id, asyncio.Event())
+        # Clear first, then check: an update landing after the check sets
+        # the event again, so none is lost between the two
+        event.clear()
+        job = self.get(job_id)
+        if job is None or job["status"] not in ACTIVE_STATUSES:
+            return job
+        if since is not None and job["updated_at"] != since:
+            return job
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {
+            "workers": self.workers,
+            "running_workers": len(self._tasks),
+            "jobs": {row["status"]: row["n"] for row in rows},
+        }
+
+    # -----------------------------
+    # Workers
+    # -----------------------------
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            self._waiting.discard(job_id)
+            try:
+                await self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        now = time.time()
+        with self._lock:
+            # Atomic claim: of all the workers that hold this id, one wins
+            claimed = self._db.execute(
+                "UPDATE jobs SET status = ?, owner = ?, heartbeat = ?, attempts = attempts + 1, updated_at = ?"
+                " WHERE id = ? AND status = ?",
+                (JOB_RUNNING, self.owner, now, now, job_id, JOB_QUEUED),
+            ).rowcount
+            self._db.commit()
+            if not claimed:
+                return
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        self._notify(job_id)
+
+        handler = self._handlers.get(row["kind"])
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job kind '{row['kind']}'")
+            result = await handler(json.loads(row["payload"]))
+            self._finish(job_id, JOB_DONE, result=result)
+        except asyncio.CancelledError:
+            # Shutdown: stop() queues the job again
+            raise
+        except Exception as e:
+            print(f"Job {job_id} ({row['kind']}) failed: {e}")
+            self._finish(job_id, JOB_FAILED, error=str(e))
+
+    def _finish(self, job_id: str, status: str, result: Any = None, error: str | None = None) -> None:
+        with self._lock:
+            finished = self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ? AND owner = ?",
+                (status, json.dumps(result, default=str) if result is not None else None, error, time.time(),
+                 job_id, self.owner),
+            ).rowcount
+            self._db.commit()
+        if not finished:
+            # Our heartbeat went stale and another worker took the job over
+            print(f"Job {job_id} was taken over by another worker; dropping this run's result")
+        self._notify(job_id)
+        # Finished jobs get no further updates; waiters already hold the event
+        self._updates.pop(job_id, None)
+
+    def _notify(self, job_id: str) -> None:
+        event = self._updates.get(job_id)
+        if event is not None:
+            event.set()
+
+    async def _beat(self) -> None:
+        """
+        Keep this queue's running jobs alive and take over those of dead workers.
+        """
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                with self._lock:
+                    self._db.execute(
+                        "UPDATE jobs SET heartbeat = ? WHERE status = ? AND owner = ?",
+                        (time.time(), JOB_RUNNING, self.owner),
+                    )
+                    self._db.commit()
+                for job_id in self._requeue_stale():
+                    self._put(job_id)
+                # Queued jobs nobody picked up, e.g. enqueued by a worker that then died
+                cutoff = time.time() - self.stale_after_seconds
+                with self._lock:
+                    rows = self._db.execute(
+                        "SELECT id FROM jobs WHERE status = ? AND updated_at < ? ORDER BY created_at",
+                        (JOB_QUEUED, cutoff),
+                    ).fetchall()
+                for row in rows:
+                    self._put(row["id"])
+            except sqlite3.Error as e:
+                print(f"Error refreshing job heartbeats: {e}")
+
+    def _put(self, job_id: str) -> None:
+        if job_id not in self._waiting:
+            self._waiting.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    def _requeue_stale(self) -> List[str]:
+        """
+        Mark queued again the running jobs whose owner stopped sending
+        heartbeats, or failed once they have used up max_attempts.
+        Returns the ids of the requeued ones.
+        """
+        cutoff = time.time() - self.stale_after_seconds
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, attempts FROM jobs WHERE status = ? AND (heartbeat IS NULL OR heartbeat < ?)",
+                (JOB_RUNNING, cutoff),
+            ).fetchall()
+            requeued, failed = [], []
+            for row in rows:
+                exhausted = row["attempts"] >= self.max_attempts
+                # Same condition again, in case the owner beat in between
+                if self._db.execute(
+                    "UPDATE jobs SET status = ?, error = ?, owner = NULL, updated_at = ?"
+                    " WHERE id = ? AND status = ? AND (heartbeat IS NULL OR heartbeat < ?)",
+                    (
+                        JOB_FAILED if exhausted else JOB_QUEUED,
+                        f"Worker stopped responding on each of {row['attempts']} attempts" if exhausted else None,
+                        time.time(), row["id"], JOB_RUNNING, cutoff,
+                    ),
+                ).rowcount:
+                    (failed if exhausted else requeued).append(row["id"])
+            self._db.commit()
+        for job_id in failed:
+            print(f"Job {job_id} failed: its worker stopped responding {self.max_attempts} times")
+            self._notify(job_id)
+            self._updates.pop(job_id, None)
+        return requeued
+
+    def _prune(self) -> None:
+        """
+        Drop finished jobs older than the retention window.
+        """
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (JOB_DONE, JOB_FAILED, cutoff),
+            )
+            self._db.commit()
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "job_id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "attempts": row["attempts"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
@@ -0,0 +1,216 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional, Set
+
+from app.ai.rate_limiter import PRIORITY_PRECOMPUTE, priority_scope
+from app.ai.usage import usage_scope
+
+
+class PrecomputeScheduler:
+    """
+    Speculatively runs the session analysis for rooms that have gone quiet.
+
+    The scheduler listens to the chat storage for changes. A session whose
+    transcript changed and has then been idle for `idle_seconds` is analysed
+    in the background through SummaryService, so the agent results land in
+    the shared result cache and a later /summary/generate or /history/end
+    on the same transcript returns without waiting for the model.
+
+    Speculative work is low priority: its LLM calls run in the precompute
+    class of the LLM scheduler, at most `max_concurrent` runs at once, and a
+    scan is skipped while other calls are queued on the LLM.
+
+    Listeners only hear this worker's writes. With a store shared between
+    workers (SQLiteTempMemory), a room is also checked against its stored
+    last activity, and each transcript version is claimed in the store so
+    only one worker analyses it.
+    """
+
+    def __init__(
+        self,
+        temp_memory: Any,
+        summary_service: Any,
+        idle_seconds: float = 120.0,
+        scan_interval_seconds: float = 15.0,
+        max_concurrent: int = 1,
+        min_messages: int = 4
+    ):
+        self.temp_memory = temp_memory
+        self.summary_service = summary_service
+        self.idle_seconds = idle_seconds
+        self.scan_interval_seconds = scan_interval_seconds
+        self.max_concurrent = max(1, max_concurrent)
+        self.min_messages = min_messages
+
+        # session_id -> monotonic time of its last change, until analysed
+        self._dirty: Dict[str, float] = {}
+        # session_id -> fingerprint of the transcript last analysed
+        self._analyzed: Dict[str, str] = {}
+        self._running: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._scanner: Optional[asyncio.Task] = None
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.deferred = 0
+
+        temp_memory.add_listener(self.on_session_change)
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+
+    def start(self) -> None:
+        if self._scanner is None:
+            self._scanner = asyncio.create_task(self._scan_loop())
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks)
+        if self._scanner is not None:
+            tasks.append(self._scanner)
+            self._scanner = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._running.clear()
+
+    # -----------------------------
+    # Tracking
+    # -----------------------------
+
+    def on_session_change(self, session_id: str | None) -> None:
+        """
+        Storage listener: a session got a message or was cleared.
+        """
+        if session_id is None:
+            self._dirty.clear()
+            self._analyzed.clear()
+            return
+        self._dirty[session_id] = time.monotonic()
+
+    def due_sessions(self, now: float | None = None) -> list:
+        """
+        Changed sessions that have been idle long enough, quietest first.
+        """
+        now = time.monotonic() if now is None else now
+        due = [
+            session_id for session_id, changed_at in self._dirty.items()
+            if now - changed_at >= self.idle_seconds and session_id not in self._running
+        ]
+        due.sort(key=lambda session_id: self._dirty[session_id])
+        return due
+
+    # -----------------------------
+    # Scanning
+    # -----------------------------
+
+    async def _scan_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.scan_interval_seconds)
+            try:
+                self.scan()
+            except Exception as e:
+                print(f"Error scanning sessions for precompute: {e}")
+
+    def scan(self) -> int:
+        """
+        Start speculative analyses for due sessions, up to the concurrency cap.
+        Returns how many were started.
+        """
+        if self._llm_busy():
+            self.deferred += 1
+            return 0
+
+        started = 0
+        for session_id in self.due_sessions():
+            if len(self._running) >= self.max_concurrent:
+                break
+
+            idle_for = self._idle_for(session_id)
+            if idle_for is not None and idle_for < self.idle_seconds:
+                # Still active through another worker: due again once it is quiet
+                self._dirty[session_id] = time.monotonic() - idle_for
+                continue
+
+            transcript = self.temp_memory.get_transcript(session_id)
+            if len(transcript) < self.min_messages:
+                if not len(transcript):
+                    self._forget(session_id)
+                continue
+            if self._analyzed.get(session_id) == transcript.fingerprint:
+                # Only non-analysed messages (e.g. system notices) changed
+                self._dirty.pop(session_id, None)
+                continue
+            if self._over_budget(session_id):
+                continue
+            if not self._claim(session_id, transcript.fingerprint):
+                # Another worker is analysing (or has analysed) this version
+                self._analyzed[session_id] = transcript.fingerprint
+                self._dirty.pop(session_id, None)
+                continue
+
+            self._running.add(session_id)
+            task = asyncio.create_task(self._precompute(session_id, transcript.fingerprint))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            started += 1
+
+        self.started += started
+        return started
+
+    async def _precompute(self, session_id: str, fingerprint: str) -> None:
+        changed_at = self._dirty.get(session_id)
+        try:
+            with usage_scope(session=session_id, user="precompute"), priority_scope(PRIORITY_PRECOMPUTE):
+                result = await self.summary_service.generate_session_analysis(session_id)
+            if "error" in result or result.get("partial"):
+                self.failed += 1
+            else:
+                self.completed += 1
+                self._analyzed[session_id] = fingerprint
+        except Exception as e:
+            self.failed += 1
+            print(f"Error precomputing analysis for {session_id}: {e}")
+        finally:
+            self._running.discard(session_id)
+            # Not retried until the session changes again; a session that
+            # changed while we were running stays due
+            if session_id in self._dirty and self._dirty[session_id] == changed_at:
+                del self._dirty[session_id]
+
+    def _forget(self, session_id: str) -> None:
+        self._dirty.pop(session_id, None)
+        self._analyzed.pop(session_id, None)
+
+    def _idle_for(self, session_id: str) -> float | None:
+        last_active = getattr(self.temp_memory, "session_last_active", None)
+        if last_active is None:
+            return None
+        at = last_active(session_id)
+        return time.time() - at if at is not None else None
+
+    def _claim(self, session_id: str, fingerprint: str) -> bool:
+        claim = getattr(self.temp_memory, "claim_analysis", None)
+        return claim is None or claim(session_id, fingerprint)
+
+    def _llm_busy(self) -> bool:
+        llm = getattr(self.summary_service.orchestrator, "llm", None)
+        limiter = getattr(llm, "limiter", None)
+        return limiter is not None and limiter.waiting > 0
+
+    def _over_budget(self, session_id: str) -> bool:
+        usage = getattr(getattr(self.summary_service.orchestrator, "llm", None), "usage", None)
+        return usage is not None and usage.budget_action(session_id) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "idle_seconds": self.idle_seconds,
+            "max_concurrent": self.max_concurrent,
+            "waiting_sessions": len(self._dirty),
+            "running": len(self._running),
+            "started": self.started,
+            "completed": self.completed,
+            "failed": self.failed,
+            "deferred_scans": self.deferred,
+        }
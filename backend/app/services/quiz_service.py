@@ -1,30 +1,52 @@
 from typing import Any, Dict, List
 from app.storage.temp_memory import TempMemory
 from app.ai.llm_client import LLMClient
-from app.ai.agents.quiz_agent import QuizAgent
+from app.ai.orchestrator import AIOrchestrator
+from app.ai.transcript import Transcript
+from app.ai.usage import usage_scope
+from app.core.single_flight import SingleFlight
 
 class QuizService:
     """
     Handles generation of quizzes and assessments from study sessions.
     """
-    def __init__(self, temp_memory: TempMemory, llm_client: LLMClient):
+    def __init__(self, temp_memory: TempMemory, llm_client: LLMClient, orchestrator: AIOrchestrator | None = None):
         self.temp_memory = temp_memory
         self.llm = llm_client
-        self.quiz_agent = QuizAgent()
+        # Shared with SummaryService, so a quiz produced by the last session
+        # analysis is returned without another LLM call
+        self.orchestrator = orchestrator or AIOrchestrator(llm_client)
+        # Coalesces concurrent quiz requests for the same transcript
+        self.single_flight = SingleFlight()
 
-    async def generate_quiz(self, session_id: str) -> Dict[str, Any]:
+    async def generate_quiz(self, session_id: str, user_id: str | None = None) -> Dict[str, Any]:
         """
         Produce a set of questions from the chat history.
+        Returns the cached quiz when the transcript has not changed since
+        the last analysis.
         """
         messages = self.temp_memory.get_session_messages(session_id)
         if not messages:
             return {"error": "No messages to generate quiz from"}
 
-        prompt = self.quiz_agent.build_prompt(messages)
-        response = await self.llm.generate_response(
-            prompt=prompt,
-            system_prompt=self.quiz_agent.system_prompt,
-            temperature=self.quiz_agent.temperature
-        )
-        
-        return self.quiz_agent.parse_response(response)
+        # Quizzes are built from every message in the room, system notices
+        # included. When there are none, this is the same transcript the
+        # session analysis uses, so its cached quiz is shared.
+        transcript = self.temp_memory.get_transcript(session_id)
+        if len(transcript) != len(messages):
+            transcript = Transcript(messages, session_id=session_id)
+
+        # A quiz is a single agent already; over budget there is nothing cheaper to fall back to
+        usage = getattr(self.llm, "usage", None)
+        if usage is not None and usage.budget_action(session_id) is not None:
+            cached = self.orchestrator.results.get(transcript.fingerprint, "quiz")
+            if cached is None:
+                return {"error": "LLM token budget exhausted for this session", "budget_exceeded": True}
+
+        # Goes through the orchestrator so long sessions are chunked and merged
+        with usage_scope(session=session_id, user=user_id):
+            quiz = await self.single_flight.do(
+                (session_id, transcript.fingerprint),
+                lambda: self.orchestrator.run_agent("quiz", transcript.messages, transcript)
+            )
+        return dict(quiz)
@@ -1,9 +1,15 @@
-from typing import Any, Dict, List
+import copy
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Tuple
+from app.config import settings
 from app.storage.temp_memory import TempMemory
 from app.storage.knowledge_store import KnowledgeStore
 from app.ai.llm_client import LLMClient
 from app.ai.orchestrator import AIOrchestrator
+from app.ai.transcript import Transcript
+from app.ai.usage import usage_scope
 from app.services.analytics_service import AnalyticsService
+from app.core.single_flight import SingleFlight
 
 class SummaryService:
     """
@@ -14,36 +20,201 @@ class SummaryService:
         temp_memory: TempMemory, 
         knowledge_store: KnowledgeStore, 
         llm_client: LLMClient,
-        analytics_service: AnalyticsService
+        analytics_service: AnalyticsService,
+        orchestrator: AIOrchestrator | None = None
     ):
         self.temp_memory = temp_memory
         self.knowledge_store = knowledge_store
-        self.orchestrator = AIOrchestrator(llm_client)
+        # Shared with QuizService (see app/dependencies.py) so agent results are reused
+        self.orchestrator = orchestrator or AIOrchestrator(llm_client)
         self.analytics_service = analytics_service
+        # Coalesces concurrent analyses of the same transcript
+        self.single_flight = SingleFlight()
+        # session_id -> last clean analysis, for incremental re-analysis:
+        # {"results": per-agent results, "last_id", "covered", "chain"}
+        self._baselines: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # A cleared or expired session must not live on in its baseline
+        temp_memory.add_listener(self.on_session_change)
+
+    def on_session_change(self, session_id: str | None) -> None:
+        """
+        Storage listener: drop the baseline of a session that was cleared
+        or expired. A new message keeps it (the next update builds on it);
+        a baseline whose last message is gone is never used again anyway.
+        """
+        if session_id is None:
+            self._baselines.clear()
+        elif session_id in self._baselines and self._is_empty(session_id):
+            self._baselines.pop(session_id, None)
+
+    def _is_empty(self, session_id: str) -> bool:
+        count = getattr(self.temp_memory, "get_message_count", None)
+        if count is not None:
+            return not count(session_id)
+        return not self.temp_memory.get_last_n_messages(session_id, 1)
 
     async def generate_session_analysis(
         self, 
         session_id: str, 
-        target_language: str = "English"
+        target_language: str = "English",
+        consolidated: bool | None = None,
+        user_id: str | None = None
     ) -> Dict[str, Any]:
         """
         Retrieve chat history and run full AI analysis.
+        consolidated=None uses the configured default (settings.ANALYSIS_CONSOLIDATED_MODE).
+        Token usage is metered against the room and, when given, the requesting user.
         """
-        messages = self.temp_memory.get_session_messages(session_id)
-        if not messages:
+        # Only user and assistant messages, rendered once for every agent
+        transcript = self.temp_memory.get_transcript(session_id)
+        if not len(transcript):
             return {"error": "No messages found for this session"}
 
-        # Filter for only user and assistant messages for analysis
-        analysis_messages = [
-            m for m in messages 
-            if m.get("role") in ["user", "assistant"]
-        ]
+        # Room over its token budget: refuse, or fall back to one consolidated call
+        budget_action = self._budget_action(session_id)
+        if budget_action == "reject":
+            return {"error": "LLM token budget exhausted for this session", "budget_exceeded": True}
+        if budget_action == "downgrade":
+            consolidated = True
+
+        # Concurrent requests for the same session and transcript version
+        # (several viewers, double-clicked "End Session") share one run.
+        key = (
+            session_id,
+            transcript.fingerprint,
+            target_language.lower(),
+            consolidated,
+        )
+        with usage_scope(session=session_id, user=user_id):
+            analysis_result = await self.single_flight.do(
+                key,
+                lambda: self._analyze(
+                    session_id, transcript, target_language, consolidated,
+                    incremental=budget_action != "downgrade"
+                )
+            )
+        # Each caller gets its own top-level dict
+        analysis_result = dict(analysis_result)
+        if budget_action == "downgrade":
+            analysis_result["budget_downgraded"] = True
+        return analysis_result
+
+    def _budget_action(self, session_id: str) -> str | None:
+        usage = getattr(self.orchestrator.llm, "usage", None)
+        return usage.budget_action(session_id) if usage is not None else None
 
+    async def _analyze(
+        self,
+        session_id: str,
+        transcript: Transcript,
+        target_language: str,
+        consolidated: bool | None,
+        incremental: bool = True
+    ) -> Dict[str, Any]:
+        # A budget downgrade means one consolidated call; delta updates run per agent
+        previous, delta = self._delta_inputs(session_id, transcript) if incremental else (None, None)
         analysis_result = await self.orchestrator.analyze_session(
-            messages=analysis_messages,
-            target_language=target_language
+            messages=transcript.messages,
+            target_language=target_language,
+            consolidated=consolidated,
+            transcript=transcript,
+            previous=previous,
+            delta=delta
         )
+        self._remember(session_id, transcript, analysis_result, delta)
+        return self._finalize(session_id, analysis_result)
+
+    def _delta_inputs(
+        self,
+        session_id: str,
+        transcript: Transcript
+    ) -> Tuple[Dict[str, Dict[str, Any]] | None, Transcript | None]:
+        """
+        Previous per-agent results and the messages added since, when an
+        incremental update is allowed; (None, None) forces a full analysis.
+        A full rebuild is forced once the new messages exceed
+        ANALYSIS_DELTA_MAX_NEW_RATIO of those already covered, or after
+        ANALYSIS_DELTA_MAX_CHAIN updates in a row, so drift does not pile up.
+        """
+        baseline = self._baselines.get(session_id)
+        if not settings.ANALYSIS_DELTA_ENABLED or baseline is None:
+            return None, None
+        if baseline["chain"] >= settings.ANALYSIS_DELTA_MAX_CHAIN:
+            return None, None
+        delta = transcript.since(baseline["last_id"])
+        if delta is None or len(delta) > baseline["covered"] * settings.ANALYSIS_DELTA_MAX_NEW_RATIO:
+            return None, None
+        return baseline["results"], delta
 
+    def _remember(
+        self,
+        session_id: str,
+        transcript: Transcript,
+        analysis_result: Dict[str, Any],
+        delta: Transcript | None
+    ) -> None:
+        """
+        Keep a clean, complete analysis as the baseline for the next update.
+        """
+        messages = transcript.messages
+        last_id = messages[-1].get("id") if messages else None
+        failed = any(key in analysis_result for key in ("error", "raw_response", "partial"))
+        if not settings.ANALYSIS_DELTA_ENABLED or failed or last_id is None:
+            self._baselines.pop(session_id, None)
+            return
+
+        previous = self._baselines.pop(session_id, None)
+        chain = 0
+        if previous is not None and delta is not None:
+            chain = previous["chain"] + (1 if len(delta) else 0)
+        self._baselines[session_id] = {
+            "results": copy.deepcopy(self.orchestrator.split_results(analysis_result)),
+            "last_id": last_id,
+            "covered": len(transcript),
+            "chain": chain,
+        }
+        while len(self._baselines) > settings.ANALYSIS_RESULT_CACHE_ENTRIES:
+            self._baselines.popitem(last=False)
+
+    async def stream_session_analysis(
+        self,
+        session_id: str,
+        target_language: str = "English",
+        user_id: str | None = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of generate_session_analysis.
+        Yields each agent's result as soon as it is ready, then a final
+        "complete" event carrying the same document the blocking endpoint returns.
+        A room over its token budget always gets the blocking result (with
+        "downgrade") or an error event (with "reject").
+        """
+        transcript = self.temp_memory.get_transcript(session_id)
+        if not len(transcript):
+            yield {"event": "error", "data": {"error": "No messages found for this session"}}
+            return
+
+        if self._budget_action(session_id) is not None:
+            result = await self.generate_session_analysis(session_id, target_language, user_id=user_id)
+            yield {"event": "error" if "error" in result else "complete", "data": result}
+            return
+
+        analysis_result: Dict[str, Any] = {}
+        with usage_scope(session=session_id, user=user_id):
+            async for event in self.orchestrator.stream_session(transcript.messages, target_language, transcript):
+                if event["event"] == "agent":
+                    analysis_result.update(event["data"]["result"])
+                elif event["event"] == "translation":
+                    analysis_result["translated"] = event["data"]
+                yield event
+
+        if analysis_result:
+            yield {"event": "complete", "data": self._finalize(session_id, analysis_result)}
+
+    def _finalize(self, session_id: str, analysis_result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Attach stats, skills and display helpers to a raw orchestrator result.
+        """
         # CAPTURE ANALYTICS BEFORE CLEARING
         # This ensures the summary contains the stats/skills even after messages are deleted
         stats = self.analytics_service.get_session_stats(session_id)
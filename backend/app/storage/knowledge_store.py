@@ -1,3 +1,5 @@
+import uuid
+from datetime import datetime
 from typing import List, Dict, Any, Optional
 
 class KnowledgeStore:
@@ -10,6 +12,8 @@ class KnowledgeStore:
         self._summaries: Dict[str, Any] = {}
         # session_id -> quiz_data
         self._quizzes: Dict[str, Any] = {}
+        # Archived sessions, newest last (same shape as Supabase session_history)
+        self._history: List[Dict[str, Any]] = []
 
     def save_summary(self, session_id: str, data: Any):
         """Save an approved study summary."""
@@ -27,3 +31,28 @@ class KnowledgeStore:
 
     def get_all_summaries(self) -> List[Any]:
         return list(self._summaries.values())
+
+    # -----------------------------
+    # Session history (archived sessions)
+    # -----------------------------
+
+    def save_history_entry(self, room_id: str, user_id: str, session_data: Dict[str, Any]) -> bool:
+        """
+        Archive a completed session (used by HistoryService without Supabase).
+        """
+        topics = session_data.get("topics_covered") or session_data.get("summary", {}).get("topics_covered")
+        self._history.append({
+            "id": str(uuid.uuid4()),
+            "room_id": room_id,
+            "user_id": user_id,
+            "summary_data": session_data,
+            "created_at": datetime.utcnow().isoformat(),
+            "topic": topics[0] if isinstance(topics, list) and topics else "General Study",
+        })
+        return True
+
+    def get_history(self, room_id: str) -> List[Dict[str, Any]]:
+        return [entry for entry in reversed(self._history) if entry["room_id"] == room_id]
+
+    def get_user_history(self, user_id: str) -> List[Dict[str, Any]]:
+        return [entry for entry in reversed(self._history) if entry["user_id"] == user_id]
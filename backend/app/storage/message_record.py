@@ -0,0 +1,94 @@
+import sys
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+FIELDS = ("id", "seq", "session_id", "user_id", "role", "content", "language", "timestamp")
+
+
+class MessageRecord:
+    """
+    Compact in-memory chat message.
+
+    A message dict carries a 7-key hash table, a 36-char uuid string and an
+    ISO timestamp string. A record keeps the same data in fixed slots: the
+    id as its 16 raw uuid bytes, the timestamp as a float epoch, and the
+    session/user/role strings interned so every message of a room shares
+    one copy of each.
+
+    `seq` orders the messages of a session (see TempMemory) and is the
+    cursor clients page the history with.
+
+    Internal readers use it like a read-only message dict (`msg.get("role")`,
+    `msg["content"]`), where "id" and "timestamp" come back in their API form.
+    Anything leaving the process goes through to_dict().
+    """
+
+    __slots__ = ("uid", "seq", "session_id", "user_id", "role", "content", "language", "created_at")
+
+    def __init__(
+        self,
+        session_id: str,
+        user_id: str,
+        role: str,
+        content: str,
+        language: str | None = None,
+        created_at: float | None = None,
+        uid: bytes | None = None,
+        seq: int = 0,
+    ):
+        self.uid = uid if uid is not None else uuid.uuid4().bytes
+        self.seq = seq
+        self.session_id = sys.intern(session_id)
+        self.user_id = sys.intern(user_id) if isinstance(user_id, str) else user_id
+        self.role = sys.intern(role) if isinstance(role, str) else role
+        self.content = content
+        self.language = sys.intern(language) if isinstance(language, str) else language
+        self.created_at = created_at if created_at is not None else datetime.now(timezone.utc).timestamp()
+
+    @property
+    def id(self) -> str:
+        return str(uuid.UUID(bytes=self.uid))
+
+    @property
+    def timestamp(self) -> str:
+        # Same naive-UTC ISO form the dict messages used
+        return datetime.fromtimestamp(self.created_at, timezone.utc).replace(tzinfo=None).isoformat()
+
+    # -----------------------------
+    # Read-only dict interface
+    # -----------------------------
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in FIELDS:
+            return default
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in FIELDS
+
+    def keys(self):
+        return FIELDS
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        The message as the API returns it.
+        """
+        return {key: getattr(self, key) for key in FIELDS}
+
+    def __repr__(self) -> str:
+        return f"MessageRecord({self.to_dict()!r})"
+
+
+def message_dict(message: Any) -> Dict[str, Any]:
+    """
+    API form of a stored message; storages that already return dicts pass through.
+    """
+    if isinstance(message, MessageRecord):
+        return message.to_dict()
+    return message
@@ -0,0 +1,161 @@
+import math
+from datetime import datetime
+from typing import Any, Dict
+
+
+class SessionAggregate:
+    """
+    Running counts for one session, updated as messages arrive so the
+    analytics endpoints never rescan (or even load) the message bodies.
+
+    Tracks the message count, counts per role and per user (user messages
+    only, as the contribution scores need), the first/last timestamp and
+    the mean/variance of the gaps between consecutive messages. Gap stats
+    use Welford's method, which can also take a value back out, so a store
+    that evicts its oldest message calls discard_oldest() to stay exact.
+    """
+
+    __slots__ = (
+        "message_count", "role_counts", "user_message_counts",
+        "first_at", "last_at", "gap_count", "gap_mean", "gap_m2",
+    )
+
+    def __init__(self):
+        self.message_count = 0
+        self.role_counts: Dict[str, int] = {}
+        self.user_message_counts: Dict[str, int] = {}
+        self.first_at: float | None = None
+        self.last_at: float | None = None
+        self.gap_count = 0
+        self.gap_mean = 0.0
+        self.gap_m2 = 0.0
+
+    # -----------------------------
+    # Updates
+    # -----------------------------
+
+    def add(self, user_id: str | None, role: str | None, at: float) -> None:
+        """
+        Count a message appended at epoch `at`.
+        """
+        self.message_count += 1
+        self._count(user_id, role, 1)
+        if self.last_at is not None:
+            self._add_gap(at - self.last_at)
+        else:
+            self.first_at = at
+        self.last_at = at
+
+    def discard_oldest(self, user_id: str | None, role: str | None, next_at: float | None) -> None:
+        """
+        Uncount the oldest message; `next_at` is the timestamp of the
+        message after it (None when it was the only one).
+        """
+        if self.message_count <= 0:
+            return
+        self.message_count -= 1
+        self._count(user_id, role, -1)
+        if next_at is None or self.first_at is None:
+            self.first_at = self.last_at = None
+            self.gap_count, self.gap_mean, self.gap_m2 = 0, 0.0, 0.0
+            return
+        self._remove_gap(next_at - self.first_at)
+        self.first_at = next_at
+
+    def _count(self, user_id: str | None, role: str | None, step: int) -> None:
+        role = role or "unknown"
+        self.role_counts[role] = self.role_counts.get(role, 0) + step
+        if not self.role_counts[role]:
+            del self.role_counts[role]
+        if role == "user":
+            uid = user_id or "anonymous"
+            self.user_message_counts[uid] = self.user_message_counts.get(uid, 0) + step
+            if not self.user_message_counts[uid]:
+                del self.user_message_counts[uid]
+
+    def _add_gap(self, gap: float) -> None:
+        self.gap_count += 1
+        delta = gap - self.gap_mean
+        self.gap_mean += delta / self.gap_count
+        self.gap_m2 += delta * (gap - self.gap_mean)
+
+    def _remove_gap(self, gap: float) -> None:
+        if self.gap_count <= 1:
+            self.gap_count, self.gap_mean, self.gap_m2 = 0, 0.0, 0.0
+            return
+        mean = (self.gap_count * self.gap_mean - gap) / (self.gap_count - 1)
+        self.gap_m2 = max(0.0, self.gap_m2 - (gap - self.gap_mean) * (gap - mean))
+        self.gap_mean = mean
+        self.gap_count -= 1
+
+    # -----------------------------
+    # Reads
+    # -----------------------------
+
+    @property
+    def user_message_count(self) -> int:
+        return self.role_counts.get("user", 0)
+
+    @property
+    def duration_seconds(self) -> float:
+        if self.first_at is None or self.last_at is None:
+            return 0.0
+        return self.last_at - self.first_at
+
+    @property
+    def gap_stdev(self) -> float:
+        return math.sqrt(self.gap_m2 / self.gap_count) if self.gap_count else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "message_count": self.message_count,
+            "role_counts": dict(self.role_counts),
+            "user_message_counts": dict(self.user_message_counts),
+            "first_at": self.first_at,
+            "last_at": self.last_at,
+            "gaps": {
+                "count": self.gap_count,
+                "mean_seconds": round(self.gap_mean, 3),
+                "stdev_seconds": round(self.gap_stdev, 3),
+            },
+        }
+
+    def to_row(self) -> Dict[str, Any]:
+        """
+        The full state, as from_row() reads it back.
+        """
+        return {
+            "message_count": self.message_count,
+            "role_counts": self.role_counts,
+            "user_message_counts": self.user_message_counts,
+            "first_at": self.first_at,
+            "last_at": self.last_at,
+            "gap_count": self.gap_count,
+            "gap_mean": self.gap_mean,
+            "gap_m2": self.gap_m2,
+        }
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "SessionAggregate":
+        """
+        Rebuild from a session_aggregates row (migrations/create_session_aggregates.sql).
+        """
+        aggregate = cls()
+        aggregate.message_count = row.get("message_count") or 0
+        aggregate.role_counts = dict(row.get("role_counts") or {})
+        aggregate.user_message_counts = dict(row.get("user_message_counts") or {})
+        aggregate.first_at = cls.epoch(row.get("first_at"))
+        aggregate.last_at = cls.epoch(row.get("last_at"))
+        aggregate.gap_count = row.get("gap_count") or 0
+        aggregate.gap_mean = row.get("gap_mean") or 0.0
+        aggregate.gap_m2 = row.get("gap_m2") or 0.0
+        return aggregate
+
+    @staticmethod
+    def epoch(value: Any) -> float | None:
+        """
+        Epoch seconds from a database timestamp (ISO string) or a number.
+        """
+        if value is None or isinstance(value, (int, float)):
+            return value
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
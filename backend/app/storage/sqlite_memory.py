@@ -0,0 +1,469 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.ai.transcript import ANALYSIS_ROLES, Transcript
+from app.config import settings
+from app.core.expiry import ExpiryEngine
+from app.storage.message_record import MessageRecord
+from app.storage.session_aggregate import SessionAggregate
+
+_COLUMNS = "seq, session_id, id, user_id, role, content, language, created_at"
+
+
+class SQLiteExpiry(ExpiryEngine):
+    """
+    Session TTL for SQLiteTempMemory. Last activity lives in the database,
+    so every worker sees the same deadlines; the sweeper loop is the same
+    as the in-memory engine's (see ExpiryEngine.start_sweeper).
+    """
+
+    def __init__(self, memory: "SQLiteTempMemory", ttl_seconds: float):
+        super().__init__(ttl_seconds, on_expire=memory._expired, clock=time.time)
+        self.memory = memory
+
+    def touch(self, key: Any) -> None:
+        # Activity is recorded by add_message in the same transaction
+        pass
+
+    def expired(self, key: Any) -> bool:
+        if not self.enabled:
+            return False
+        return self.memory._expire_sessions(self.clock() - self.ttl_seconds, key) > 0
+
+    def sweep(self) -> int:
+        if not self.enabled:
+            return 0
+        return self.memory._expire_sessions(self.clock() - self.ttl_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "tracked": self.memory.session_count(),
+            "expired": self.expired_count,
+        }
+
+
+class SQLiteTempMemory:
+    """
+    TempMemory backed by a local SQLite file, so every uvicorn worker on
+    the host sees the same rooms (settings.TEMP_MEMORY_BACKEND = "sqlite").
+
+    Same interface and MessageRecord messages as TempMemory:
+    - WAL mode: readers never block the writer, and workers wait on each
+      other's writes (busy_timeout) instead of failing
+    - seq is an AUTOINCREMENT key, so it only grows across sessions,
+      clears and workers; (session_id, seq) is indexed for history pages
+    - a message is one IMMEDIATE transaction that inserts it, evicts past
+      max_messages, updates the session's aggregate and its last activity;
+      synchronous=NORMAL leaves fsyncs to the periodic WAL checkpoint
+    - idle sessions expire after ttl_seconds through SQLiteExpiry, lazily
+      on access or by the sweeper, in one DELETE batch per sweep
+
+    Listeners only hear about changes made by this worker. Anything cached
+    per worker checks session_generation() instead, which every write
+    moves on (see AgentResultCache.generation_source).
+    """
+
+    def __init__(
+        self,
+        db_path: str = "temp_memory.sqlite3",
+        max_messages: int = 500,
+        ttl_seconds: float | None = None,
+        busy_timeout_ms: int = 5000,
+        max_cached_transcripts: int = 256
+    ):
+        self.db_path = db_path
+        self.max_messages = max_messages
+        self.max_cached_transcripts = max_cached_transcripts
+        self.busy_timeout_ms = busy_timeout_ms
+        if ttl_seconds is None:
+            ttl_seconds = settings.TEMP_MEMORY_TTL_SECONDS if settings.AUTO_DELETE_UNAPPROVED else 0
+        self.expiry = SQLiteExpiry(self, ttl_seconds)
+
+        self._lock = threading.RLock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        # session_id -> (records, transcript) for sessions whose transcript
+        # was requested; brought up to date from the database on each use
+        self._transcripts: "OrderedDict[str, Tuple[deque, Transcript]]" = OrderedDict()
+        # Called with the session_id whenever a session changes (None: all sessions)
+        self._listeners: List[Callable[[str | None], None]] = []
+        self._connection()
+
+    # -----------------------------
+    # Connection
+    # -----------------------------
+
+    def _connection(self) -> sqlite3.Connection:
+        # A connection must not cross a fork; each worker opens its own
+        if self._db is None or self._pid != os.getpid():
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            self._pid = os.getpid()
+            self._db.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+            self._db.execute("PRAGMA journal_mode = WAL")
+            self._db.execute("PRAGMA synchronous = NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " session_id TEXT NOT NULL,"
+                " id BLOB NOT NULL,"
+                " user_id TEXT,"
+                " role TEXT,"
+                " content TEXT,"
+                " language TEXT,"
+                " created_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_messages_session_seq ON messages (session_id, seq)")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " session_id TEXT PRIMARY KEY,"
+                " last_active REAL NOT NULL,"
+                " aggregate TEXT NOT NULL,"
+                " generation INTEGER NOT NULL DEFAULT 0)"
+            )
+            # Files created before session generations were stored
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(sessions)")}
+            if "generation" not in columns:
+                self._db.execute("ALTER TABLE sessions ADD COLUMN generation INTEGER NOT NULL DEFAULT 0")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_sessions_last_active ON sessions (last_active)")
+            # Transcript versions some worker has started analysing speculatively
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS analysis_claims ("
+                " session_id TEXT NOT NULL,"
+                " fingerprint TEXT NOT NULL,"
+                " PRIMARY KEY (session_id, fingerprint))"
+            )
+        return self._db
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """
+        One write transaction. IMMEDIATE takes the write lock up front, so
+        concurrent workers queue on busy_timeout instead of deadlocking.
+        """
+        with self._lock:
+            db = self._connection()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    def _read(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._connection().execute(sql, params).fetchall()
+
+    # -----------------------------
+    # Core Memory Operations
+    # -----------------------------
+
+    def add_message(
+        self,
+        session_id: str,
+        user_id: str,
+        role: str,
+        content: str,
+        language: str | None = None,
+    ) -> MessageRecord:
+        """
+        Store a chat message.
+        """
+        # role: user | assistant | system
+        message = MessageRecord(session_id, user_id, role, content, language)
+        expired = False
+
+        with self._write() as db:
+            row = db.execute(
+                "SELECT last_active, aggregate FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is not None and self._is_stale(row[0]):
+                # A room reused after expiring starts fresh
+                self._delete_sessions(db, [session_id])
+                row, expired = None, True
+            aggregate = SessionAggregate.from_row(json.loads(row[1])) if row is not None else SessionAggregate()
+
+            while aggregate.message_count and aggregate.message_count >= self.max_messages:
+                oldest = db.execute(
+                    "SELECT seq, user_id, role FROM messages WHERE session_id = ? ORDER BY seq LIMIT 1",
+                    (session_id,)
+                ).fetchone()
+                if oldest is None:
+                    break
+                following = db.execute(
+                    "SELECT created_at FROM messages WHERE session_id = ? AND seq > ? ORDER BY seq LIMIT 1",
+                    (session_id, oldest[0])
+                ).fetchone()
+                aggregate.discard_oldest(oldest[1], oldest[2], following[0] if following else None)
+                db.execute("DELETE FROM messages WHERE seq = ?", (oldest[0],))
+
+            cursor = db.execute(
+                f"INSERT INTO messages ({_COLUMNS}) VALUES (NULL, ?, ?, ?, ?, ?, ?, ?)",
+                (session_id, message.uid, user_id, role, content, language, message.created_at),
+            )
+            message.seq = cursor.lastrowid
+            aggregate.add(user_id, role, message.created_at)
+            # The new seq doubles as the generation: it is unique and only grows,
+            # so a session cleared and started again never repeats one
+            db.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, last_active, aggregate, generation) VALUES (?, ?, ?, ?)",
+                (session_id, time.time(), json.dumps(aggregate.to_row()), message.seq),
+            )
+
+        if expired:
+            self.expiry._expire(session_id)
+        self._notify(session_id)
+        return message
+
+    def get_session_messages(self, session_id: str) -> List[MessageRecord]:
+        """
+        Retrieve full chat history for a session.
+        """
+        if self.expiry.expired(session_id):
+            return []
+        return self._records(
+            f"SELECT {_COLUMNS} FROM messages WHERE session_id = ? ORDER BY seq", (session_id,)
+        )
+
+    def get_messages_after(
+        self,
+        session_id: str,
+        after: int | str | None = None,
+        limit: int | None = None
+    ) -> List[MessageRecord]:
+        """
+        Messages that follow the cursor `after` (a seq, or a message id),
+        oldest first, at most `limit` of them. With no cursor, or one that
+        has already been evicted, the page starts at the oldest message.
+        """
+        if self.expiry.expired(session_id):
+            return []
+        if isinstance(after, str):
+            after = self._seq_of(session_id, after)
+        return self._records(
+            f"SELECT {_COLUMNS} FROM messages WHERE session_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+            (session_id, after if after is not None else -1, limit if limit is not None else -1),
+        )
+
+    def get_transcript(self, session_id: str) -> Transcript:
+        """
+        Rendered transcript of the session's user/assistant messages.
+        Kept per worker and extended with just the messages stored since
+        (by any worker), then returned as a snapshot.
+        """
+        if self.expiry.expired(session_id):
+            self._transcripts.pop(session_id, None)
+            return Transcript(roles=ANALYSIS_ROLES, session_id=session_id)
+
+        with self._lock:
+            first = self._read("SELECT MIN(seq) FROM messages WHERE session_id = ?", (session_id,))[0][0]
+            if first is None:
+                self._transcripts.pop(session_id, None)
+                return Transcript(roles=ANALYSIS_ROLES, session_id=session_id)
+
+            cached = self._transcripts.get(session_id)
+            if cached is None:
+                records: deque = deque()
+                transcript = Transcript(roles=ANALYSIS_ROLES, session_id=session_id)
+                self._transcripts[session_id] = (records, transcript)
+                if len(self._transcripts) > self.max_cached_transcripts:
+                    self._transcripts.popitem(last=False)
+            else:
+                records, transcript = cached
+                self._transcripts.move_to_end(session_id)
+
+            # Drop what was evicted or cleared since, then append what is new
+            while records and records[0].seq < first:
+                transcript.discard_oldest(records.popleft())
+            last = records[-1].seq if records else -1
+            for message in self._records(
+                f"SELECT {_COLUMNS} FROM messages WHERE session_id = ? AND seq > ? ORDER BY seq",
+                (session_id, last),
+            ):
+                records.append(message)
+                transcript.append(message)
+            return transcript.snapshot()
+
+    def get_last_n_messages(self, session_id: str, n: int = 10) -> List[MessageRecord]:
+        """
+        Retrieve last N messages of a session.
+        """
+        if self.expiry.expired(session_id):
+            return []
+        messages = self._records(
+            f"SELECT {_COLUMNS} FROM messages WHERE session_id = ? ORDER BY seq DESC LIMIT ?", (session_id, n)
+        )
+        messages.reverse()
+        return messages
+
+    # -----------------------------
+    # Analytics / Agent Helpers
+    # -----------------------------
+
+    def get_user_messages(self, session_id: str) -> List[str]:
+        """
+        Returns only user messages (for dependency, gaps, skills).
+        """
+        if self.expiry.expired(session_id):
+            return []
+        rows = self._read(
+            "SELECT content FROM messages WHERE session_id = ? AND role = 'user' ORDER BY seq", (session_id,)
+        )
+        return [row[0] for row in rows]
+
+    def get_session_aggregate(self, session_id: str) -> SessionAggregate | None:
+        """
+        Running counts for the session (None when it has no messages).
+        """
+        if self.expiry.expired(session_id):
+            return None
+        rows = self._read("SELECT aggregate FROM sessions WHERE session_id = ?", (session_id,))
+        return SessionAggregate.from_row(json.loads(rows[0][0])) if rows else None
+
+    def get_message_count(self, session_id: str) -> int:
+        aggregate = self.get_session_aggregate(session_id)
+        return aggregate.message_count if aggregate is not None else 0
+
+    def get_user_message_count(self, session_id: str) -> int:
+        aggregate = self.get_session_aggregate(session_id)
+        return aggregate.user_message_count if aggregate is not None else 0
+
+    def get_time_gaps(self, session_id: str) -> List[float]:
+        """
+        Time gaps (in seconds) between consecutive messages.
+        """
+        if self.expiry.expired(session_id):
+            return []
+        rows = self._read("SELECT created_at FROM messages WHERE session_id = ? ORDER BY seq", (session_id,))
+        return [rows[i][0] - rows[i - 1][0] for i in range(1, len(rows))]
+
+    def session_count(self) -> int:
+        return self._read("SELECT COUNT(*) FROM sessions")[0][0]
+
+    def session_last_active(self, session_id: str) -> float | None:
+        """
+        Epoch time of the session's last message, from any worker.
+        """
+        rows = self._read("SELECT last_active FROM sessions WHERE session_id = ?", (session_id,))
+        return rows[0][0] if rows else None
+
+    def claim_analysis(self, session_id: str, fingerprint: str) -> bool:
+        """
+        True for the first worker to claim this transcript version, so
+        speculative analysis (PrecomputeScheduler) runs once per host.
+        """
+        with self._write() as db:
+            return db.execute(
+                "INSERT OR IGNORE INTO analysis_claims (session_id, fingerprint) VALUES (?, ?)",
+                (session_id, fingerprint),
+            ).rowcount == 1
+
+    def session_generation(self, session_id: str) -> int:
+        """
+        Changes whenever any worker adds to, clears or expires the session
+        (0 when it has no messages).
+        """
+        rows = self._read("SELECT generation FROM sessions WHERE session_id = ?", (session_id,))
+        return rows[0][0] if rows else 0
+
+    # -----------------------------
+    # Privacy / Cleanup
+    # -----------------------------
+
+    def clear_session(self, session_id: str) -> None:
+        """
+        Completely delete a session's memory.
+        """
+        with self._write() as db:
+            self._delete_sessions(db, [session_id])
+        self._transcripts.pop(session_id, None)
+        self._notify(session_id)
+
+    def clear_all(self) -> None:
+        """
+        Wipe all memory (admin / shutdown).
+        """
+        with self._write() as db:
+            db.execute("DELETE FROM messages")
+            db.execute("DELETE FROM sessions")
+            db.execute("DELETE FROM analysis_claims")
+        self._transcripts.clear()
+        self._notify(None)
+
+    def _is_stale(self, last_active: float) -> bool:
+        return self.expiry.enabled and last_active <= self.expiry.clock() - self.expiry.ttl_seconds
+
+    def _expire_sessions(self, idle_since: float, session_id: str | None = None) -> int:
+        """
+        Delete sessions (or just `session_id`) idle since before `idle_since`,
+        all in one transaction. Returns how many; each is reported through
+        the expiry engine.
+        """
+        if session_id is not None:
+            query, params = "SELECT session_id FROM sessions WHERE session_id = ? AND last_active <= ?", (session_id, idle_since)
+        else:
+            query, params = "SELECT session_id FROM sessions WHERE last_active <= ?", (idle_since,)
+
+        # Cheap read first: the common case has nothing to expire
+        if not self._read(query, params):
+            return 0
+        with self._write() as db:
+            # Re-checked under the write lock: another worker may have touched or removed them
+            stale = [row[0] for row in db.execute(query, params).fetchall()]
+            self._delete_sessions(db, stale)
+        for stale_id in stale:
+            self.expiry._expire(stale_id)
+        return len(stale)
+
+    @staticmethod
+    def _delete_sessions(db: sqlite3.Connection, session_ids: List[str]) -> None:
+        db.executemany("DELETE FROM messages WHERE session_id = ?", [(s,) for s in session_ids])
+        db.executemany("DELETE FROM sessions WHERE session_id = ?", [(s,) for s in session_ids])
+        db.executemany("DELETE FROM analysis_claims WHERE session_id = ?", [(s,) for s in session_ids])
+
+    def _expired(self, session_id: str) -> None:
+        self._transcripts.pop(session_id, None)
+        self._notify(session_id)
+
+    def _seq_of(self, session_id: str, message_id: str) -> Optional[int]:
+        try:
+            uid = uuid.UUID(message_id).bytes
+        except ValueError:
+            return None
+        rows = self._read("SELECT seq FROM messages WHERE session_id = ? AND id = ?", (session_id, uid))
+        return rows[0][0] if rows else None
+
+    def _records(self, sql: str, params: tuple) -> List[MessageRecord]:
+        return [
+            MessageRecord(
+                session_id, user_id, role, content, language,
+                created_at=created_at, uid=bytes(uid), seq=seq
+            )
+            for seq, session_id, uid, user_id, role, content, language, created_at in self._read(sql, params)
+        ]
+
+    # -----------------------------
+    # Change notifications
+    # -----------------------------
+
+    def add_listener(self, callback: Callable[[str | None], None]) -> None:
+        """
+        Register a callback run after a session's messages change
+        (used to invalidate cached analysis results).
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, session_id: str | None) -> None:
+        for callback in self._listeners:
+            try:
+                callback(session_id)
+            except Exception as e:
+                print(f"Error in session change listener: {e}")
@@ -1,8 +1,19 @@
 import os
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
 from supabase import create_client, Client
 from datetime import datetime
 import uuid
+from app.ai.transcript import ANALYSIS_ROLES, Transcript
+from app.storage.session_aggregate import SessionAggregate
+
+
+def _is_missing_column(error: Exception, column: str) -> bool:
+    """
+    True when a PostgREST error says `column` does not exist (code 42703).
+    """
+    text = str(error)
+    return getattr(error, "code", None) == "42703" or (column in text and "does not exist" in text)
+
 
 class SupabaseStorage:
     def __init__(self):
@@ -14,6 +25,24 @@ class SupabaseStorage:
             print("WARNING: Supabase URL or Key not found in environment.")
         else:
             self.client: Client = create_client(self.url, self.key)
+        # Called with the session_id whenever a session changes (None: all sessions)
+        self._listeners: List[Callable[[str | None], None]] = []
+        # Cleared once a query finds the messages.seq migration missing
+        self._has_seq = True
+
+    def add_listener(self, callback: Callable[[str | None], None]) -> None:
+        """
+        Register a callback run after a session's messages change
+        (used to invalidate cached analysis results).
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, session_id: str | None) -> None:
+        for callback in self._listeners:
+            try:
+                callback(session_id)
+            except Exception as e:
+                print(f"Error in session change listener: {e}")
 
     def add_message(
         self,
@@ -48,6 +77,7 @@ class SupabaseStorage:
                 }
                 
                 res = self.client.table("messages").insert(db_message).execute()
+                self._notify(session_id)
                 return res.data[0] if res.data else message
             except Exception as e:
                 print(f"Error storing message in Supabase: {e}")
@@ -67,6 +97,72 @@ class SupabaseStorage:
                 return []
         return []
 
+    def get_messages_after(
+        self,
+        session_id: str,
+        after: int | str | None = None,
+        limit: int | None = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Messages that follow the cursor `after` (a seq, or a message id),
+        oldest first, at most `limit` of them. Uses the messages.seq column
+        (migrations/add_seq_to_messages.sql), so only the page is fetched.
+        Without that migration, pages by (created_at, id) instead.
+        """
+        if not self.client:
+            return []
+        if self._has_seq:
+            try:
+                return self._messages_after_seq(session_id, after, limit)
+            except Exception as e:
+                if not _is_missing_column(e, "seq"):
+                    print(f"Error fetching messages from Supabase: {e}")
+                    return []
+                self._has_seq = False
+                print("WARNING: messages.seq is missing; run migrations/add_seq_to_messages.sql. "
+                      "Paging chat history by created_at until then.")
+        try:
+            return self._messages_after_created_at(session_id, after, limit)
+        except Exception as e:
+            print(f"Error fetching messages from Supabase: {e}")
+            return []
+
+    def _messages_after_seq(self, session_id: str, after: int | str | None, limit: int | None) -> List[Dict[str, Any]]:
+        if isinstance(after, str):
+            res = self.client.table("messages").select("seq").eq("room_id", session_id).eq("id", after).limit(1).execute()
+            # An unknown id pages from the start
+            after = res.data[0]["seq"] if res.data else None
+
+        query = self.client.table("messages").select("*").eq("room_id", session_id)
+        if after is not None:
+            query = query.gt("seq", after)
+        query = query.order("seq")
+        if limit is not None:
+            query = query.limit(limit)
+        return query.execute().data
+
+    def _messages_after_created_at(self, session_id: str, after: int | str | None, limit: int | None) -> List[Dict[str, Any]]:
+        # Without seq every cursor handed out is a message id; a seq
+        # cursor from before a rollback pages from the start
+        query = self.client.table("messages").select("*").eq("room_id", session_id)
+        if isinstance(after, str):
+            res = self.client.table("messages").select("id,created_at").eq("room_id", session_id).eq("id", after).limit(1).execute()
+            if res.data:
+                created_at, last_id = res.data[0]["created_at"], res.data[0]["id"]
+                # id breaks ties between messages stored in the same instant
+                query = query.or_(f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt.{last_id})')
+        query = query.order("created_at").order("id")
+        if limit is not None:
+            query = query.limit(limit)
+        return query.execute().data
+
+    def get_transcript(self, session_id: str) -> Transcript:
+        """
+        Rendered transcript of the session's user/assistant messages.
+        Messages live in the database, so it is rebuilt on every call.
+        """
+        return Transcript(self.get_session_messages(session_id), roles=ANALYSIS_ROLES, session_id=session_id)
+
     def clear_session(self, session_id: str) -> None:
         """
         Delete all messages for a session in Supabase.
@@ -76,6 +172,7 @@ class SupabaseStorage:
                 self.client.table("messages").delete().eq("room_id", session_id).execute()
             except Exception as e:
                 print(f"Error clearing session in Supabase: {e}")
+        self._notify(session_id)
 
     def get_user_messages(self, session_id: str) -> List[str]:
         """
@@ -84,6 +181,35 @@ class SupabaseStorage:
         messages = self.get_session_messages(session_id)
         return [m["content"] for m in messages if m["role"] == "user"]
 
+    def get_session_aggregate(self, session_id: str) -> SessionAggregate | None:
+        """
+        Running counts for the session (None when it has no messages), read
+        from the trigger-maintained session_aggregates table
+        (migrations/create_session_aggregates.sql). Without that table, or
+        without a row for the session, they are built from the message
+        metadata, never the bodies.
+        """
+        if not self.client:
+            return None
+        try:
+            res = self.client.table("session_aggregates").select("*").eq("room_id", session_id).limit(1).execute()
+            if res.data:
+                return SessionAggregate.from_row(res.data[0])
+        except Exception as e:
+            print(f"Error reading session aggregate, counting messages instead: {e}")
+
+        try:
+            res = self.client.table("messages").select("user_id, role, created_at").eq("room_id", session_id).order("created_at").execute()
+        except Exception as e:
+            print(f"Error fetching message metadata from Supabase: {e}")
+            return None
+        if not res.data:
+            return None
+        aggregate = SessionAggregate()
+        for row in res.data:
+            aggregate.add(row.get("user_id"), row.get("role"), SessionAggregate.epoch(row["created_at"]))
+        return aggregate
+
     def get_last_n_messages(self, session_id: str, n: int = 10) -> List[Dict[str, Any]]:
         if self.client:
             try:
@@ -120,6 +246,7 @@ class SupabaseStorage:
                 self.client.table("messages").delete().neq("room_id", "keep").execute()
             except Exception as e:
                 print(f"Error clearing all messages: {e}")
+        self._notify(None)
 
     def save_summary(self, session_id: str, data: Any) -> None:
         """
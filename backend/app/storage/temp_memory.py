@@ -1,24 +1,54 @@
 # backend/app/storage/memory.py
 
-from collections import defaultdict, deque
-from datetime import datetime
-from typing import List, Dict, Any
+import time
 import uuid
+from bisect import bisect_right
+from collections import defaultdict, deque
+from itertools import count, islice
+from typing import Callable, List, Dict, Any
+
+from app.ai.transcript import ANALYSIS_ROLES, Transcript
+from app.config import settings
+from app.core.expiry import ExpiryEngine
+from app.storage.message_record import MessageRecord
+from app.storage.session_aggregate import SessionAggregate
 
 
 class TempMemory:
     """
     In-memory session-based chat memory.
     Used by agents, analytics, and summary services.
+
+    Messages are stored as compact MessageRecord objects, which read like
+    message dicts; ChatService turns them into plain dicts for the API.
+    Each message gets a `seq` that only grows, within a session and across
+    clears and restarts, so a client's history cursor never points ahead.
+
+    Unapproved sessions (settings.AUTO_DELETE_UNAPPROVED) are deleted once
+    idle for ttl_seconds (default settings.TEMP_MEMORY_TTL_SECONDS): lazily
+    when next accessed, or by the expiry sweeper started with the app.
     """
 
-    def __init__(self, max_messages: int = 500):
+    def __init__(self, max_messages: int = 500, ttl_seconds: float | None = None):
         self.max_messages = max_messages
+        if ttl_seconds is None:
+            ttl_seconds = settings.TEMP_MEMORY_TTL_SECONDS if settings.AUTO_DELETE_UNAPPROVED else 0
+        # Sessions by last activity; an expired session is cleared like any other
+        self.expiry = ExpiryEngine(ttl_seconds, on_expire=self.clear_session)
 
-        # session_id -> deque(messages)
+        # session_id -> deque(MessageRecord)
         self._sessions: Dict[str, deque] = defaultdict(
             lambda: deque(maxlen=self.max_messages)
         )
+        # session_id -> rendered analysis transcript, kept in step with _sessions
+        self._transcripts: Dict[str, Transcript] = {}
+        # session_id -> running counts for analytics, kept in step with _sessions
+        self._aggregates: Dict[str, SessionAggregate] = {}
+        # Called with the session_id whenever a session changes (None: all sessions)
+        self._listeners: List[Callable[[str | None], None]] = []
+        # Shared by all sessions; starting at the clock in ms keeps sequence
+        # numbers increasing across restarts (for well under 1000 messages/s)
+        self._seq = count(int(time.time() * 1000))
 
     # -----------------------------
     # Core Memory Operations
@@ -31,35 +61,95 @@ class TempMemory:
         role: str,
         content: str,
         language: str | None = None,
-    ) -> Dict[str, Any]:
+    ) -> MessageRecord:
         """
         Store a chat message in memory.
         """
 
-        message = {
-            "id": str(uuid.uuid4()),
-            "session_id": session_id,
-            "user_id": user_id,
-            "role": role,                 # user | assistant | system
-            "content": content,
-            "language": language,
-            "timestamp": datetime.utcnow().isoformat(),
-        }
+        # role: user | assistant | system
+        message = MessageRecord(session_id, user_id, role, content, language, seq=next(self._seq))
+
+        # A room reused after expiring starts fresh
+        self.expiry.expired(session_id)
+        session = self._sessions[session_id]
+        aggregate = self._aggregates.setdefault(session_id, SessionAggregate())
+        transcript = self._transcripts.get(session_id)
+        if session and len(session) == session.maxlen:
+            # The deque is about to evict its oldest message
+            oldest = session[0]
+            next_at = session[1].created_at if len(session) > 1 else None
+            aggregate.discard_oldest(oldest.user_id, oldest.role, next_at)
+            if transcript is not None:
+                transcript.discard_oldest(oldest)
+        if transcript is not None:
+            transcript.append(message)
 
-        self._sessions[session_id].append(message)
+        aggregate.add(message.user_id, message.role, message.created_at)
+        session.append(message)
+        self.expiry.touch(session_id)
+        self._notify(session_id)
         return message
 
-    def get_session_messages(self, session_id: str) -> List[Dict[str, Any]]:
+    def get_session_messages(self, session_id: str) -> List[MessageRecord]:
         """
         Retrieve full chat history for a session.
         """
-        return list(self._sessions.get(session_id, []))
+        return list(self._live(session_id))
+
+    def get_messages_after(
+        self,
+        session_id: str,
+        after: int | str | None = None,
+        limit: int | None = None
+    ) -> List[MessageRecord]:
+        """
+        Messages that follow the cursor `after` (a seq, or a message id),
+        oldest first, at most `limit` of them. With no cursor, or one that
+        has already been evicted, the page starts at the oldest message.
+        Only the returned page is copied.
+        """
+        messages = self._live(session_id)
+        if after is None:
+            start = 0
+        elif isinstance(after, int):
+            # Sequence numbers increase along the deque
+            start = bisect_right(messages, after, key=lambda m: m.seq)
+        else:
+            start = self._index_after_id(messages, after)
+        stop = None if limit is None else start + limit
+        return list(islice(messages, start, stop))
+
+    @staticmethod
+    def _index_after_id(messages, message_id: str) -> int:
+        try:
+            uid = uuid.UUID(message_id).bytes
+        except ValueError:
+            return 0
+        # Reconnecting clients are usually close to the end
+        for i in range(len(messages) - 1, -1, -1):
+            if messages[i].uid == uid:
+                return i + 1
+        return 0
+
+    def get_transcript(self, session_id: str) -> Transcript:
+        """
+        Rendered transcript of the session's user/assistant messages.
+        Built on first use, then extended by add_message one line at a time.
+        Returns a snapshot that later messages do not change.
+        """
+        self.expiry.expired(session_id)
+        transcript = self._transcripts.get(session_id)
+        if transcript is None:
+            transcript = Transcript(self._sessions.get(session_id, []), roles=ANALYSIS_ROLES, session_id=session_id)
+            if session_id in self._sessions:
+                self._transcripts[session_id] = transcript
+        return transcript.snapshot()
 
-    def get_last_n_messages(self, session_id: str, n: int = 10) -> List[Dict[str, Any]]:
+    def get_last_n_messages(self, session_id: str, n: int = 10) -> List[MessageRecord]:
         """
         Retrieve last N messages of a session.
         """
-        messages = self._sessions.get(session_id, [])
+        messages = self._live(session_id)
         return list(messages)[-n:]
 
     # -----------------------------
@@ -71,31 +161,37 @@ class TempMemory:
         Returns only user messages (for dependency, gaps, skills).
         """
         return [
-            m["content"]
-            for m in self._sessions.get(session_id, [])
-            if m["role"] == "user"
+            m.content
+            for m in self._live(session_id)
+            if m.role == "user"
         ]
 
+    def get_session_aggregate(self, session_id: str) -> SessionAggregate | None:
+        """
+        Running counts for the session (None when it has no messages).
+        Maintained by add_message, so reading it never scans the messages.
+        """
+        if self.expiry.expired(session_id):
+            return None
+        return self._aggregates.get(session_id)
+
     def get_message_count(self, session_id: str) -> int:
-        return len(self._sessions.get(session_id, []))
+        return len(self._live(session_id))
 
     def get_user_message_count(self, session_id: str) -> int:
-        return len(
-            [m for m in self._sessions.get(session_id, []) if m["role"] == "user"]
-        )
+        aggregate = self.get_session_aggregate(session_id)
+        return aggregate.user_message_count if aggregate is not None else 0
 
     def get_time_gaps(self, session_id: str) -> List[float]:
         """
         Time gaps (in seconds) between consecutive messages.
         Useful for engagement & dependency analysis.
         """
-        messages = self._sessions.get(session_id, [])
+        messages = self._live(session_id)
         gaps = []
 
         for i in range(1, len(messages)):
-            t1 = datetime.fromisoformat(messages[i - 1]["timestamp"])
-            t2 = datetime.fromisoformat(messages[i]["timestamp"])
-            gaps.append((t2 - t1).total_seconds())
+            gaps.append(messages[i].created_at - messages[i - 1].created_at)
 
         return gaps
 
@@ -110,12 +206,46 @@ class TempMemory:
         """
         if session_id in self._sessions:
             del self._sessions[session_id]
+        self._transcripts.pop(session_id, None)
+        self._aggregates.pop(session_id, None)
+        self.expiry.discard(session_id)
+        self._notify(session_id)
 
     def clear_all(self) -> None:
         """
         Wipe all memory (admin / shutdown).
         """
         self._sessions.clear()
+        self._transcripts.clear()
+        self._aggregates.clear()
+        self.expiry.clear()
+        self._notify(None)
+
+    def _live(self, session_id: str):
+        """
+        The session's messages, expiring the session first if it is stale.
+        """
+        if self.expiry.expired(session_id):
+            return []
+        return self._sessions.get(session_id, [])
+
+    # -----------------------------
+    # Change notifications
+    # -----------------------------
+
+    def add_listener(self, callback: Callable[[str | None], None]) -> None:
+        """
+        Register a callback run after a session's messages change
+        (used to invalidate cached analysis results).
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, session_id: str | None) -> None:
+        for callback in self._listeners:
+            try:
+                callback(session_id)
+            except Exception as e:
+                print(f"Error in session change listener: {e}")
 
 
 # -----------------------------
@@ -0,0 +1,157 @@
+import re
+import unittest
+from types import SimpleNamespace
+
+from postgrest.exceptions import APIError
+
+from app.services.chat_service import ChatService
+from app.storage.supabase_storage import SupabaseStorage
+from app.storage.temp_memory import TempMemory
+
+
+class FakeQuery:
+    """
+    Just enough of the PostgREST query builder to run the history queries
+    against a list of rows. Unknown columns fail like the real API does.
+    """
+    def __init__(self, rows):
+        self.rows = rows
+        self.filters = []
+        self.orders = []
+        self.count = None
+
+    def _column(self, column):
+        if self.rows and column not in self.rows[0]:
+            raise APIError({"message": f"column messages.{column} does not exist", "code": "42703"})
+        return column
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        column = self._column(column)
+        self.filters.append(lambda row: row[column] == value)
+        return self
+
+    def gt(self, column, value):
+        column = self._column(column)
+        self.filters.append(lambda row: row[column] > value)
+        return self
+
+    def or_(self, condition):
+        # Only the (created_at, id) keyset form the storage uses
+        match = re.fullmatch(r'created_at\.gt\."(.+)",and\(created_at\.eq\."(.+)",id\.gt\.(.+)\)', condition)
+        created_at, _, last_id = match.groups()
+        self.filters.append(lambda row: (row["created_at"], row["id"]) > (created_at, last_id))
+        return self
+
+    def order(self, column):
+        self.orders.append(self._column(column))
+        return self
+
+    def limit(self, count):
+        self.count = count
+        return self
+
+    def execute(self):
+        rows = [row for row in self.rows if all(f(row) for f in self.filters)]
+        rows.sort(key=lambda row: tuple(row[c] for c in self.orders))
+        return SimpleNamespace(data=rows[:self.count] if self.count is not None else rows)
+
+
+class FakeClient:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def table(self, name):
+        return FakeQuery(self.rows)
+
+
+class TestHistoryCursor(unittest.TestCase):
+
+    def setUp(self):
+        self.memory = TempMemory(max_messages=5, ttl_seconds=0)
+        self.service = ChatService(self.memory)
+        for i in range(4):
+            self.service.post_message("room-1", "alice", "user", f"message {i}")
+            self.service.post_message("room-2", "bob", "user", f"other {i}")
+
+    def contents(self, page):
+        return [m["content"] for m in page["messages"]]
+
+    def test_pages_follow_the_cursor(self):
+        first = self.service.get_history("room-1", limit=3)
+        self.assertEqual(self.contents(first), ["message 0", "message 1", "message 2"])
+        self.assertTrue(first["has_more"])
+
+        second = self.service.get_history("room-1", after=first["next_cursor"], limit=3)
+        self.assertEqual(self.contents(second), ["message 3"])
+        self.assertFalse(second["has_more"])
+
+        # Nothing new: the cursor stays where it is
+        idle = self.service.get_history("room-1", after=second["next_cursor"])
+        self.assertEqual(idle["messages"], [])
+        self.assertEqual(idle["next_cursor"], second["next_cursor"])
+
+        self.service.post_message("room-1", "alice", "user", "message 4")
+        self.assertEqual(self.contents(self.service.get_history("room-1", after=idle["next_cursor"])), ["message 4"])
+
+    def test_cursor_can_be_a_message_id(self):
+        messages = self.service.get_history("room-1")["messages"]
+        page = self.service.get_history("room-1", after=messages[1]["id"])
+        self.assertEqual(self.contents(page), ["message 2", "message 3"])
+
+    def test_evicted_cursor_restarts_from_oldest_kept(self):
+        oldest = self.service.get_history("room-1", limit=1)["messages"][0]
+        for i in range(4, 8):
+            self.service.post_message("room-1", "alice", "user", f"message {i}")
+
+        page = self.service.get_history("room-1", after=oldest["id"])
+        self.assertEqual(self.contents(page), [f"message {i}" for i in range(3, 8)])
+
+    def test_sequence_keeps_growing_after_clear(self):
+        cursor = self.service.get_history("room-1")["next_cursor"]
+        self.service.clear_session("room-1")
+        self.service.post_message("room-1", "alice", "user", "fresh start")
+
+        self.assertEqual(self.contents(self.service.get_history("room-1", after=cursor)), ["fresh start"])
+
+
+class TestSupabaseHistoryCursor(unittest.TestCase):
+
+    def storage(self, with_seq):
+        rows = []
+        for i in range(4):
+            row = {"id": f"id-{i}", "room_id": "room-1", "role": "user", "user_id": "alice",
+                   "content": f"message {i}", "created_at": f"2026-01-01T00:00:0{i // 2}+00:00"}
+            if with_seq:
+                row["seq"] = 10 + i
+            rows.append(row)
+        storage = SupabaseStorage()
+        storage.client = FakeClient(rows)
+        return storage
+
+    def contents(self, rows):
+        return [m["content"] for m in rows]
+
+    def test_cursor_can_be_a_message_id(self):
+        storage = self.storage(with_seq=True)
+        self.assertEqual(self.contents(storage.get_messages_after("room-1", after="id-1")), ["message 2", "message 3"])
+        self.assertEqual(self.contents(storage.get_messages_after("room-1", after=12)), ["message 3"])
+
+    def test_pages_by_created_at_without_seq_migration(self):
+        storage = self.storage(with_seq=False)
+        service = ChatService(storage)
+
+        first = service.get_history("room-1", limit=1)
+        self.assertEqual(self.contents(first["messages"]), ["message 0"])
+        self.assertFalse(storage._has_seq)
+
+        # Ids break ties between messages with the same created_at
+        rest = service.get_history("room-1", after=first["next_cursor"])
+        self.assertEqual(self.contents(rest["messages"]), ["message 1", "message 2", "message 3"])
+        self.assertEqual(self.contents(storage.get_messages_after("room-1", after="id-2")), ["message 3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
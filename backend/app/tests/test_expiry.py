@@ -0,0 +1,131 @@
+import unittest
+
+from app.core.expiry import ExpiryEngine
+from app.core.privacy import TempMemory as RetentionMemory
+from app.storage.temp_memory import TempMemory
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestExpiryEngine(unittest.TestCase):
+
+    def test_sweep_expires_by_last_activity(self):
+        clock = FakeClock()
+        expired = []
+        engine = ExpiryEngine(10, on_expire=expired.append, clock=clock)
+        engine.touch("a")
+        clock.now += 5
+        engine.touch("b")
+        clock.now += 3
+        engine.touch("a")  # activity pushes "a" behind "b"
+
+        clock.now += 8
+        self.assertEqual(engine.sweep(), 1)
+        self.assertEqual(expired, ["b"])
+        clock.now += 3
+        self.assertTrue(engine.expired("a"))
+        self.assertEqual(expired, ["b", "a"])
+        self.assertEqual(len(engine), 0)
+
+    def test_zero_ttl_disables(self):
+        engine = ExpiryEngine(0)
+        engine.touch("a")
+        self.assertEqual(engine.sweep(), 0)
+        self.assertFalse(engine.expired("a"))
+
+
+class TestSessionExpiry(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.memory = TempMemory(ttl_seconds=60)
+        self.memory.expiry.clock = self.clock
+        self.changes = []
+        self.memory.add_listener(self.changes.append)
+
+    def test_idle_session_expires_lazily_on_access(self):
+        self.memory.add_message("room-1", "alice", "user", "hi")
+        self.clock.now += 30
+        self.assertEqual(self.memory.get_message_count("room-1"), 1)
+
+        self.clock.now += 31
+        self.assertEqual(self.memory.get_session_messages("room-1"), [])
+        self.assertEqual(len(self.memory.get_transcript("room-1")), 0)
+        self.assertEqual(self.changes[-1], "room-1")
+        self.assertNotIn("room-1", self.memory._sessions)
+
+    def test_sweeper_only_removes_idle_sessions(self):
+        self.memory.add_message("room-1", "alice", "user", "hi")
+        self.clock.now += 50
+        self.memory.add_message("room-2", "bob", "user", "hello")
+        self.clock.now += 20
+
+        self.assertEqual(self.memory.expiry.sweep(), 1)
+        self.assertEqual(sorted(self.memory._sessions), ["room-2"])
+
+
+class TestRetentionMemory(unittest.TestCase):
+
+    def test_old_messages_are_dropped(self):
+        clock = FakeClock()
+        memory = RetentionMemory(retention_seconds=10)
+        memory.expiry.clock = clock
+        memory.add_message({"content": "first"})
+        clock.now += 6
+        memory.add_message({"content": "second"})
+        clock.now += 6
+
+        self.assertEqual([m["content"] for m in memory.get_all_messages()], ["second"])
+        memory.clear_messages()
+        self.assertEqual(memory.messages, [])
+
+    def test_messages_attribute_can_be_changed(self):
+        clock = FakeClock()
+        memory = RetentionMemory(retention_seconds=10)
+        memory.expiry.clock = clock
+        first, second = {"content": "first"}, {"content": "second"}
+        memory.add_message(first)
+        memory.add_message(second)
+
+        # Direct changes to the list stick, as they did when it was a plain attribute
+        memory.messages.remove(second)
+        memory.messages.append({"content": "manual"})
+        self.assertEqual([m["content"] for m in memory.get_all_messages()], ["first", "manual"])
+
+        # Expiry still removes the right message, and skips the one removed by hand
+        memory.messages.insert(0, {"content": "early"})
+        clock.now += 11
+        self.assertEqual([m["content"] for m in memory.get_all_messages()], ["early", "manual"])
+
+        memory.messages = []
+        memory.add_message({"content": "fresh"})
+        self.assertEqual([m["content"] for m in memory.get_all_messages()], ["fresh"])
+
+    def test_expired_messages_are_cut_out_in_batches(self):
+        clock = FakeClock()
+        memory = RetentionMemory(retention_seconds=10)
+        memory.expiry.clock = clock
+        for i in range(10):
+            memory.add_message({"content": f"old {i}"})
+            clock.now += 1
+
+        # Three expire: too few to compact yet, but never visible
+        clock.now += 2
+        memory.add_message({"content": "new"})
+        self.assertEqual(len(memory._expired), 3)
+        self.assertEqual([m["content"] for m in memory.messages], [f"old {i}" for i in range(3, 10)] + ["new"])
+        self.assertEqual(memory._expired, [])
+
+        # A whole backlog goes in one slice
+        clock.now += 20
+        self.assertEqual(memory.get_all_messages(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,258 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from app.services.history_service import HistoryService
+from app.services.job_queue import JobQueue, JOB_DONE, JOB_FAILED, JOB_RUNNING
+from app.storage.knowledge_store import KnowledgeStore
+from app.storage.temp_memory import TempMemory
+
+
+class StubSummaryService:
+    async def generate_session_analysis(self, room_id, user_id=None):
+        return {"summary": {"topics_covered": ["Recursion"]}, "room_id": room_id}
+
+
+class TestJobQueue(unittest.IsolatedAsyncioTestCase):
+
+    async def wait_until_finished(self, queue, job_id):
+        for _ in range(200):
+            job = queue.get(job_id)
+            if job["status"] in (JOB_DONE, JOB_FAILED):
+                return job
+            await asyncio.sleep(0.01)
+        self.fail("job did not finish")
+
+    async def test_runs_job_and_stores_result(self):
+        queue = JobQueue(workers=1)
+
+        async def handler(payload):
+            return {"room": payload["room_id"]}
+
+        queue.register_handler("end_session", handler)
+        await queue.start()
+        try:
+            job = queue.enqueue("end_session", {"room_id": "r1"})
+            finished = await self.wait_until_finished(queue, job["job_id"])
+        finally:
+            await queue.stop()
+
+        self.assertEqual(finished["status"], JOB_DONE)
+        self.assertEqual(finished["result"], {"room": "r1"})
+
+    async def test_dedupes_active_jobs(self):
+        queue = JobQueue(workers=1)
+
+        async def handler(payload):
+            return None
+
+        queue.register_handler("end_session", handler)
+        first = queue.enqueue("end_session", {"room_id": "r1"}, dedupe_key="r1")
+        second = queue.enqueue("end_session", {"room_id": "r1"}, dedupe_key="r1")
+        self.assertEqual(first["job_id"], second["job_id"])
+
+    async def test_failures_are_recorded(self):
+        queue = JobQueue(workers=1)
+
+        async def handler(payload):
+            raise RuntimeError("boom")
+
+        queue.register_handler("end_session", handler)
+        await queue.start()
+        try:
+            job = queue.enqueue("end_session", {})
+            finished = await self.wait_until_finished(queue, job["job_id"])
+        finally:
+            await queue.stop()
+
+        self.assertEqual(finished["status"], JOB_FAILED)
+        self.assertEqual(finished["error"], "boom")
+
+    async def test_pending_jobs_survive_restart(self):
+        async def handler(payload):
+            return "resumed"
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "jobs.sqlite3")
+
+            # Enqueued but never started (process died)
+            before = JobQueue(db_path=path)
+            before.register_handler("end_session", handler)
+            job = before.enqueue("end_session", {"room_id": "r1"})
+
+            after = JobQueue(db_path=path, workers=1)
+            after.register_handler("end_session", handler)
+            await after.start()
+            try:
+                finished = await self.wait_until_finished(after, job["job_id"])
+            finally:
+                await after.stop()
+
+        self.assertEqual(finished["result"], "resumed")
+
+    async def test_workers_sharing_a_file_run_each_job_once(self):
+        runs = []
+
+        async def handler(payload):
+            runs.append(payload["n"])
+            await asyncio.sleep(0.01)
+            return payload["n"]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "jobs.sqlite3")
+            queues = [JobQueue(db_path=path, workers=2) for _ in range(3)]
+            for queue in queues:
+                queue.register_handler("end_session", handler)
+            jobs = [queues[0].enqueue("end_session", {"n": n}) for n in range(10)]
+
+            # Every queue sees every queued job at start; the claim lets one run it
+            for queue in queues:
+                await queue.start()
+            try:
+                for job in jobs:
+                    await self.wait_until_finished(queues[1], job["job_id"])
+            finally:
+                for queue in queues:
+                    await queue.stop()
+
+            with queues[0]._lock:
+                mode = queues[0]._db.execute("PRAGMA journal_mode").fetchone()[0]
+
+        self.assertEqual(sorted(runs), list(range(10)))
+        self.assertEqual(mode, "wal")
+
+    async def test_only_stale_running_jobs_are_taken_over(self):
+        async def handler(payload):
+            return "taken over"
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "jobs.sqlite3")
+            other = JobQueue(db_path=path)
+            other.register_handler("end_session", handler)
+            job = other.enqueue("end_session", {})
+            # Claimed by a live worker in another process
+            with other._lock:
+                other._db.execute(
+                    "UPDATE jobs SET status = 'running', owner = 'other', heartbeat = ?, attempts = 1 WHERE id = ?",
+                    (time.time(), job["job_id"]),
+                )
+                other._db.commit()
+
+            queue = JobQueue(db_path=path, workers=1, heartbeat_seconds=0.01, stale_after_seconds=0.2)
+            queue.register_handler("end_session", handler)
+            await queue.start()
+            try:
+                await asyncio.sleep(0.05)
+                self.assertEqual(queue.get(job["job_id"])["status"], JOB_RUNNING)
+
+                # The other worker stops beating: the job is taken over and run here
+                finished = await self.wait_until_finished(queue, job["job_id"])
+            finally:
+                await queue.stop()
+
+        self.assertEqual(finished["result"], "taken over")
+        self.assertEqual(finished["attempts"], 2)
+
+    async def test_dedupe_holds_across_workers(self):
+        async def handler(payload):
+            return "done"
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "jobs.sqlite3")
+            queues = [JobQueue(db_path=path) for _ in range(4)]
+            for queue in queues:
+                queue.register_handler("end_session", handler)
+
+            # Each queue has its own lock: only the file lock keeps them apart
+            ids = []
+            barrier = threading.Barrier(len(queues) * 4)
+
+            def enqueue(queue):
+                barrier.wait()
+                ids.append(queue.enqueue("end_session", {}, dedupe_key="end:room-1")["job_id"])
+
+            threads = [threading.Thread(target=enqueue, args=(queue,)) for queue in queues for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(len(set(ids)), 1)
+            self.assertEqual(queues[0].stats()["jobs"], {"queued": 1})
+
+    async def test_job_that_keeps_losing_its_worker_fails(self):
+        async def handler(payload):
+            return "never"
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "jobs.sqlite3")
+            queue = JobQueue(db_path=path, workers=1, max_attempts=3)
+            queue.register_handler("end_session", handler)
+            job = queue.enqueue("end_session", {})
+            # Its third run was claimed by a worker that died
+            with queue._lock:
+                queue._db.execute(
+                    "UPDATE jobs SET status = 'running', owner = 'other', heartbeat = 0, attempts = 3 WHERE id = ?",
+                    (job["job_id"],),
+                )
+                queue._db.commit()
+
+            await queue.start()
+            try:
+                failed = await self.wait_until_finished(queue, job["job_id"])
+            finally:
+                await queue.stop()
+
+        self.assertEqual(failed["status"], JOB_FAILED)
+        self.assertEqual(failed["attempts"], 3)
+        self.assertIn("3 attempts", failed["error"])
+
+    async def test_wait_for_update_sees_earlier_change(self):
+        queue = JobQueue(workers=1)
+
+        async def handler(payload):
+            return "done"
+
+        queue.register_handler("end_session", handler)
+        job = queue.enqueue("end_session", {})
+        await queue.start()
+        try:
+            # The job may finish before we start waiting; that must not be missed
+            await self.wait_until_finished(queue, job["job_id"])
+            seen = await queue.wait_for_update(job["job_id"], timeout=5, since=job["updated_at"])
+        finally:
+            await queue.stop()
+
+        self.assertEqual(seen["status"], JOB_DONE)
+
+    async def test_end_session_job_on_temp_memory(self):
+        memory = TempMemory(ttl_seconds=0)
+        knowledge = KnowledgeStore()
+        history = HistoryService(storage=memory, history_store=knowledge)
+        memory.add_message("room-1", "alice", "user", "What is recursion?")
+
+        async def handler(payload):
+            return await history.end_session(payload["room_id"], payload["user_id"], StubSummaryService())
+
+        queue = JobQueue(workers=1)
+        queue.register_handler("end_session", handler)
+        await queue.start()
+        try:
+            job = queue.enqueue("end_session", {"room_id": "room-1", "user_id": "alice"})
+            finished = await self.wait_until_finished(queue, job["job_id"])
+        finally:
+            await queue.stop()
+
+        self.assertEqual(finished["status"], JOB_DONE)
+        self.assertTrue(finished["result"]["archived"])
+        self.assertEqual(memory.get_session_messages("room-1"), [])
+        entries = history.get_session_history("room-1")
+        self.assertEqual([e["topic"] for e in entries], ["Recursion"])
+        self.assertEqual(history.get_user_sessions("alice"), entries)
+
+
+if __name__ == "__main__":
+    unittest.main()
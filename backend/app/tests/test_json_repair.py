@@ -0,0 +1,80 @@
+import json
+import unittest
+
+from app.ai.agents.decision_agent import DecisionAgent
+from app.ai.agents.gap_agent import GapAgent
+from app.ai.json_repair import PARSE_FAILED, PARSE_OK, PARSE_REPAIRED, extract_json
+from app.ai.orchestrator import AIOrchestrator
+from app.ai.transcript import Transcript
+
+DECISION = {"final_decisions": ["Use BFS"], "agreements": [], "disagreements": [], "open_questions": []}
+
+
+class TestExtractJson(unittest.TestCase):
+
+    def test_plain_json_is_ok(self):
+        self.assertEqual(extract_json(json.dumps(DECISION)), (DECISION, PARSE_OK))
+
+    def test_fenced_with_preamble(self):
+        text = "Sure! Here is the analysis:\n```json\n" + json.dumps(DECISION) + "\n```\nHope this helps."
+        self.assertEqual(extract_json(text), (DECISION, PARSE_REPAIRED))
+
+    def test_common_defects(self):
+        text = "{'final_decisions': ['Use BFS',], 'agreements': [], 'done': True, 'note': \"it's fine\",}"
+        value, status = extract_json(text)
+        self.assertEqual(status, PARSE_REPAIRED)
+        self.assertEqual(value, {"final_decisions": ["Use BFS"], "agreements": [], "done": True, "note": "it's fine"})
+
+    def test_truncated_output_is_closed(self):
+        value, status = extract_json('{"final_decisions": ["Use BFS", "Rev')
+        self.assertEqual(status, PARSE_REPAIRED)
+        self.assertEqual(value, {"final_decisions": ["Use BFS", "Rev"]})
+
+    def test_no_object(self):
+        self.assertEqual(extract_json("I cannot help with that."), (None, PARSE_FAILED))
+
+
+class TestAgentParsing(unittest.TestCase):
+
+    def test_decision_agent_strips_fences(self):
+        result = DecisionAgent().parse_response("```json\n" + json.dumps(DECISION) + "\n```")
+        self.assertEqual(result, DECISION)
+
+    def test_schema_mismatch_falls_back(self):
+        result = GapAgent().parse_response('{"conceptual_gaps": "none"}')
+        self.assertIn("raw_response", result)
+        self.assertEqual(result["misunderstandings"], [])
+
+
+class ReaskLLM:
+    """
+    Returns garbage for the agent prompt and valid JSON for the repair prompt.
+    """
+    def __init__(self):
+        self.prompts = []
+
+    async def generate_response(self, prompt, system_prompt="", temperature=None, max_tokens=2000, **kwargs):
+        self.prompts.append(prompt)
+        if "Fix it so it is valid JSON" in prompt:
+            return json.dumps(DECISION)
+        return "final decisions: use BFS"
+
+
+class TestReask(unittest.IsolatedAsyncioTestCase):
+
+    async def test_reask_as_last_resort(self):
+        llm = ReaskLLM()
+        orchestrator = AIOrchestrator(llm)
+        transcript = Transcript([{"role": "user", "user_id": "a", "content": "Let's use BFS."}])
+
+        result = await orchestrator._run_agent_once("decision", transcript)
+
+        self.assertEqual(result, DECISION)
+        self.assertEqual(len(llm.prompts), 2)
+        parsing = orchestrator.get_metrics()["parsing"]["decision"]
+        self.assertEqual(parsing["reasked"], 1)
+        self.assertEqual(parsing["failure_rate"], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import json
+import unittest
+
+from app.ai.llm_backends import FakeLLMBackend, FakeLLMError
+from app.ai.llm_client import LLMClient
+from app.ai.orchestrator import AIOrchestrator, ANALYSIS_AGENTS
+
+MESSAGES = [
+    {"role": "user", "user_id": "alice", "content": "Can someone explain recursion and the base case?"},
+    {"role": "user", "user_id": "bob", "content": "Recursion calls itself until the base case stops it."},
+]
+
+
+class TestFakeLLMBackend(unittest.IsolatedAsyncioTestCase):
+
+    async def test_schema_valid_and_deterministic_per_agent(self):
+        backend = FakeLLMBackend(latency_ms=0)
+        orchestrator = AIOrchestrator(LLMClient(backend=backend))
+
+        for name in ANALYSIS_AGENTS:
+            agent = orchestrator.agents[name]
+            prompt = agent.system_prompt + "\n\n" + agent.build_prompt(MESSAGES)
+            first = await backend.generate(prompt, 0.3, 2000)
+            second = await backend.generate(prompt, 0.3, 2000)
+
+            self.assertEqual(first, second)
+            self.assertTrue(set(agent.output_keys) <= set(json.loads(first)), name)
+
+    async def test_full_analysis_parses(self):
+        llm = LLMClient(backend=FakeLLMBackend(latency_ms=0))
+        analysis = await AIOrchestrator(llm).analyze_session(MESSAGES)
+
+        for key in ("topics_covered", "final_decisions", "conceptual_gaps", "participant_skills", "mcqs"):
+            self.assertIn(key, analysis)
+        self.assertEqual({p["user_id"] for p in analysis["participant_skills"]}, {"alice", "bob"})
+
+    async def test_error_injection(self):
+        backend = FakeLLMBackend(latency_ms=0, error_rate=1.0, seed=1)
+        with self.assertRaises(FakeLLMError):
+            await backend.generate("anything", 0.3, 100)
+
+    def test_lognormal_latency_is_seeded(self):
+        a = FakeLLMBackend(latency="lognormal", latency_ms=100, seed=7)
+        b = FakeLLMBackend(latency="lognormal", latency_ms=100, seed=7)
+        self.assertEqual([a.sample_latency() for _ in range(5)], [b.sample_latency() for _ in range(5)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from app.ai.llm_cache import LLMResponseCache, make_cache_key
+
+
+class TestLLMResponseCache(unittest.TestCase):
+
+    def test_key_depends_on_every_input(self):
+        base = make_cache_key("m", "sys", "prompt", 0.3, 2000)
+        self.assertEqual(base, make_cache_key("m", "sys", "prompt", 0.3, 2000))
+        self.assertNotEqual(base, make_cache_key("m2", "sys", "prompt", 0.3, 2000))
+        self.assertNotEqual(base, make_cache_key("m", "sys2", "prompt", 0.3, 2000))
+        self.assertNotEqual(base, make_cache_key("m", "sys", "prompt2", 0.3, 2000))
+        self.assertNotEqual(base, make_cache_key("m", "sys", "prompt", 0.4, 2000))
+        self.assertNotEqual(base, make_cache_key("m", "sys", "prompt", 0.3, 1000))
+
+    def test_lru_eviction_and_counters(self):
+        cache = LLMResponseCache(max_entries=2, ttl_seconds=60)
+        cache.set("a", "A")
+        cache.set("b", "B")
+        self.assertEqual(cache.get("a"), "A")  # "a" is now most recent
+        cache.set("c", "C")                    # evicts "b"
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "C")
+
+        stats = cache.stats()
+        self.assertEqual(stats["memory_hits"], 2)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["evictions"], 1)
+
+    def test_ttl_expiry(self):
+        cache = LLMResponseCache(max_entries=10, ttl_seconds=0)
+        cache.set("a", "A")
+        time.sleep(0.01)
+        self.assertIsNone(cache.get("a"))
+
+    def test_disk_tier_survives_restart(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.sqlite3")
+            LLMResponseCache(db_path=path).set("k", "persisted")
+
+            restarted = LLMResponseCache(db_path=path)
+            self.assertEqual(restarted.get("k"), "persisted")
+            self.assertEqual(restarted.stats()["disk_hits"], 1)
+            # Promoted into memory on first read
+            self.assertEqual(restarted.get("k"), "persisted")
+            self.assertEqual(restarted.stats()["memory_hits"], 1)
+
+
+class TestAsyncDiskTier(unittest.IsolatedAsyncioTestCase):
+
+    async def test_disk_io_runs_off_the_loop_and_purges_periodically(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.sqlite3")
+            cache = LLMResponseCache(ttl_seconds=0, db_path=path, purge_interval_seconds=3600)
+
+            with mock.patch("app.ai.llm_cache.asyncio.to_thread", wraps=asyncio.to_thread) as to_thread:
+                await cache.aset("old", "A")   # first write purges, then not again for an hour
+                await cache.aset("new", "B")
+                self.assertIsNone(await cache.aget("old"))
+            self.assertEqual(to_thread.call_count, 3)
+
+            rows = cache._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            self.assertEqual(rows, 1)  # "new" is expired too, but waits for the next purge
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from google.api_core import exceptions as google_exceptions
+
+from app.ai.llm_backends import GeminiBackend
+from app.ai.llm_client import LLMClient
+from app.ai.rate_limiter import LLMRateLimiter, PRIORITY_INTERACTIVE, PRIORITY_PRECOMPUTE, priority_scope
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FlakyModel:
+    """
+    Fails with 429 `failures` times, then answers.
+    Tracks the peak number of concurrent calls.
+    """
+    def __init__(self, failures=0, delay=0.0):
+        self.failures = failures
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.failures > 0:
+                self.failures -= 1
+                raise google_exceptions.ResourceExhausted("quota exceeded")
+            return FakeResponse('{"ok": true}')
+        finally:
+            self.active -= 1
+
+
+def make_client(model):
+    backend = GeminiBackend(api_key=None, model_name="gemini-test")
+    backend.model = model
+    client = LLMClient(backend=backend)
+    client.cache = None
+    return client
+
+
+FAST_RETRIES = {
+    "LLM_RETRY_BASE_DELAY_SECONDS": 0.001,
+    "LLM_RETRY_MAX_DELAY_SECONDS": 0.01,
+    "LLM_RETRY_DEADLINE_SECONDS": 5.0,
+    "LLM_MAX_RETRIES": 3,
+}
+
+
+class TestLLMClientResilience(unittest.IsolatedAsyncioTestCase):
+
+    async def test_retries_rate_limit_errors(self):
+        model = FlakyModel(failures=2)
+        with mock.patch.multiple("app.ai.llm_client.settings", **FAST_RETRIES):
+            text = await make_client(model).generate_response("hi")
+
+        self.assertEqual(text, '{"ok": true}')
+        self.assertEqual(model.calls, 3)
+
+    async def test_gives_up_after_max_retries(self):
+        model = FlakyModel(failures=10)
+        with mock.patch.multiple("app.ai.llm_client.settings", **FAST_RETRIES):
+            client = make_client(model)
+            text = await client.generate_response("hi")
+
+        self.assertTrue(text.startswith("Error communicating with LLM"))
+        self.assertEqual(model.calls, 4)
+        self.assertEqual(client.get_metrics()["counters"]["rate_limited"], 4)
+
+    async def test_concurrency_is_bounded(self):
+        model = FlakyModel(delay=0.02)
+        client = make_client(model)
+        client.limiter = LLMRateLimiter(max_concurrency=2)
+
+        await asyncio.gather(*[client.generate_response(f"p{i}") for i in range(6)])
+
+        self.assertEqual(model.peak, 2)
+        metrics = client.get_metrics()
+        self.assertEqual(metrics["queue_wait"]["count"], 6)
+        self.assertGreater(metrics["queue_wait"]["max_seconds"], 0)
+
+    def test_limits_are_split_between_workers(self):
+        limits = {"APP_WORKERS": 2, "LLM_MAX_CONCURRENCY": 4, "LLM_REQUESTS_PER_MINUTE": 60}
+        with mock.patch.multiple("app.ai.llm_client.settings", **limits):
+            client = make_client(FlakyModel())
+
+        self.assertEqual(client.limiter.max_concurrency, 2)
+        self.assertEqual(client.limiter.requests.capacity, 30)
+
+
+class TestFairScheduling(unittest.IsolatedAsyncioTestCase):
+
+    async def test_rooms_share_slots_fairly(self):
+        limiter = LLMRateLimiter(max_concurrency=1)
+        holder = await limiter.acquire(1, flow="busy-room")
+        order = []
+
+        async def call(room, tag):
+            slot = await limiter.acquire(1, flow=room)
+            order.append(tag)
+            await asyncio.sleep(0)
+            limiter.release(slot)
+
+        tasks = [asyncio.create_task(call("busy-room", f"a{i}")) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(call("quiet-room", "b0")))
+        await asyncio.sleep(0)
+        limiter.release(holder)
+        await asyncio.gather(*tasks)
+
+        # The busy room already holds a slot, so the quiet room goes first
+        self.assertEqual(order, ["b0", "a0", "a1", "a2"])
+
+    async def test_background_work_leaves_reserved_slot_for_interactive(self):
+        limiter = LLMRateLimiter(max_concurrency=2, reserved_slots=1)
+        background = await limiter.acquire(1, priority=PRIORITY_PRECOMPUTE)
+        queued = asyncio.create_task(limiter.acquire(1, priority=PRIORITY_PRECOMPUTE))
+        await asyncio.sleep(0)
+        self.assertEqual(limiter.queued(PRIORITY_PRECOMPUTE), 1)
+
+        # The interactive call is admitted at once despite the background queue
+        with priority_scope(PRIORITY_INTERACTIVE):
+            interactive = await asyncio.wait_for(limiter.acquire(1), timeout=0.1)
+        self.assertEqual(interactive, PRIORITY_INTERACTIVE)
+
+        limiter.release(interactive)
+        limiter.release(background)
+        limiter.release(await queued)
+        stats = limiter.stats()["classes"]
+        self.assertEqual(stats[PRIORITY_PRECOMPUTE]["dispatched"], 2)
+        self.assertEqual(stats[PRIORITY_INTERACTIVE]["wait"]["count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import uuid
+from datetime import datetime
+
+from app.services.chat_service import ChatService
+from app.storage.message_record import FIELDS, MessageRecord
+from app.storage.temp_memory import TempMemory
+
+
+class TestMessageRecord(unittest.TestCase):
+
+    def test_reads_like_a_message_dict(self):
+        record = MessageRecord("room-1", "alice", "user", "hi", created_at=1700000000.5)
+
+        self.assertEqual(record["role"], "user")
+        self.assertEqual(record.get("content"), "hi")
+        self.assertIsNone(record.get("language"))
+        self.assertEqual(record.get("missing", "x"), "x")
+        with self.assertRaises(KeyError):
+            record["missing"]
+
+        self.assertEqual(len(record.uid), 16)
+        self.assertEqual(record["id"], str(uuid.UUID(bytes=record.uid)))
+        self.assertEqual(record["timestamp"], "2023-11-14T22:13:20.500000")
+        self.assertEqual(datetime.fromisoformat(record["timestamp"]).isoformat(), record["timestamp"])
+
+    def test_shares_repeated_strings(self):
+        first = MessageRecord("".join(["room-", "1"]), "".join(["ali", "ce"]), "user", "a")
+        second = MessageRecord("".join(["room-", "1"]), "".join(["ali", "ce"]), "user", "b")
+
+        self.assertIs(first.session_id, second.session_id)
+        self.assertIs(first.user_id, second.user_id)
+        self.assertFalse(hasattr(first, "__dict__"))
+
+    def test_api_boundary_returns_plain_dicts(self):
+        memory = TempMemory(ttl_seconds=0)
+        service = ChatService(memory)
+
+        sent = service.post_message("room-1", "alice", "user", "hi")
+        history = service.get_history("room-1")
+
+        self.assertIsInstance(memory.get_session_messages("room-1")[0], MessageRecord)
+        self.assertEqual(type(sent), dict)
+        self.assertEqual(tuple(sent), FIELDS)
+        self.assertEqual(history["messages"], [sent])
+
+    def test_time_gaps_use_epoch_timestamps(self):
+        memory = TempMemory(ttl_seconds=0)
+        memory.add_message("room-1", "alice", "user", "one")
+        memory.add_message("room-1", "bob", "user", "two")
+        memory.get_session_messages("room-1")[1].created_at += 4.0
+
+        gaps = memory.get_time_gaps("room-1")
+        self.assertEqual(len(gaps), 1)
+        self.assertGreaterEqual(gaps[0], 4.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,225 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+from app.ai.agents.skill_agent import SkillAgent
+from app.ai.orchestrator import AIOrchestrator, ANALYSIS_AGENTS
+from app.ai.pipeline import Pipeline
+from app.ai.transcript import Transcript
+
+
+SECTIONS = {
+    "summary": {"topics_covered": ["Recursion"], "key_concepts": [], "important_explanations": [],
+                "action_items": [], "revision_notes": [], "skills_identified": []},
+    "decision": {"final_decisions": [], "agreements": [], "disagreements": [], "open_questions": []},
+    "gap": {"conceptual_gaps": [], "misunderstandings": [], "missing_prerequisites": [], "uncertain_topics": []},
+    "skill": {"participant_skills": []},
+    "quiz": {"mcqs": [], "flashcards": [], "short_questions": []},
+}
+
+MESSAGES = [
+    {"role": "user", "user_id": "alice", "content": "How does recursion terminate?"},
+    {"role": "user", "user_id": "bob", "content": "With a base case."},
+]
+
+
+class StubLLM:
+    """
+    Answers consolidated prompts with `consolidated_response`
+    and single-agent prompts with the matching section.
+    """
+    def __init__(self, consolidated_response: str):
+        self.consolidated_response = consolidated_response
+        self.prompts = []
+
+    async def generate_response(self, prompt, system_prompt="", temperature=None, max_tokens=2000, **kwargs):
+        self.prompts.append(prompt)
+        if "ONE JSON object" in prompt:
+            return self.consolidated_response
+        for name, section in SECTIONS.items():
+            if all(f'"{key}"' in prompt for key in section):
+                return json.dumps(section)
+        return "{}"
+
+
+class TestConsolidatedAnalysis(unittest.IsolatedAsyncioTestCase):
+
+    async def test_single_call_when_response_parses(self):
+        llm = StubLLM("```json\n" + json.dumps(SECTIONS) + "\n```")
+        analysis = await AIOrchestrator(llm).analyze_session(MESSAGES, consolidated=True)
+
+        self.assertEqual(len(llm.prompts), 1)
+        for section in SECTIONS.values():
+            for key in section:
+                self.assertIn(key, analysis)
+
+    async def test_falls_back_to_fan_out_for_missing_sections(self):
+        partial = {k: v for k, v in SECTIONS.items() if k != "quiz"}
+        llm = StubLLM(json.dumps(partial))
+        analysis = await AIOrchestrator(llm).analyze_session(MESSAGES, consolidated=True)
+
+        self.assertEqual(len(llm.prompts), 2)
+        self.assertIn("mcqs", analysis)
+
+    async def test_unparseable_response_runs_every_agent(self):
+        llm = StubLLM("not json at all")
+        await AIOrchestrator(llm).analyze_session(MESSAGES, consolidated=True)
+        self.assertEqual(len(llm.prompts), 1 + len(ANALYSIS_AGENTS))
+
+
+class TestMapReduce(unittest.IsolatedAsyncioTestCase):
+
+    def test_chunks_respect_budget(self):
+        agent = SkillAgent()
+        messages = [{"role": "user", "user_id": "u", "content": "x" * 400} for _ in range(10)]
+        chunks = agent.chunk_messages(messages, token_budget=250)
+
+        self.assertEqual(sum(len(c) for c in chunks), 10)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual([m for c in chunks for m in c], messages)
+
+    def test_skill_merge_unions_per_user(self):
+        merged = SkillAgent().merge_results([
+            {"participant_skills": [{"user_id": "alice", "skills": ["Leadership"]}]},
+            {"participant_skills": [{"user_id": "alice", "skills": ["Leadership", "Communication"]},
+                                    {"user_id": "bob", "skills": ["Critical thinking"]}]},
+            {"error": "Failed to parse AI response", "raw": "oops"},
+        ])
+        self.assertEqual(merged["participant_skills"], [
+            {"user_id": "alice", "skills": ["Leadership", "Communication"]},
+            {"user_id": "bob", "skills": ["Critical thinking"]},
+        ])
+
+    async def test_long_transcript_is_split_and_merged(self):
+        llm = StubLLM("{}")
+        long_messages = MESSAGES * 50
+        with mock.patch("app.ai.orchestrator.settings.LLM_TRANSCRIPT_TOKEN_BUDGET", 200):
+            result = await AIOrchestrator(llm).run_agent("gap", long_messages)
+
+        self.assertGreater(len(llm.prompts), 1)
+        self.assertEqual(set(result), set(SECTIONS["gap"]))
+
+
+class SlowQuizLLM(StubLLM):
+    """
+    Like StubLLM, but the quiz prompt takes `quiz_delay` seconds.
+    """
+    def __init__(self, quiz_delay: float):
+        super().__init__("{}")
+        self.quiz_delay = quiz_delay
+
+    async def generate_response(self, prompt, *args, **kwargs):
+        if '"mcqs"' in prompt:
+            await asyncio.sleep(self.quiz_delay)
+        return await super().generate_response(prompt, *args, **kwargs)
+
+
+class TestDeadlines(unittest.IsolatedAsyncioTestCase):
+
+    async def test_slow_agent_is_reported_pending_and_cached(self):
+        llm = SlowQuizLLM(quiz_delay=0.2)
+        orchestrator = AIOrchestrator(llm)
+        with mock.patch("app.ai.orchestrator.settings.ANALYSIS_AGENT_TIMEOUTS", {"quiz": 0.05}):
+            analysis = await orchestrator.analyze_session(MESSAGES)
+
+            self.assertTrue(analysis["partial"])
+            self.assertEqual(analysis["pending_agents"], {"quiz": "timed_out"})
+            self.assertIn("topics_covered", analysis)
+            self.assertNotIn("mcqs", analysis)
+
+            # The quiz keeps running in the background and lands in the cache
+            await asyncio.sleep(0.3)
+            calls = len(llm.prompts)
+            analysis = await orchestrator.analyze_session(MESSAGES)
+
+        self.assertEqual(len(llm.prompts), calls)
+        self.assertIn("mcqs", analysis)
+        self.assertNotIn("pending_agents", analysis)
+
+    async def test_total_budget_bounds_latency(self):
+        llm = SlowQuizLLM(quiz_delay=0.3)
+        with mock.patch("app.ai.orchestrator.settings.ANALYSIS_TOTAL_TIMEOUT_SECONDS", 0.1):
+            analysis = await asyncio.wait_for(AIOrchestrator(llm).analyze_session(MESSAGES), timeout=1)
+        self.assertIn("quiz", analysis["pending_agents"])
+
+
+    async def test_abandoned_agent_cancels_its_translation(self):
+        llm = SlowQuizLLM(quiz_delay=0.2)
+        orchestrator = AIOrchestrator(llm)
+        with mock.patch("app.ai.orchestrator.settings.ANALYSIS_AGENT_TIMEOUTS", {"quiz": 0.05}):
+            analysis = await orchestrator.analyze_session(MESSAGES, target_language="Hindi")
+            translations = sum("Strings to translate:" in p for p in llm.prompts)
+
+            # The quiz still finishes and is cached, but is never translated
+            await asyncio.sleep(0.3)
+
+        self.assertEqual(analysis["pending_agents"], {"quiz": "timed_out", "translation": "timed_out"})
+        self.assertEqual(sum("Strings to translate:" in p for p in llm.prompts), translations)
+        self.assertTrue(any('"mcqs"' in p for p in llm.prompts))
+        self.assertIsNotNone(orchestrator.results.get(Transcript(MESSAGES).fingerprint, "quiz"))
+
+
+class TestStreaming(unittest.IsolatedAsyncioTestCase):
+
+    async def test_failing_agents_still_end_the_stream(self):
+        # StubLLM cannot stream, so the summary fails too
+        orchestrator = AIOrchestrator(StubLLM("{}"))
+        original = orchestrator._agent_task
+
+        def failing_task(name, transcript, *args, **kwargs):
+            if name == "gap":
+                raise RuntimeError("boom")
+            return original(name, transcript, *args, **kwargs)
+
+        async def collect():
+            return [event async for event in orchestrator.stream_session(MESSAGES)]
+
+        with mock.patch.object(orchestrator, "_agent_task", side_effect=failing_task):
+            events = await asyncio.wait_for(collect(), timeout=2)
+
+        results = {e["data"]["agent"]: e["data"]["result"] for e in events if e["event"] == "agent"}
+        self.assertEqual(sorted(results), sorted(ANALYSIS_AGENTS))
+        self.assertIn("boom", str(results["gap"]))
+        self.assertIn("error", results["summary"])
+        self.assertIn("participant_skills", results["skill"])
+
+class TestPipeline(unittest.IsolatedAsyncioTestCase):
+
+    async def test_steps_start_when_dependencies_finish(self):
+        order = []
+
+        def step(name, delay):
+            async def run(inputs):
+                await asyncio.sleep(delay)
+                order.append(name)
+                return sorted(inputs)
+            return run
+
+        pipeline = Pipeline()
+        pipeline.add("slow", step("slow", 0.05))
+        pipeline.add("fast", step("fast", 0))
+        pipeline.add("fast.next", step("fast.next", 0), after=["fast"])
+        pipeline.add("both", step("both", 0), after=["slow", "fast"])
+        tasks = pipeline.start()
+        await asyncio.gather(*tasks.values())
+
+        self.assertEqual(order, ["fast", "fast.next", "slow", "both"])
+        self.assertEqual(tasks["both"].result(), ["fast", "slow"])
+        with self.assertRaises(ValueError):
+            pipeline.add("orphan", step("orphan", 0), after=["missing"])
+        self.assertEqual(pipeline.dependents("fast"), ["fast.next", "both"])
+
+    async def test_translation_overlaps_slow_agents(self):
+        llm = SlowQuizLLM(quiz_delay=0.1)
+        analysis = await AIOrchestrator(llm).analyze_session(MESSAGES, target_language="Hindi")
+
+        first_translation = next(i for i, p in enumerate(llm.prompts) if "Strings to translate:" in p)
+        quiz = next(i for i, p in enumerate(llm.prompts) if '"mcqs"' in p)
+        self.assertLess(first_translation, quiz)
+        self.assertIn("topics_covered", analysis["translated"])
+        self.assertNotIn("pending_agents", analysis)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import os
+import tempfile
+import unittest
+
+from app.ai.orchestrator import AIOrchestrator
+from app.services.analytics_service import AnalyticsService
+from app.services.precompute import PrecomputeScheduler
+from app.services.summary_service import SummaryService
+from app.storage.knowledge_store import KnowledgeStore
+from app.storage.sqlite_memory import SQLiteTempMemory
+from app.storage.temp_memory import TempMemory
+from app.tests.test_orchestrator import StubLLM
+
+
+class TestPrecompute(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.llm = StubLLM("{}")
+        self.memory = TempMemory()
+        knowledge_store = KnowledgeStore()
+        orchestrator = AIOrchestrator(self.llm)
+        self.memory.add_listener(orchestrator.results.invalidate_session)
+        self.summary = SummaryService(
+            temp_memory=self.memory,
+            knowledge_store=knowledge_store,
+            llm_client=self.llm,
+            analytics_service=AnalyticsService(self.memory, knowledge_store),
+            orchestrator=orchestrator,
+        )
+        self.scheduler = PrecomputeScheduler(
+            self.memory, self.summary, idle_seconds=0, max_concurrent=1, min_messages=2
+        )
+
+    async def asyncTearDown(self):
+        await self.scheduler.stop()
+
+    def chat(self, room, *lines):
+        for line in lines:
+            self.memory.add_message(room, "alice", "user", line)
+
+    async def drain(self):
+        while self.scheduler._tasks:
+            await next(iter(self.scheduler._tasks))
+
+    async def test_idle_room_is_served_from_precomputed_results(self):
+        self.chat("room-1", "How does recursion terminate?", "With a base case.")
+        self.assertEqual(self.scheduler.scan(), 1)
+        await self.drain()
+        calls = len(self.llm.prompts)
+        self.assertGreater(calls, 0)
+
+        # Unchanged transcript: nothing rescheduled, and the real request is free
+        self.assertEqual(self.scheduler.scan(), 0)
+        analysis = await self.summary.generate_session_analysis("room-1")
+        self.assertIn("topics_covered", analysis)
+        self.assertEqual(len(self.llm.prompts), calls)
+
+        # A new message makes the room due again
+        self.chat("room-1", "What about tail calls?")
+        self.assertEqual(self.scheduler.due_sessions(), ["room-1"])
+
+    async def test_concurrency_cap_and_idle_threshold(self):
+        self.chat("room-1", "a", "b")
+        self.chat("room-2", "c", "d")
+        self.assertEqual(self.scheduler.scan(), 1)
+        self.assertEqual(self.scheduler.scan(), 0)
+        await self.drain()
+        self.assertEqual(self.scheduler.scan(), 1)
+        await self.drain()
+
+        self.scheduler.idle_seconds = 3600
+        self.chat("room-1", "e")
+        self.assertEqual(self.scheduler.scan(), 0)
+
+    async def test_cleared_room_is_forgotten(self):
+        self.chat("room-1", "a", "b")
+        self.memory.clear_session("room-1")
+        self.assertEqual(self.scheduler.scan(), 0)
+        self.assertEqual(self.scheduler.stats()["waiting_sessions"], 0)
+
+
+class TestPrecomputeAcrossWorkers(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, "temp_memory.sqlite3")
+        self.llm = StubLLM("{}")
+        self.schedulers = []
+        for _ in range(2):
+            memory = SQLiteTempMemory(path, ttl_seconds=0)
+            knowledge_store = KnowledgeStore()
+            summary = SummaryService(
+                temp_memory=memory,
+                knowledge_store=knowledge_store,
+                llm_client=self.llm,
+                analytics_service=AnalyticsService(memory, knowledge_store),
+                orchestrator=AIOrchestrator(self.llm),
+            )
+            self.schedulers.append(PrecomputeScheduler(memory, summary, idle_seconds=0, min_messages=2))
+
+    async def asyncTearDown(self):
+        for scheduler in self.schedulers:
+            await scheduler.stop()
+        self.tmp.cleanup()
+
+    async def test_each_transcript_is_analysed_by_one_worker(self):
+        first, second = self.schedulers
+        first.temp_memory.add_message("room-1", "alice", "user", "How does recursion terminate?")
+        second.temp_memory.add_message("room-1", "bob", "user", "With a base case.")
+
+        self.assertEqual(second.scan(), 1)
+        self.assertEqual(first.scan(), 0)
+        self.assertEqual(first.stats()["waiting_sessions"], 0)
+
+    async def test_room_active_on_another_worker_waits(self):
+        first, second = self.schedulers
+        first.idle_seconds = 60
+        first.temp_memory.add_message("room-1", "alice", "user", "a")
+        second.temp_memory.add_message("room-1", "bob", "user", "b")
+        # Quiet for a while as far as this worker's own writes go
+        first._dirty["room-1"] -= 120
+
+        self.assertEqual(first.scan(), 0)
+        self.assertEqual(first.due_sessions(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+from app.ai.orchestrator import AIOrchestrator
+from app.ai.routing import DEFAULT_MAX_TOKENS, RoutingPolicy, create_routing_policy
+from app.ai.transcript import Transcript
+from app.config import settings
+from app.tests.test_orchestrator import MESSAGES, StubLLM
+
+ROUTES = [
+    {"name": "small", "max_transcript_tokens": 100, "model": "light-model",
+     "output_multiplier": 10, "min_output_tokens": 200, "max_output_tokens": 500},
+    {"name": "large", "max_transcript_tokens": None, "model": "",
+     "output_multiplier": 40, "min_output_tokens": 1000, "max_output_tokens": 4000},
+]
+
+
+class RecordingLLM(StubLLM):
+    model_name = "default-model"
+
+    def __init__(self):
+        super().__init__("{}")
+        self.calls = []
+
+    async def generate_response(self, prompt, *args, **kwargs):
+        self.calls.append(kwargs)
+        return await super().generate_response(prompt, *args, **kwargs)
+
+
+class TestRoutingPolicy(unittest.TestCase):
+
+    def test_routes_by_transcript_size(self):
+        policy = RoutingPolicy(ROUTES)
+        self.assertEqual(policy.choose(50, 30), {"route": "small", "model": "light-model", "max_tokens": 300})
+        self.assertEqual(policy.choose(50, 5)["max_tokens"], 200)
+        self.assertEqual(policy.choose(5000, 30), {"route": "large", "model": None, "max_tokens": 1200})
+        self.assertEqual(policy.choose(5000, 500)["max_tokens"], 4000)
+
+    def test_disabled(self):
+        route = RoutingPolicy(ROUTES, enabled=False).choose(50, 30)
+        self.assertEqual(route, {"route": "default", "model": None, "max_tokens": DEFAULT_MAX_TOKENS})
+
+    def test_defaults_keep_the_configured_model(self):
+        self.assertFalse(create_routing_policy().enabled)
+        for tokens in (10, 5000, 50000):
+            self.assertIsNone(RoutingPolicy(settings.LLM_ROUTES).choose(tokens, 30)["model"])
+
+
+class TestOrchestratorRouting(unittest.IsolatedAsyncioTestCase):
+
+    async def test_small_room_uses_light_route_and_is_recorded(self):
+        llm = RecordingLLM()
+        orchestrator = AIOrchestrator(llm)
+        orchestrator.routing = RoutingPolicy(ROUTES)
+
+        await orchestrator._run_agent_once("decision", Transcript(MESSAGES))
+
+        self.assertEqual(llm.calls[0]["model"], "light-model")
+        self.assertLessEqual(llm.calls[0]["max_tokens"], 500)
+        routes = orchestrator.get_metrics()["routes"]
+        self.assertEqual(routes["small"]["calls"], 1)
+        self.assertEqual(routes["small"]["model"], "light-model")
+
+
+if __name__ == "__main__":
+    unittest.main()
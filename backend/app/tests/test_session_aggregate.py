@@ -0,0 +1,92 @@
+import statistics
+import unittest
+
+from app.services.analytics_service import AnalyticsService
+from app.storage.knowledge_store import KnowledgeStore
+from app.storage.session_aggregate import SessionAggregate
+from app.storage.supabase_storage import SupabaseStorage
+from app.storage.temp_memory import TempMemory
+from app.tests.test_chat_history import FakeQuery
+
+
+class TestSessionAggregate(unittest.TestCase):
+
+    def test_gap_stats_follow_eviction(self):
+        times = [0.0, 4.0, 5.0, 11.0, 30.0, 31.5]
+        aggregate = SessionAggregate()
+        for at in times:
+            aggregate.add("alice", "user", at)
+
+        # Evict the two oldest, as a full deque would
+        aggregate.discard_oldest("alice", "user", times[1])
+        aggregate.discard_oldest("alice", "user", times[2])
+
+        kept = times[2:]
+        gaps = [b - a for a, b in zip(kept, kept[1:])]
+        self.assertEqual(aggregate.message_count, 4)
+        self.assertEqual(aggregate.user_message_counts, {"alice": 4})
+        self.assertEqual((aggregate.first_at, aggregate.last_at), (5.0, 31.5))
+        self.assertEqual(aggregate.gap_count, len(gaps))
+        self.assertAlmostEqual(aggregate.gap_mean, statistics.fmean(gaps))
+        self.assertAlmostEqual(aggregate.gap_stdev, statistics.pstdev(gaps))
+
+    def test_counts_by_role_and_user(self):
+        aggregate = SessionAggregate()
+        aggregate.add("alice", "user", 1.0)
+        aggregate.add("bob", "user", 2.0)
+        aggregate.add("ai", "assistant", 3.0)
+        aggregate.discard_oldest("alice", "user", 2.0)
+
+        self.assertEqual(aggregate.role_counts, {"user": 1, "assistant": 1})
+        self.assertEqual(aggregate.user_message_counts, {"bob": 1})
+
+
+class TestAnalyticsFromAggregates(unittest.TestCase):
+
+    def setUp(self):
+        self.memory = TempMemory(max_messages=3, ttl_seconds=0)
+        self.service = AnalyticsService(self.memory, KnowledgeStore())
+
+    def test_endpoints_match_the_retained_messages(self):
+        for user_id, role in [("alice", "user"), ("bob", "user"), ("ai", "assistant"), ("bob", "user")]:
+            self.memory.add_message("room-1", user_id, role, "text")
+
+        analytics = self.service.get_session_analytics("room-1")
+        self.assertEqual(analytics["total_messages"], 3)
+        self.assertEqual(analytics["user_messages"], 2)
+        self.assertEqual(
+            analytics["participant_contributions"],
+            [{"user_id": "bob", "message_count": 2, "contribution_percentage": 100.0}]
+        )
+        self.assertEqual(self.service.get_session_stats("room-1")["user_message_count"], 2)
+        self.assertEqual(self.memory.get_user_message_count("room-1"), 2)
+
+    def test_clear_drops_the_aggregate(self):
+        self.memory.add_message("room-1", "alice", "user", "text")
+        self.memory.clear_session("room-1")
+
+        self.assertIsNone(self.memory.get_session_aggregate("room-1"))
+        self.assertEqual(self.service.get_skill_signals("room-1"), {"signals": []})
+
+
+
+class TestSupabaseSessionAggregate(unittest.TestCase):
+
+    def test_missing_row_falls_back_to_counting(self):
+        messages = [
+            {"room_id": "room-1", "role": "user", "user_id": "alice", "created_at": "2026-01-01T00:00:00+00:00"},
+            {"room_id": "room-1", "role": "user", "user_id": "bob", "created_at": "2026-01-01T00:00:04+00:00"},
+        ]
+        tables = {"session_aggregates": [], "messages": messages}
+        storage = SupabaseStorage()
+        storage.client = type("Client", (), {"table": lambda self, name: FakeQuery(tables[name])})()
+
+        aggregate = storage.get_session_aggregate("room-1")
+        self.assertEqual(aggregate.message_count, 2)
+        self.assertEqual(aggregate.user_message_counts, {"alice": 1, "bob": 1})
+        self.assertEqual(aggregate.gap_mean, 4.0)
+        self.assertIsNone(storage.get_session_aggregate("room-2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
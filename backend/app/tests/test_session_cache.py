@@ -0,0 +1,133 @@
+import unittest
+from unittest import mock
+
+from app.ai.orchestrator import AIOrchestrator
+from app.services.analytics_service import AnalyticsService
+from app.services.quiz_service import QuizService
+from app.services.summary_service import SummaryService
+from app.storage.knowledge_store import KnowledgeStore
+from app.storage.temp_memory import TempMemory
+from app.tests.test_orchestrator import StubLLM
+
+
+class TestSharedSessionCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.llm = StubLLM("{}")
+        self.memory = TempMemory()
+        knowledge_store = KnowledgeStore()
+        orchestrator = AIOrchestrator(self.llm)
+        self.memory.add_listener(orchestrator.results.invalidate_session)
+
+        self.summary = SummaryService(
+            temp_memory=self.memory,
+            knowledge_store=knowledge_store,
+            llm_client=self.llm,
+            analytics_service=AnalyticsService(self.memory, knowledge_store),
+            orchestrator=orchestrator,
+        )
+        self.quiz = QuizService(temp_memory=self.memory, llm_client=self.llm, orchestrator=orchestrator)
+
+        self.memory.add_message("room-1", "alice", "user", "How does recursion terminate?")
+        self.memory.add_message("room-1", "bob", "user", "With a base case.")
+
+    async def test_quiz_reuses_analysis_until_session_changes(self):
+        await self.summary.generate_session_analysis("room-1")
+        calls = len(self.llm.prompts)
+
+        quiz = await self.quiz.generate_quiz("room-1")
+        self.assertIn("mcqs", quiz)
+        self.assertEqual(len(self.llm.prompts), calls)
+
+        # A new message invalidates the session's cached results
+        self.memory.add_message("room-1", "carol", "user", "What about tail calls?")
+        await self.quiz.generate_quiz("room-1")
+        self.assertEqual(len(self.llm.prompts), calls + 1)
+
+    async def test_clear_session_drops_results(self):
+        await self.quiz.generate_quiz("room-1")
+        results = self.quiz.orchestrator.results
+        self.assertEqual(results.stats()["entries"], 1)
+
+        self.memory.clear_session("room-1")
+        self.assertEqual(results.stats()["entries"], 0)
+
+    async def test_quiz_sees_system_messages(self):
+        self.memory.add_message("room-1", "system", "system", "Shared file: recursion-notes.pdf")
+        await self.summary.generate_session_analysis("room-1")
+        calls = len(self.llm.prompts)
+
+        # The analysis leaves system messages out; the quiz keeps every message
+        await self.quiz.generate_quiz("room-1")
+        self.assertEqual(len(self.llm.prompts), calls + 1)
+        self.assertIn("recursion-notes.pdf", self.llm.prompts[-1])
+
+
+class TestIncrementalAnalysis(unittest.IsolatedAsyncioTestCase):
+
+    setUp = TestSharedSessionCache.setUp
+
+    async def test_new_messages_update_previous_result(self):
+        await self.summary.generate_session_analysis("room-1")
+        calls = len(self.llm.prompts)
+
+        self.memory.add_message("room-1", "carol", "user", "What about tail calls?")
+        analysis = await self.summary.generate_session_analysis("room-1")
+        update_prompts = self.llm.prompts[calls:]
+
+        self.assertEqual(analysis["topics_covered"], ["Recursion"])
+        self.assertEqual(len(update_prompts), 5)
+        for prompt in update_prompts:
+            self.assertIn("What about tail calls?", prompt)
+            self.assertNotIn("How does recursion terminate?", prompt)
+            self.assertIn("New messages since then", prompt)
+
+    async def test_drift_forces_full_rebuild(self):
+        await self.summary.generate_session_analysis("room-1")
+        calls = len(self.llm.prompts)
+
+        # Twice as many new messages as covered ones: past the ratio
+        for i in range(4):
+            self.memory.add_message("room-1", "carol", "user", f"Follow-up {i}")
+        await self.summary.generate_session_analysis("room-1")
+
+        self.assertTrue(all(
+            "How does recursion terminate?" in prompt and "New messages since then" not in prompt
+            for prompt in self.llm.prompts[calls:]
+        ))
+
+    async def test_chain_limit_forces_full_rebuild(self):
+        with mock.patch("app.services.summary_service.settings.ANALYSIS_DELTA_MAX_CHAIN", 1):
+            await self.summary.generate_session_analysis("room-1")
+            self.memory.add_message("room-1", "carol", "user", "One")
+            await self.summary.generate_session_analysis("room-1")
+            calls = len(self.llm.prompts)
+
+            self.memory.add_message("room-1", "carol", "user", "Two")
+            await self.summary.generate_session_analysis("room-1")
+
+        self.assertTrue(all("New messages since then" not in prompt for prompt in self.llm.prompts[calls:]))
+
+    async def test_clear_session_drops_baseline(self):
+        await self.summary.generate_session_analysis("room-1")
+        self.assertIn("room-1", self.summary._baselines)
+
+        self.memory.add_message("room-1", "carol", "user", "What about tail calls?")
+        self.assertIn("room-1", self.summary._baselines)
+
+        self.memory.clear_session("room-1")
+        self.assertNotIn("room-1", self.summary._baselines)
+
+    async def test_budget_downgrade_skips_delta_updates(self):
+        await self.summary.generate_session_analysis("room-1")
+        calls = len(self.llm.prompts)
+
+        self.memory.add_message("room-1", "carol", "user", "What about tail calls?")
+        with mock.patch.object(self.summary, "_budget_action", return_value="downgrade"):
+            await self.summary.generate_session_analysis("room-1")
+
+        self.assertTrue(all("New messages since then" not in prompt for prompt in self.llm.prompts[calls:]))
+
+
+if __name__ == "__main__":
+    unittest.main()
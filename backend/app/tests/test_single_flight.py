@@ -0,0 +1,45 @@
+import asyncio
+import unittest
+
+from app.core.single_flight import SingleFlight
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+
+    async def test_concurrent_callers_share_one_run(self):
+        flight = SingleFlight()
+        runs = 0
+
+        async def work():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.01)
+            return {"value": runs}
+
+        results = await asyncio.gather(*[flight.do("s1", work) for _ in range(5)])
+
+        self.assertEqual(runs, 1)
+        self.assertTrue(all(r == {"value": 1} for r in results))
+        self.assertEqual(flight.stats()["coalesced"], 4)
+
+        # Once finished, the next call starts fresh work
+        await flight.do("s1", work)
+        self.assertEqual(runs, 2)
+
+    async def test_cancelled_caller_does_not_cancel_shared_work(self):
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        self.assertEqual(await second, "done")
+
+
+if __name__ == "__main__":
+    unittest.main()
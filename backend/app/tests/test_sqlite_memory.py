@@ -0,0 +1,126 @@
+import multiprocessing
+import os
+import tempfile
+import time
+import unittest
+
+from app.ai.result_cache import AgentResultCache
+from app.ai.transcript import Transcript
+from app.services.chat_service import ChatService
+from app.storage.sqlite_memory import SQLiteTempMemory
+from app.storage.temp_memory import TempMemory
+
+
+def _write_messages(db_path: str, worker: int, count: int) -> None:
+    memory = SQLiteTempMemory(db_path, ttl_seconds=0)
+    for i in range(count):
+        memory.add_message("room-1", f"worker-{worker}", "user", f"{worker}:{i}")
+
+
+class TestSQLiteTempMemory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "temp_memory.sqlite3")
+        self.memory = SQLiteTempMemory(self.db_path, max_messages=3, ttl_seconds=0)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_matches_in_memory_store(self):
+        reference = TempMemory(max_messages=3, ttl_seconds=0)
+        for store in (self.memory, reference):
+            for user_id, role, content in [
+                ("alice", "user", "What is recursion?"),
+                ("ai", "assistant", "A function calling itself."),
+                ("bob", "user", "With a base case."),
+                ("alice", "user", "Thanks!"),
+            ]:
+                store.add_message("room-1", user_id, role, content)
+
+        self.assertEqual(
+            [m["content"] for m in self.memory.get_session_messages("room-1")],
+            [m["content"] for m in reference.get_session_messages("room-1")],
+        )
+        self.assertEqual(self.memory.get_transcript("room-1").text, reference.get_transcript("room-1").text)
+        self.assertEqual(self.memory.get_user_messages("room-1"), reference.get_user_messages("room-1"))
+        self.assertEqual(
+            self.memory.get_session_aggregate("room-1").snapshot()["user_message_counts"],
+            reference.get_session_aggregate("room-1").snapshot()["user_message_counts"],
+        )
+        self.assertEqual(self.memory.get_message_count("room-1"), 3)
+
+    def test_workers_share_rooms(self):
+        other = SQLiteTempMemory(self.db_path, max_messages=3, ttl_seconds=0)
+        self.memory.add_message("room-1", "alice", "user", "first")
+        before = self.memory.get_transcript("room-1")
+
+        other.add_message("room-1", "bob", "user", "second")
+        after = self.memory.get_transcript("room-1")
+
+        self.assertEqual(len(before), 1)
+        self.assertEqual([m["content"] for m in after.messages], ["first", "second"])
+        self.assertEqual(after.fingerprint, Transcript(other.get_session_messages("room-1")).fingerprint)
+
+        other.clear_session("room-1")
+        self.assertEqual(len(self.memory.get_transcript("room-1")), 0)
+
+    def test_results_cache_sees_other_workers_changes(self):
+        other = SQLiteTempMemory(self.db_path, max_messages=3, ttl_seconds=0)
+        results = AgentResultCache(generation_source=self.memory.session_generation)
+        self.memory.add_message("room-1", "alice", "user", "What is recursion?")
+        transcript = self.memory.get_transcript("room-1")
+        results.set(transcript.fingerprint, "quiz", {"mcqs": []}, "room-1", results.generation("room-1"))
+        self.assertIsNotNone(results.get(transcript.fingerprint, "quiz"))
+
+        # Another worker clears the room and the same message is posted again:
+        # same fingerprint, but no listener here heard about it
+        other.clear_session("room-1")
+        other.add_message("room-1", "alice", "user", "What is recursion?")
+        self.assertEqual(self.memory.get_transcript("room-1").fingerprint, transcript.fingerprint)
+        self.assertIsNone(results.get(transcript.fingerprint, "quiz"))
+
+    def test_history_cursor(self):
+        service = ChatService(self.memory)
+        for i in range(3):
+            service.post_message("room-1", "alice", "user", f"message {i}")
+
+        first = service.get_history("room-1", limit=2)
+        self.assertTrue(first["has_more"])
+        rest = service.get_history("room-1", after=first["next_cursor"])
+        self.assertEqual([m["content"] for m in rest["messages"]], ["message 2"])
+        by_id = service.get_history("room-1", after=first["messages"][0]["id"])
+        self.assertEqual(len(by_id["messages"]), 2)
+
+    def test_idle_sessions_expire(self):
+        memory = SQLiteTempMemory(self.db_path, ttl_seconds=60)
+        changes = []
+        memory.add_listener(changes.append)
+        memory.add_message("room-1", "alice", "user", "hi")
+        memory.add_message("room-2", "bob", "user", "hello")
+
+        memory.expiry.clock = lambda: time.time() + 61
+        self.assertEqual(memory.get_session_messages("room-1"), [])
+        self.assertEqual(memory.expiry.sweep(), 1)
+        self.assertEqual(memory.session_count(), 0)
+        self.assertIn("room-2", changes)
+
+    def test_concurrent_worker_processes(self):
+        context = multiprocessing.get_context("spawn")
+        workers = [context.Process(target=_write_messages, args=(self.db_path, w, 20)) for w in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(60)
+            self.assertEqual(worker.exitcode, 0)
+
+        memory = SQLiteTempMemory(self.db_path, max_messages=500, ttl_seconds=0)
+        messages = memory.get_session_messages("room-1")
+        seqs = [m.seq for m in messages]
+        self.assertEqual(len(messages), 60)
+        self.assertEqual(seqs, sorted(set(seqs)))
+        self.assertEqual(memory.get_message_count("room-1"), 60)
+
+
+if __name__ == "__main__":
+    unittest.main()
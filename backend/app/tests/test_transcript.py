@@ -0,0 +1,131 @@
+import unittest
+from unittest import mock
+
+from app.ai.agents.summary_agent import SummaryAgent
+from app.ai.transcript import Transcript
+from app.storage.temp_memory import TempMemory
+
+
+class TestTranscript(unittest.TestCase):
+
+    def test_matches_agent_formatting(self):
+        messages = [
+            {"role": "user", "user_id": "alice", "content": "What is a heap?"},
+            {"role": "assistant", "user_id": "ai", "content": "A tree-based priority queue."},
+        ]
+        agent = SummaryAgent()
+        transcript = Transcript(messages)
+        self.assertEqual(transcript.text, agent.format_chat_for_prompt(messages))
+        self.assertEqual(agent.build_prompt(messages, transcript=transcript), agent.build_prompt(messages))
+
+    def test_chunks_match_chunk_messages(self):
+        messages = [{"role": "user", "user_id": "u", "content": "x" * 400} for _ in range(10)]
+        chunks = Transcript(messages, compact=False).chunks(250)
+        self.assertEqual([c.messages for c in chunks], SummaryAgent().chunk_messages(messages, 250))
+        self.assertEqual(chunks[0].text, "\n".join(SummaryAgent().format_message(m) for m in chunks[0].messages))
+
+
+class TestCompaction(unittest.TestCase):
+
+    UUID_A = "4f1c2a9e-8b7d-4e3f-9a6b-1c2d3e4f5a6b"
+    UUID_B = "9e8d7c6b-5a4f-4e3d-8c2b-1a0f9e8d7c6b"
+
+    def messages(self):
+        return [
+            {"role": "user", "user_id": self.UUID_A, "content": "How   does\nrecursion stop?"},
+            {"role": "user", "user_id": self.UUID_A, "content": "How does recursion stop?"},
+            {"role": "user", "user_id": self.UUID_A, "content": "Any ideas??????"},
+            {"role": "user", "user_id": self.UUID_B, "content": "bob joined the room"},
+            {"role": "user", "user_id": self.UUID_B, "content": "   "},
+            {"role": "user", "user_id": self.UUID_B, "content": "With a base case 😂😂😂😂😂😂"},
+        ]
+
+    def test_compacted_text(self):
+        transcript = Transcript(self.messages())
+        lines = transcript.text.splitlines()
+
+        self.assertIn("u1, u2", lines[0])
+        self.assertEqual(lines[1:], [
+            "[user] u1: How does recursion stop? / Any ideas???",
+            "[user] u2: With a base case 😂😂😂",
+        ])
+        self.assertNotIn(self.UUID_A, transcript.text)
+        self.assertGreater(transcript.token_stats()["reduction_ratio"], 0.3)
+        # Fingerprint still covers every original message
+        self.assertEqual(transcript.fingerprint, Transcript(self.messages(), compact=False).fingerprint)
+
+    def test_restore_aliases(self):
+        transcript = Transcript(self.messages())
+        restored = transcript.restore_aliases({
+            "participant_skills": [{"user_id": "u2", "skills": ["Recursion"]}],
+            "final_decisions": ["u1 will review base cases"],
+        })
+        self.assertEqual(restored["participant_skills"][0]["user_id"], self.UUID_B)
+        # Free text is left alone: it may be the users' own words
+        self.assertEqual(restored["final_decisions"], ["u1 will review base cases"])
+        self.assertEqual(
+            transcript.restore_aliases({"concepts": ["Vectors u1 and u2 are orthogonal"]}),
+            {"concepts": ["Vectors u1 and u2 are orthogonal"]},
+        )
+
+    def test_handle_shaped_ids_do_not_collide(self):
+        transcript = Transcript([
+            {"role": "user", "user_id": self.UUID_A, "content": "Hi"},
+            {"role": "user", "user_id": "u1", "content": "Hello"},
+        ])
+        self.assertEqual(transcript.text.splitlines()[1:], ["[user] u1: Hi", "[user] u2: Hello"])
+        self.assertEqual(transcript.restore_aliases(["u1", "u2"]), [self.UUID_A, "u1"])
+
+    def test_single_speaker_runs_can_be_chunked(self):
+        messages = [{"role": "user", "user_id": "alice", "content": f"point {i}: " + "a base case ends it " * 12} for i in range(2000)]
+        transcript = Transcript(messages)
+
+        chunks = transcript.chunks(12000)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(sum(len(c) for c in chunks), len(messages))
+        for chunk in chunks:
+            self.assertLessEqual(chunk.token_stats()["prompt_tokens"], 12000)
+
+    def test_eviction_of_collapsed_run(self):
+        messages = self.messages()
+        transcript = Transcript(messages)
+        transcript.discard_oldest(messages[0])
+        self.assertIn("[user] u1: Any ideas???", transcript.text)
+        self.assertEqual(len(transcript), 5)
+
+
+class TestTempMemoryTranscript(unittest.TestCase):
+
+    def test_only_new_messages_are_formatted(self):
+        memory = TempMemory()
+        for i in range(5):
+            memory.add_message("s1", "alice", "user", f"message {i}")
+        memory.get_transcript("s1")
+
+        with mock.patch("app.ai.transcript.format_message", wraps=lambda m: m["content"]) as fmt:
+            memory.add_message("s1", "bob", "user", "new")
+            memory.add_message("s1", "system", "system", "bob joined")
+            transcript = memory.get_transcript("s1")
+
+        self.assertEqual(fmt.call_count, 1)
+        self.assertEqual(len(transcript), 6)
+
+    def test_snapshot_is_stable_and_follows_eviction(self):
+        memory = TempMemory(max_messages=3)
+        for i in range(3):
+            memory.add_message("s1", "alice", "user", f"message {i}")
+        before = memory.get_transcript("s1")
+
+        memory.add_message("s1", "alice", "user", "message 3")
+        after = memory.get_transcript("s1")
+
+        self.assertEqual([m["content"] for m in before.messages], ["message 0", "message 1", "message 2"])
+        self.assertEqual([m["content"] for m in after.messages], ["message 1", "message 2", "message 3"])
+        self.assertEqual(after.fingerprint, Transcript(memory.get_session_messages("s1")).fingerprint)
+
+        memory.clear_session("s1")
+        self.assertEqual(len(memory.get_transcript("s1")), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
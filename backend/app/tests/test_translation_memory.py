@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from app.ai.llm_backends import fake_response
+from app.ai.orchestrator import AIOrchestrator
+from app.ai.translation_memory import TranslationMemory, collect_strings, replace_strings
+
+ANALYSIS = {
+    "topics_covered": ["Recursion", "Base case", "Recursion"],
+    "conceptual_gaps": ["No specific gaps detected. Great job!"],
+    "participant_skills": [{"user_id": "alice", "skills": ["Recursion"]}],
+    "mcqs": [{"question": "What stops recursion?", "options": ["A", "B"], "correct_answer": "A"}],
+}
+
+
+class CountingLLM:
+    """
+    Answers with the offline fake and records every prompt.
+    """
+    def __init__(self):
+        self.prompts = []
+
+    async def generate_response(self, prompt, system_prompt="", temperature=None, max_tokens=2000, **kwargs):
+        self.prompts.append(prompt)
+        return fake_response(f"{system_prompt}\n\n{prompt}")
+
+
+class TestStringLeaves(unittest.TestCase):
+
+    def test_collect_is_unique_and_skips_identifiers(self):
+        texts = collect_strings(ANALYSIS)
+        self.assertEqual(texts.count("Recursion"), 1)
+        self.assertNotIn("alice", texts)
+        self.assertNotIn("A", texts)
+
+    def test_replace_keeps_structure(self):
+        translated = replace_strings(ANALYSIS, {"Recursion": "Rekursion"})
+        self.assertEqual(translated["topics_covered"], ["Rekursion", "Base case", "Rekursion"])
+        self.assertEqual(translated["participant_skills"][0]["user_id"], "alice")
+        self.assertEqual(translated["mcqs"][0]["options"], ["A", "B"])
+
+
+class TestTranslationMemory(unittest.IsolatedAsyncioTestCase):
+
+    async def test_only_misses_are_sent(self):
+        llm = CountingLLM()
+        orchestrator = AIOrchestrator(llm)
+
+        first = await orchestrator._run_translation(ANALYSIS, "Hindi")
+        self.assertEqual(first["topics_covered"][0], "[Hindi] Recursion")
+        self.assertEqual(len(llm.prompts), 1)
+
+        # Fully cached: no model call at all
+        again = await orchestrator._run_translation(ANALYSIS, "Hindi")
+        self.assertEqual(again, first)
+        self.assertEqual(len(llm.prompts), 1)
+
+        # One new string: a single call carrying just that string
+        await orchestrator._run_translation({"topics_covered": ["Recursion", "Memoization"]}, "Hindi")
+        self.assertEqual(len(llm.prompts), 2)
+        self.assertIn("Memoization", llm.prompts[-1])
+        self.assertNotIn("Recursion", llm.prompts[-1].split("Strings to translate:")[1])
+
+    async def test_misses_are_batched(self):
+        llm = CountingLLM()
+        content = {"revision_notes": [f"Note number {i}" for i in range(5)]}
+        with mock.patch("app.ai.orchestrator.settings.TRANSLATION_BATCH_SIZE", 2):
+            translated = await AIOrchestrator(llm)._run_translation(content, "French")
+
+        self.assertEqual(len(llm.prompts), 3)
+        self.assertEqual(translated["revision_notes"][4], "[French] Note number 4")
+
+    def test_persists_across_instances(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tm.sqlite3")
+            TranslationMemory(db_path=path).set_many("Hindi", {"Recursion": "पुनरावर्तन"})
+
+            memory = TranslationMemory(db_path=path)
+            self.assertEqual(memory.get_many("hindi", ["Recursion", "Loops"]), {"Recursion": "पुनरावर्तन"})
+            self.assertEqual(memory.stats()["misses"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
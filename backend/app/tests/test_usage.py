@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from app.ai.llm_backends import GeminiBackend
+from app.ai.llm_client import LLMClient
+from app.ai.usage import UsageMeter, usage_scope
+
+
+class Metadata:
+    prompt_token_count = 120
+    candidates_token_count = 30
+
+
+class Response:
+    def __init__(self, text, usage_metadata=None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+class Model:
+    def __init__(self, usage_metadata=None):
+        self.usage_metadata = usage_metadata
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        return Response('{"ok": true}', self.usage_metadata)
+
+
+def make_client(model):
+    backend = GeminiBackend(api_key=None, model_name="gemini-test")
+    backend.model = model
+    client = LLMClient(backend=backend)
+    client.cache = None
+    client.usage = UsageMeter()
+    return client
+
+
+class TestUsageMeter(unittest.IsolatedAsyncioTestCase):
+
+    async def test_reported_usage_is_attributed_to_scope(self):
+        client = make_client(Model(Metadata()))
+        with usage_scope(session="room-1", user="alice"):
+            with usage_scope(agent="summary"):
+                await client.generate_response("hi")
+
+        room = client.usage.totals("session", "room-1")
+        self.assertEqual((room["prompt_tokens"], room["completion_tokens"]), (120, 30))
+        self.assertEqual(room["estimated_calls"], 0)
+        self.assertEqual(client.usage.totals("user", "alice")["total_tokens"], 150)
+        self.assertEqual(client.usage.top("agent")[0]["key"], "summary")
+
+    async def test_missing_metadata_is_estimated(self):
+        client = make_client(Model())
+        with usage_scope(session="room-1"):
+            await client.generate_response("hi")
+
+        room = client.usage.totals("session", "room-1")
+        self.assertGreater(room["prompt_tokens"], 0)
+        self.assertEqual(room["estimated_calls"], 1)
+
+    def test_top_and_bounded_keys(self):
+        meter = UsageMeter(max_keys=2)
+        for room, tokens in (("a", 10), ("b", 50), ("c", 20)):
+            with usage_scope(session=room):
+                meter.record(tokens, 0)
+
+        self.assertEqual([row["key"] for row in meter.top("session")], ["b", "c"])
+        self.assertEqual(meter.stats()["dropped_keys"], 1)
+
+    def test_flush_keeps_totals(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            meter = UsageMeter(max_keys=1, db_path=os.path.join(tmp, "usage.sqlite3"))
+            for room in ("a", "b", "a"):
+                with usage_scope(session=room):
+                    meter.record(100, 10)
+            meter.flush()
+
+            again = UsageMeter(db_path=os.path.join(tmp, "usage.sqlite3"))
+            self.assertEqual(again.totals("session", "a")["total_tokens"], 220)
+            self.assertEqual(again.totals("session", "a")["calls"], 2)
+
+    def test_room_budget(self):
+        meter = UsageMeter()
+        with usage_scope(session="room-1"):
+            meter.record(900, 200)
+
+        with mock.patch("app.ai.usage.settings.USAGE_ROOM_TOKEN_BUDGET", 1000):
+            self.assertEqual(meter.budget_action("room-1"), "reject")
+            self.assertIsNone(meter.budget_action("room-2"))
+            with mock.patch("app.ai.usage.settings.USAGE_BUDGET_ACTION", "downgrade"):
+                self.assertEqual(meter.budget_action("room-1"), "downgrade")
+        with mock.patch("app.ai.usage.settings.USAGE_ROOM_BUDGETS", {"room-1": 5000}):
+            self.assertIsNone(meter.budget_action("room-1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,19 @@
+import hashlib
+from typing import Any, Dict, List
+
+
+def messages_fingerprint(messages: List[Dict[str, Any]]) -> str:
+    """
+    Content hash of a message list (transcript version).
+    Two lists with the same speakers, roles and text in the same order
+    share a fingerprint.
+    """
+    digest = hashlib.sha256()
+    for msg in messages:
+        digest.update(str(msg.get("role", "")).encode("utf-8"))
+        digest.update(b"\x1f")
+        digest.update(str(msg.get("user_id", "")).encode("utf-8"))
+        digest.update(b"\x1f")
+        digest.update(str(msg.get("content", "")).encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()
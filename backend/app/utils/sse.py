@@ -0,0 +1,9 @@
+import json
+from typing import Any
+
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Encode one Server-Sent Events frame with a JSON payload.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
@@ -0,0 +1,105 @@
+"""
+Memory held per stored chat message in TempMemory.
+
+Compares the old message dicts (uuid string id, ISO timestamp, a fresh
+copy of the session id per message) with the MessageRecord objects
+TempMemory stores now. Both fill the same rooms through a deque per room,
+as TempMemory does, and report bytes per message measured by tracemalloc.
+
+Usage (from backend/):
+    python benchmarks/bench_memory.py --rooms 200 --messages 500
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+import uuid
+from collections import deque
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.storage.temp_memory import TempMemory
+
+
+def parsed(value: str) -> str:
+    # A fresh string object, as decoding each request body produces
+    return value.encode("utf-8").decode("utf-8")
+
+
+def incoming(rooms: int, messages: int):
+    """
+    Message fields as they arrive from the API, interleaved across rooms.
+    """
+    for i in range(messages):
+        for room in range(rooms):
+            yield (
+                parsed(f"room-{room:04d}-9b2f-5c6d7e8f9a0b"),
+                parsed(f"{i % 4:08d}-7d3c-4e1a-9b2f-5c6d7e8f9a0b"),
+                parsed("user" if i % 5 else "assistant"),
+                parsed(f"Message {i}: how does dynamic programming reuse overlapping subproblems?"),
+            )
+
+
+def old_store(rooms: int, messages: int) -> dict:
+    sessions = {}
+    for session_id, user_id, role, content in incoming(rooms, messages):
+        sessions.setdefault(session_id, deque(maxlen=messages)).append({
+            "id": str(uuid.uuid4()),
+            "session_id": session_id,
+            "user_id": user_id,
+            "role": role,
+            "content": content,
+            "language": None,
+            "timestamp": datetime.utcnow().isoformat(),
+        })
+    return sessions
+
+
+def new_store(rooms: int, messages: int) -> TempMemory:
+    memory = TempMemory(max_messages=messages, ttl_seconds=0)
+    for session_id, user_id, role, content in incoming(rooms, messages):
+        memory.add_message(session_id, user_id, role, content)
+    return memory
+
+
+def content_bytes(rooms: int, messages: int) -> int:
+    # The message text itself is the same in both layouts
+    tracemalloc.start()
+    kept = [content for _, _, _, content in incoming(rooms, messages)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def measure(build, rooms: int, messages: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    store = build(rooms, messages)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del store
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=500)
+    args = parser.parse_args()
+
+    total = args.rooms * args.messages
+    text = content_bytes(args.rooms, args.messages) / total
+    old = measure(old_store, args.rooms, args.messages) / total
+    new = measure(new_store, args.rooms, args.messages) / total
+    print(f"rooms={args.rooms} messages/room={args.messages}: "
+          f"dict {old:.0f} B/message, MessageRecord {new:.0f} B/message "
+          f"({old / new:.1f}x less); excluding the message text ({text:.0f} B): "
+          f"{old - text:.0f} -> {new - text:.0f} B/message")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Orchestrator throughput / tail-latency benchmark on the offline fake LLM.
+
+Usage (from backend/):
+    python benchmarks/bench_orchestrator.py --sessions 200 --concurrency 20 \
+        --latency lognormal --latency-ms 400 --error-rate 0.02
+
+Add --background 200 to run that many precompute-class analyses alongside;
+the reported latencies are for the interactive sessions only.
+
+No API key or network is needed; every LLM call goes to FakeLLMBackend.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.ai.llm_backends import FakeLLMBackend
+from app.ai.llm_client import LLMClient
+from app.ai.orchestrator import AIOrchestrator
+from app.ai.rate_limiter import PRIORITY_PRECOMPUTE, priority_scope
+
+TOPICS = ["recursion", "binary trees", "hash maps", "dynamic programming", "graph traversal"]
+
+
+def make_session(index: int, size: int):
+    topic = TOPICS[index % len(TOPICS)]
+    return [
+        {
+            "role": "user",
+            "user_id": f"student-{(index + i) % 4}",
+            "content": f"Message {i} of session {index} about {topic}: how does {topic} handle case {i % 7}?",
+        }
+        for i in range(size)
+    ]
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+
+async def run(args) -> None:
+    # Each session has a unique transcript; disable the response cache so
+    # every analysis really goes to the backend.
+    settings.LLM_CACHE_ENABLED = False
+    settings.LLM_MAX_CONCURRENCY = args.llm_concurrency
+    settings.LLM_REQUESTS_PER_MINUTE = 0
+    settings.LLM_TOKENS_PER_MINUTE = 0
+    settings.LLM_RETRY_BASE_DELAY_SECONDS = 0.05
+
+    backend = FakeLLMBackend(
+        latency=args.latency,
+        latency_ms=args.latency_ms,
+        sigma=args.sigma,
+        recorded_path=args.recorded,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    llm = LLMClient(backend=backend)
+    orchestrator = AIOrchestrator(llm)
+
+    gate = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def one(index: int) -> None:
+        async with gate:
+            started = time.perf_counter()
+            await orchestrator.analyze_session(make_session(index, args.messages))
+            latencies.append(time.perf_counter() - started)
+
+    async def background(index: int) -> None:
+        with priority_scope(PRIORITY_PRECOMPUTE):
+            await orchestrator.analyze_session(make_session(args.sessions + index, args.messages))
+
+    background_tasks = [asyncio.create_task(background(i)) for i in range(args.background)]
+    started = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(args.sessions)])
+    elapsed = time.perf_counter() - started
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+
+    print(f"sessions={args.sessions} concurrency={args.concurrency} messages={args.messages} "
+          f"latency={args.latency}:{args.latency_ms}ms error_rate={args.error_rate}")
+    print(f"throughput: {args.sessions / elapsed:.2f} analyses/s ({elapsed:.2f}s total)")
+    for p in (0.50, 0.95, 0.99):
+        print(f"p{int(p * 100)}: {percentile(latencies, p) * 1000:.1f} ms")
+    print(f"max: {max(latencies) * 1000:.1f} ms")
+    metrics = llm.get_metrics()
+    print(f"llm calls={metrics['counters'].get('calls', 0)} retries={metrics['counters'].get('retries', 0)} "
+          f"failures={metrics['counters'].get('failures', 0)}")
+    print(f"queue wait p95: {metrics['queue_wait']['p95_seconds'] * 1000:.1f} ms, "
+          f"call time p95: {metrics['call_time']['p95_seconds'] * 1000:.1f} ms")
+    for name, stats in metrics["limiter"]["classes"].items():
+        if stats["dispatched"]:
+            print(f"  {name}: dispatched={stats['dispatched']} wait p95={stats['wait']['p95_seconds'] * 1000:.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10, help="analyses in flight at once")
+    parser.add_argument("--llm-concurrency", type=int, default=settings.LLM_MAX_CONCURRENCY)
+    parser.add_argument("--messages", type=int, default=50, help="messages per session")
+    parser.add_argument("--background", type=int, default=0, help="precompute-priority analyses run alongside")
+    parser.add_argument("--latency", choices=["fixed", "lognormal", "recorded"], default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--sigma", type=float, default=0.5)
+    parser.add_argument("--recorded", help="file of recorded latencies in ms, one per line")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
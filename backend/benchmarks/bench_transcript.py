@@ -0,0 +1,78 @@
+"""
+CPU spent rendering the transcript for one session analysis.
+
+Compares the old path (every agent formats the full message list, plus a
+separate fingerprint pass) with the shared Transcript kept up to date by
+TempMemory.add_message.
+
+Usage (from backend/):
+    python benchmarks/bench_transcript.py --sizes 500 5000 --repeat 50
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ai.orchestrator import ANALYSIS_AGENTS
+from app.ai.agents.summary_agent import SummaryAgent
+from app.storage.temp_memory import TempMemory
+from app.utils.hashing import messages_fingerprint
+
+
+def fill(memory: TempMemory, session_id: str, size: int) -> None:
+    for i in range(size):
+        memory.add_message(
+            session_id,
+            # Supabase auth ids are UUIDs
+            f"{i % 4:08d}-7d3c-4e1a-9b2f-5c6d7e8f9a0b",
+            "user" if i % 5 else "assistant",
+            f"Message {i}: how does dynamic programming reuse overlapping subproblems in case {i % 7}?",
+        )
+
+
+def per_analysis_ms(fn, repeat: int) -> float:
+    started = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - started) * 1000 / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 5000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    agent = SummaryAgent()
+    for size in args.sizes:
+        memory = TempMemory(max_messages=size)
+        fill(memory, "bench", size)
+        memory.get_transcript("bench")  # first render, as after the first analysis
+
+        def old_path():
+            messages = [m for m in memory.get_session_messages("bench") if m["role"] in ("user", "assistant")]
+            messages_fingerprint(messages)
+            for _ in ANALYSIS_AGENTS:
+                "\n".join(agent.format_message(m) for m in messages)
+
+        def new_path():
+            # One new message since the last analysis, then a full analysis
+            memory.add_message("bench", "student-0", "user", "One more question about memoization?")
+            transcript = memory.get_transcript("bench")
+            transcript.fingerprint
+            for _ in ANALYSIS_AGENTS:
+                agent.format_chat_for_prompt(transcript.messages, transcript)
+
+        old_ms = per_analysis_ms(old_path, args.repeat)
+        new_ms = per_analysis_ms(new_path, args.repeat)
+        tokens = memory.get_transcript("bench").token_stats()
+        print(f"messages={size}: per-agent formatting {old_ms:.2f} ms, shared transcript {new_ms:.2f} ms "
+              f"({old_ms / new_ms if new_ms else float('inf'):.1f}x less CPU per analysis), "
+              f"prompt tokens {tokens['raw_tokens']} -> {tokens['prompt_tokens']} "
+              f"({tokens['reduction_ratio']:.0%} smaller after compaction)")
+
+
+if __name__ == "__main__":
+    main()
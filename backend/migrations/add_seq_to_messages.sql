@@ -0,0 +1,8 @@
+-- Per-room history cursor for /chat/history?after=<seq>
+-- An identity column only ever grows, so within a room it orders messages
+-- the way they were inserted. Existing rows are numbered when it is added.
+ALTER TABLE messages
+ADD COLUMN IF NOT EXISTS seq BIGINT GENERATED ALWAYS AS IDENTITY;
+
+-- Pages are read as: WHERE room_id = ? AND seq > ? ORDER BY seq LIMIT ?
+CREATE INDEX IF NOT EXISTS idx_messages_room_id_seq ON messages(room_id, seq);
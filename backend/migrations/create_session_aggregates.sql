@@ -0,0 +1,209 @@
+-- Running per-room counts for the analytics endpoints, kept up to date by a
+-- trigger on messages so reading them never scans the message rows.
+-- Mirrors app/storage/session_aggregate.py (gap stats: Welford's method).
+CREATE TABLE IF NOT EXISTS session_aggregates (
+    room_id TEXT PRIMARY KEY,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    role_counts JSONB NOT NULL DEFAULT '{}',
+    user_message_counts JSONB NOT NULL DEFAULT '{}',  -- user-role messages per user_id
+    first_at TIMESTAMP WITH TIME ZONE,
+    last_at TIMESTAMP WITH TIME ZONE,
+    gap_count INTEGER NOT NULL DEFAULT 0,
+    gap_mean DOUBLE PRECISION NOT NULL DEFAULT 0,
+    gap_m2 DOUBLE PRECISION NOT NULL DEFAULT 0
+);
+
+-- Only the backend (service role) reads it
+ALTER TABLE session_aggregates ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION add_to_session_aggregate() RETURNS TRIGGER
+LANGUAGE plpgsql SECURITY DEFINER AS $$
+DECLARE
+    agg session_aggregates%ROWTYPE;
+    role_key TEXT := COALESCE(NEW.role, 'unknown');
+    user_key TEXT := COALESCE(NEW.user_id::TEXT, 'anonymous');
+    gap DOUBLE PRECISION;
+    delta DOUBLE PRECISION;
+BEGIN
+    INSERT INTO session_aggregates (room_id) VALUES (NEW.room_id) ON CONFLICT (room_id) DO NOTHING;
+    SELECT * INTO agg FROM session_aggregates WHERE room_id = NEW.room_id FOR UPDATE;
+
+    agg.message_count := agg.message_count + 1;
+    agg.role_counts := jsonb_set(
+        agg.role_counts, ARRAY[role_key],
+        to_jsonb(COALESCE((agg.role_counts ->> role_key)::INTEGER, 0) + 1)
+    );
+    IF role_key = 'user' THEN
+        agg.user_message_counts := jsonb_set(
+            agg.user_message_counts, ARRAY[user_key],
+            to_jsonb(COALESCE((agg.user_message_counts ->> user_key)::INTEGER, 0) + 1)
+        );
+    END IF;
+
+    IF agg.last_at IS NULL THEN
+        agg.first_at := NEW.created_at;
+    ELSE
+        gap := EXTRACT(EPOCH FROM (NEW.created_at - agg.last_at));
+        agg.gap_count := agg.gap_count + 1;
+        delta := gap - agg.gap_mean;
+        agg.gap_mean := agg.gap_mean + delta / agg.gap_count;
+        agg.gap_m2 := agg.gap_m2 + delta * (gap - agg.gap_mean);
+    END IF;
+    agg.last_at := NEW.created_at;
+
+    UPDATE session_aggregates SET
+        message_count = agg.message_count,
+        role_counts = agg.role_counts,
+        user_message_counts = agg.user_message_counts,
+        first_at = agg.first_at,
+        last_at = agg.last_at,
+        gap_count = agg.gap_count,
+        gap_mean = agg.gap_mean,
+        gap_m2 = agg.gap_m2
+    WHERE room_id = NEW.room_id;
+    RETURN NEW;
+END;
+$$;
+
+-- Welford's update run backwards, as SessionAggregate._remove_gap
+CREATE OR REPLACE FUNCTION session_aggregate_remove_gap(
+    INOUT n INTEGER, INOUT mean DOUBLE PRECISION, INOUT m2 DOUBLE PRECISION, gap DOUBLE PRECISION
+) LANGUAGE plpgsql IMMUTABLE AS $$
+DECLARE
+    new_mean DOUBLE PRECISION;
+BEGIN
+    IF n <= 1 THEN
+        n := 0; mean := 0; m2 := 0;
+        RETURN;
+    END IF;
+    new_mean := (n * mean - gap) / (n - 1);
+    m2 := GREATEST(0, m2 - (gap - mean) * (gap - new_mean));
+    mean := new_mean;
+    n := n - 1;
+END;
+$$;
+
+-- Uncount one deleted message, so deleting a single row (not just a whole
+-- room) keeps the aggregate exact. The gaps around it are found from its
+-- neighbours among the remaining rows: the gaps of a room only depend on
+-- its sorted timestamps, so this also holds for equal timestamps.
+CREATE OR REPLACE FUNCTION drop_session_aggregate() RETURNS TRIGGER
+LANGUAGE plpgsql SECURITY DEFINER AS $$
+DECLARE
+    agg session_aggregates%ROWTYPE;
+    role_key TEXT := COALESCE(OLD.role, 'unknown');
+    user_key TEXT := COALESCE(OLD.user_id::TEXT, 'anonymous');
+    prev_at TIMESTAMP WITH TIME ZONE;
+    next_at TIMESTAMP WITH TIME ZONE;
+    gap DOUBLE PRECISION;
+    delta DOUBLE PRECISION;
+BEGIN
+    SELECT * INTO agg FROM session_aggregates WHERE room_id = OLD.room_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RETURN OLD;
+    END IF;
+    IF agg.message_count <= 1 THEN
+        DELETE FROM session_aggregates WHERE room_id = OLD.room_id;
+        RETURN OLD;
+    END IF;
+
+    agg.message_count := agg.message_count - 1;
+    agg.role_counts := CASE
+        WHEN COALESCE((agg.role_counts ->> role_key)::INTEGER, 0) <= 1 THEN agg.role_counts - role_key
+        ELSE jsonb_set(agg.role_counts, ARRAY[role_key], to_jsonb((agg.role_counts ->> role_key)::INTEGER - 1))
+    END;
+    IF role_key = 'user' THEN
+        agg.user_message_counts := CASE
+            WHEN COALESCE((agg.user_message_counts ->> user_key)::INTEGER, 0) <= 1 THEN agg.user_message_counts - user_key
+            ELSE jsonb_set(agg.user_message_counts, ARRAY[user_key], to_jsonb((agg.user_message_counts ->> user_key)::INTEGER - 1))
+        END;
+    END IF;
+
+    -- The deleted row is already gone: its neighbours are the remaining rows
+    SELECT MAX(created_at) INTO prev_at FROM messages WHERE room_id = OLD.room_id AND created_at <= OLD.created_at;
+    SELECT MIN(created_at) INTO next_at FROM messages WHERE room_id = OLD.room_id AND created_at >= OLD.created_at;
+
+    IF prev_at IS NOT NULL THEN
+        SELECT * INTO agg.gap_count, agg.gap_mean, agg.gap_m2 FROM session_aggregate_remove_gap(
+            agg.gap_count, agg.gap_mean, agg.gap_m2, EXTRACT(EPOCH FROM (OLD.created_at - prev_at))
+        );
+    END IF;
+    IF next_at IS NOT NULL THEN
+        SELECT * INTO agg.gap_count, agg.gap_mean, agg.gap_m2 FROM session_aggregate_remove_gap(
+            agg.gap_count, agg.gap_mean, agg.gap_m2, EXTRACT(EPOCH FROM (next_at - OLD.created_at))
+        );
+    END IF;
+    IF prev_at IS NOT NULL AND next_at IS NOT NULL THEN
+        -- A middle row: its two gaps become one
+        gap := EXTRACT(EPOCH FROM (next_at - prev_at));
+        agg.gap_count := agg.gap_count + 1;
+        delta := gap - agg.gap_mean;
+        agg.gap_mean := agg.gap_mean + delta / agg.gap_count;
+        agg.gap_m2 := agg.gap_m2 + delta * (gap - agg.gap_mean);
+    END IF;
+    IF prev_at IS NULL THEN
+        agg.first_at := next_at;
+    END IF;
+    IF next_at IS NULL THEN
+        agg.last_at := prev_at;
+    END IF;
+
+    UPDATE session_aggregates SET
+        message_count = agg.message_count,
+        role_counts = agg.role_counts,
+        user_message_counts = agg.user_message_counts,
+        first_at = agg.first_at,
+        last_at = agg.last_at,
+        gap_count = agg.gap_count,
+        gap_mean = agg.gap_mean,
+        gap_m2 = agg.gap_m2
+    WHERE room_id = OLD.room_id;
+    RETURN OLD;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS messages_add_to_session_aggregate ON messages;
+CREATE TRIGGER messages_add_to_session_aggregate
+AFTER INSERT ON messages
+FOR EACH ROW EXECUTE FUNCTION add_to_session_aggregate();
+
+DROP TRIGGER IF EXISTS messages_drop_session_aggregate ON messages;
+CREATE TRIGGER messages_drop_session_aggregate
+AFTER DELETE ON messages
+FOR EACH ROW EXECUTE FUNCTION drop_session_aggregate();
+
+-- Backfill rooms that already have messages
+WITH gaps AS (
+    SELECT room_id,
+           EXTRACT(EPOCH FROM (created_at - LAG(created_at) OVER (PARTITION BY room_id ORDER BY created_at))) AS gap
+    FROM messages
+), gap_stats AS (
+    SELECT room_id,
+           COUNT(gap) AS gap_count,
+           COALESCE(AVG(gap), 0) AS gap_mean,
+           COALESCE(VAR_POP(gap) * COUNT(gap), 0) AS gap_m2
+    FROM gaps GROUP BY room_id
+), roles AS (
+    SELECT room_id, jsonb_object_agg(role, n) AS role_counts
+    FROM (SELECT room_id, COALESCE(role, 'unknown') AS role, COUNT(*) AS n FROM messages GROUP BY 1, 2) r
+    GROUP BY room_id
+), users AS (
+    SELECT room_id, jsonb_object_agg(user_id, n) AS user_message_counts
+    FROM (
+        SELECT room_id, COALESCE(user_id::TEXT, 'anonymous') AS user_id, COUNT(*) AS n
+        FROM messages WHERE role = 'user' GROUP BY 1, 2
+    ) u
+    GROUP BY room_id
+)
+INSERT INTO session_aggregates (
+    room_id, message_count, role_counts, user_message_counts,
+    first_at, last_at, gap_count, gap_mean, gap_m2
+)
+SELECT m.room_id, COUNT(*), r.role_counts, COALESCE(u.user_message_counts, '{}'),
+       MIN(m.created_at), MAX(m.created_at), g.gap_count, g.gap_mean, g.gap_m2
+FROM messages m
+JOIN roles r USING (room_id)
+JOIN gap_stats g USING (room_id)
+LEFT JOIN users u USING (room_id)
+GROUP BY m.room_id, r.role_counts, u.user_message_counts, g.gap_count, g.gap_mean, g.gap_m2
+ON CONFLICT (room_id) DO NOTHING;
@@ -13,10 +13,14 @@ const ChatRoom = ({ roomId }) => {
     const [loading, setLoading] = useState(false);
     const { user, profile } = useAuth();
     const scrollRef = useRef(null);
+    // next_cursor of the last history page: refetches only ask for newer messages
+    const cursorRef = useRef(null);
 
     const API_URL = import.meta.env.VITE_API_URL || 'http://127.0.0.1:8000/api/v1';
 
     useEffect(() => {
+        setMessages([]);
+        cursorRef.current = null;
         fetchHistory();
 
         const channel = supabase
@@ -30,10 +34,15 @@ const ChatRoom = ({ roomId }) => {
                     filter: `room_id=eq.${roomId}`
                 },
                 (payload) => {
-                    setMessages(prev => [...prev, payload.new]);
+                    appendMessages([payload.new]);
                 }
             )
-            .subscribe();
+            .subscribe((status) => {
+                // After a reconnect, catch up on what arrived while we were away
+                if (status === 'SUBSCRIBED' && cursorRef.current) {
+                    fetchHistory();
+                }
+            });
 
         return () => {
             supabase.removeChannel(channel);
@@ -46,10 +55,27 @@ const ChatRoom = ({ roomId }) => {
         }
     }, [messages]);
 
+    const appendMessages = (incoming) => {
+        if (!incoming.length) return;
+        setMessages(prev => {
+            const seen = new Set(prev.map(m => m.id));
+            const fresh = incoming.filter(m => !seen.has(m.id));
+            return fresh.length ? [...prev, ...fresh] : prev;
+        });
+    };
+
     const fetchHistory = async () => {
         try {
-            const res = await axios.get(`${API_URL}/chat/history/${roomId}`);
-            setMessages(res.data || []);
+            let hasMore = true;
+            while (hasMore) {
+                const res = await axios.get(`${API_URL}/chat/history/${roomId}`, {
+                    params: cursorRef.current ? { after: cursorRef.current } : {}
+                });
+                const { messages: page = [], next_cursor, has_more } = res.data || {};
+                appendMessages(page);
+                if (next_cursor) cursorRef.current = next_cursor;
+                hasMore = has_more && page.length > 0;
+            }
         } catch (err) {
             console.error("Failed to fetch history:", err);
         }
@@ -78,43 +104,36 @@ const ChatRoom = ({ roomId }) => {
         }
     };
 
+    const waitForJob = async (jobId, intervalMs = 1500) => {
+        while (true) {
+            const res = await axios.get(`${API_URL}/history/jobs/${jobId}`);
+            if (res.data.status === 'done' || res.data.status === 'failed') {
+                return res.data;
+            }
+            await new Promise(resolve => setTimeout(resolve, intervalMs));
+        }
+    };
+
     const endSession = async () => {
         if (window.confirm("Are you sure you want to end this session? This will generate a summary and archive the chat.")) {
             setLoading(true);
             try {
-                // Call end session endpoint with user_id in headers
+                // Call end session endpoint with user_id in headers.
+                // Ask the backend to analyse and archive in the background
+                // (202 + job id), then poll the job until it finishes.
                 const res = await axios.post(
                     `${API_URL}/history/end`,
                     { room_id: roomId },
-                    { headers: { 'X-User-ID': user?.id } }
+                    { headers: { 'X-User-ID': user?.id }, params: { background: true } }
                 );
+                const job = await waitForJob(res.data.job_id);
+                if (job.status !== 'done') {
+                    throw new Error(job.error || 'End session job failed');
+                }
 
-                // Navigate to summary page to see the results
-                // We pass the analysis data via state or just let the Summary page fetch the latest
-                // Since "End" clears the room, we should verify Summary page can still fetch the stats/skills
-                // BUT: The Summary page fetches from /analytics/stats/{roomId} etc.
-                // If we cleared the room messages, those endpoints might return empty UNLESS we fetch from history.
-                // CURRENT ACTION: The User wants to see the summary effectively.
-                // Ideally, we redirect to a specific summary view or just generic summary page.
-                // Let's rely on the Summary page fetching fresh data from the *archived* session if we support that,
-                // OR we pass the data we just got from 'end' via navigation state?
-
-                // Simpler approach for now:
-                // 1. The backend 'end' logic archives it.
-                // 2. We redirect to /summary/:roomId. 
-                // 3. The /summary/:roomId page currently fetches from 'stats'/'signals' which look at 'messages' table.
-                // PROBLEM: If we clear 'messages', Summary page fails.
-                // FIX: Summary page should fetch from History if Active is empty? Or we delay clearing?
-
-                // TEMPORARY FIX: We won't clear immediately in the backend if we rely on Summary page reading active messages.
-                // BUT the requirements say "creates new session automatically".
-                // So we MUST clear.
-
-                // BETTER FIX: Pass the 'analysis' result directly to the Summary page via react-router state.
-                // Update Summary.jsx to use location.state if available.
-
-                // Let's navigate with state
-                navigate(`/summary/${roomId}`, { state: { analysis: res.data.analysis } });
+                // Pass the analysis to the Summary page via router state,
+                // since the archived room's messages are cleared.
+                navigate(`/summary/${roomId}`, { state: { analysis: job.result.analysis } });
 
             } catch (err) {
                 console.error("Failed to end session:", err);